@@ -249,41 +249,77 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    // Check translation status
+    // Apply a status update; returns true once the task has finished
+    function handleStatus(taskId, data) {
+        console.log('Status update:', data);  // Debug log
+        
+        if (data.state === 'SUCCESS') {
+            const result = data.result;
+            console.log('Task result:', result);  // Debug log
+            
+            if (result.status === 'success') {
+                showSuccess('Video processed successfully!');
+                enableDownload(taskId);
+            } else if (result.status === 'info') {
+                showInfo(result.message);
+                hideDownloadButton();
+            } else if (result.status === 'error') {
+                showError(result.message);
+                hideDownloadButton();
+            }
+            return true;
+        } else if (data.state === 'PROGRESS') {
+            const status = data.meta ? data.meta.status : 'Processing...';
+            updateProgress(status);
+        } else if (data.state === 'FAILURE') {
+            showError('Task failed: ' + (data.error || 'Unknown error'));
+            hideDownloadButton();
+            return true;
+        }
+        return false;
+    }
+
+    // Follow translation status: pushed over Server-Sent Events, with long-polling as a fallback
     function checkStatus(taskId) {
-        fetch(`/api/status/${taskId}`)
+        if (!window.EventSource) {
+            pollStatus(taskId, null);
+            return;
+        }
+        
+        const source = new EventSource(`/api/events/${taskId}`);
+        let finished = false;
+        source.onmessage = (event) => {
+            finished = handleStatus(taskId, JSON.parse(event.data));
+            if (finished) {
+                source.close();
+            }
+        };
+        source.onerror = () => {
+            source.close();
+            if (!finished) {
+                console.log('Event stream unavailable, falling back to long-polling');
+                pollStatus(taskId, null);
+            }
+        };
+    }
+
+    // Long-poll: the server holds the request until the status differs from the ETag we send
+    function pollStatus(taskId, etag) {
+        const headers = etag ? { 'If-None-Match': etag } : {};
+        fetch(`/api/status/${taskId}?wait=25`, { headers })
             .then(response => {
+                if (response.status === 304) {
+                    return null;
+                }
                 if (!response.ok) {
                     throw new Error('Network response was not ok');
                 }
+                etag = response.headers.get('ETag');
                 return response.json();
             })
             .then(data => {
-                console.log('Status update:', data);  // Debug log
-                
-                if (data.state === 'SUCCESS') {
-                    const result = data.result;
-                    console.log('Task result:', result);  // Debug log
-                    
-                    if (result.status === 'success') {
-                        showSuccess('Video processed successfully!');
-                        enableDownload(taskId);
-                    } else if (result.status === 'info') {
-                        showInfo(result.message);
-                        hideDownloadButton();
-                    } else if (result.status === 'error') {
-                        showError(result.message);
-                        hideDownloadButton();
-                    }
-                } else if (data.state === 'PROGRESS') {
-                    const status = data.meta ? data.meta.status : 'Processing...';
-                    updateProgress(status);
-                    setTimeout(() => checkStatus(taskId), 2000);
-                } else if (data.state === 'FAILURE') {
-                    showError('Task failed: ' + (data.result || 'Unknown error'));
-                    hideDownloadButton();
-                } else {
-                    setTimeout(() => checkStatus(taskId), 2000);
+                if (!data || !handleStatus(taskId, data)) {
+                    pollStatus(taskId, etag);
                 }
             })
             .catch(error => {
@@ -7,11 +7,67 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# templates/ and static/ live at the project root, where app.py finds them too
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 def create_app():
-    app = Flask(__name__)
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(PROJECT_ROOT, 'templates'),
+        static_folder=os.path.join(PROJECT_ROOT, 'static')
+    )
     CORS(app)  # Enable CORS for all routes
+    # Let Apache/lighttpd stream downloads when DOWNLOAD_OFFLOAD=x-sendfile
+    app.config['USE_X_SENDFILE'] = os.getenv('DOWNLOAD_OFFLOAD', '').lower() == 'x-sendfile'
     return app
 
+# Network-bound stages run on a thread/gevent pool, CPU-bound stages on prefork
+CELERY_IO_QUEUE = os.getenv('CELERY_IO_QUEUE', 'io')
+CELERY_CPU_QUEUE = os.getenv('CELERY_CPU_QUEUE', 'cpu')
+# Short jobs (see app.utils.media_probe) run on their own queues so they never wait behind long ones
+CELERY_IO_FAST_QUEUE = os.getenv('CELERY_IO_FAST_QUEUE', 'io-fast')
+CELERY_CPU_FAST_QUEUE = os.getenv('CELERY_CPU_FAST_QUEUE', 'cpu-fast')
+FAST_QUEUES = {CELERY_IO_QUEUE: CELERY_IO_FAST_QUEUE, CELERY_CPU_QUEUE: CELERY_CPU_FAST_QUEUE}
+
+def stage_routes():
+    """Route each pipeline stage task to the queue matching what it is bound by."""
+    io_stages = [
+        'youtube_info_stage', 'audio_download_stage', 'video_download_stage', 'merge_streams_stage',
+        'transcribe_stage', 'translate_stage', 'speech_stage', 'finalize_stage',
+        'fanout_stage', 'language_done_stage', 'finalize_languages_stage', 'languages_failed_stage',
+        'janitor_task'
+    ]
+    cpu_stages = ['extract_stage', 'mux_stage', 'progressive_stage']
+    routes = {f'app.tasks.{name}': {'queue': CELERY_IO_QUEUE} for name in io_stages}
+    routes.update({f'app.tasks.{name}': {'queue': CELERY_CPU_QUEUE} for name in cpu_stages})
+    return routes
+
+STAGE_ROUTES = stage_routes()
+
+def job_lane(args):
+    """Return the lane of the job a stage task is called with, or None."""
+    for arg in args or ():
+        # Chord callbacks get the list of jobs their branches returned
+        for value in arg if isinstance(arg, (list, tuple)) else [arg]:
+            if isinstance(value, dict) and value.get('lane'):
+                return value['lane']
+    return None
+
+def route_stage(name, args, kwargs, options, task=None, **kw):
+    """Celery router: a stage's queue from stage_routes(), or its fast-lane twin for fast-lane jobs.
+
+    Called whenever a stage is sent, including by the stage before it in the chain,
+    so every stage of a job follows the job's lane.
+    """
+    route = STAGE_ROUTES.get(name)
+    if route is None:
+        return None
+    queue = route['queue']
+    if job_lane(args) == 'fast':
+        queue = FAST_QUEUES[queue]
+    # A new dict every time: Celery swaps the queue name for a Queue object in place
+    return {'queue': queue}
+
 def create_celery(app):
     # Configure Celery with old style config
     app.config.update(
@@ -22,7 +78,15 @@ def create_celery(app):
         CELERY_ACCEPT_CONTENT=['json'],
         CELERY_TIMEZONE='UTC',
         CELERY_ENABLE_UTC=True,
-        CELERY_IMPORTS=['app.tasks']
+        CELERY_IMPORTS=['app.tasks'],
+        CELERY_ROUTES=(route_stage,),
+        # Run `celery -A app.celery beat` to schedule the disk janitor
+        CELERYBEAT_SCHEDULE={
+            'janitor-sweep': {
+                'task': 'app.tasks.janitor_task',
+                'schedule': float(os.getenv('JANITOR_INTERVAL', '600'))
+            }
+        }
     )
 
     celery = Celery(
@@ -1,66 +1,388 @@
-from flask import request, jsonify, send_file
-from app import app, celery
-from app.tasks import process_video, process_youtube_video
+from flask import Blueprint, request, jsonify, send_from_directory, Response, stream_with_context, render_template
+from werkzeug.utils import secure_filename
+from app import app, celery, CELERY_IO_QUEUE, CELERY_CPU_QUEUE, CELERY_IO_FAST_QUEUE, CELERY_CPU_FAST_QUEUE
+from app.tasks import start_video_job, start_youtube_job, start_languages_job, languages_result
+from app.utils import result_cache, metrics, uploads, progress, hls, janitor, backends, media_probe
+from app.utils.downloads import send_output, DOWNLOAD_MAX_AGE
 import os
+import uuid
+
+# Endpoints shared with the standalone app.py, which registers this blueprint too
+api = Blueprint('api', __name__)
+
+def cached_response(cache_key, progressive=False):
+    """Return a response for an already translated input, or None on a cache miss.
+
+    A progressive request gets the finished playlist while it is still on disk, and
+    ``progressive: false`` otherwise, meaning the video must be fetched from /api/download.
+    """
+    cached = result_cache.lookup(cache_key)
+    if not cached:
+        return None
+
+    result = {'status': 'success', 'video_path': cached['video_path'], 'cached': True}
+    body = {
+        'task_id': cached['task_id'],
+        'status': 'completed',
+        'cached': True
+    }
+    if progressive:
+        if os.path.exists(os.path.join(hls.job_dir(cached['task_id']), hls.PLAYLIST_NAME)):
+            body['playlist'] = result['playlist'] = hls.playlist_url(cached['task_id'])
+        else:
+            body['progressive'] = False
+    # Refresh the stored task result so status polling works even if it had expired
+    celery.backend.store_result(cached['task_id'], result, 'SUCCESS')
+    progress.publish(cached['task_id'], 'SUCCESS', result=result)
+    return jsonify(body)
+
+def requested_languages(data):
+    """Return the target languages of a request.
+
+    ``target_languages`` may be repeated, comma-separated or a JSON list; without
+    it the single ``target_language`` is used. Raises ValueError for a value that
+    is not a string.
+    """
+    values = data.getlist('target_languages') if hasattr(data, 'getlist') else data.get('target_languages') or []
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError('target_languages must be a string or a list of strings')
+    languages = []
+    for value in values:
+        for language in value.split(','):
+            language = language.strip()
+            if language and language not in languages:
+                languages.append(language)
+    if languages:
+        return languages
+    language = data.get('target_language') or 'en'
+    if not isinstance(language, str):
+        raise ValueError('target_language must be a string')
+    return [language]
+
+def wants_progressive(data):
+    return str(data.get('progressive', '')).lower() in ('1', 'true', 'yes')
+
+def requested_backends(data):
+    """Return the ASR, MT and TTS backends for a request (``asr_backend`` etc.), defaults filled in.
+
+    Raises ValueError for an unknown backend.
+    """
+    return backends.resolve({kind: data.get(f'{kind}_backend') for kind in backends.KINDS})
+
+def start_translation(source_digest, target_languages, video_path=None, youtube_url=None, progressive=False,
+                      backend_names=None):
+    """Answer from the result cache or queue the pipeline for a video or YouTube URL.
+
+    Several languages share one job that extracts and transcribes the video once.
+    Progressive jobs publish an HLS playlist that grows while the job runs. Inputs
+    are probed before queueing: those without audio are rejected, and short ones
+    go to the fast lane.
+    """
+    backend_names = backend_names or backends.resolve()
+    backend_options = backends.cache_options(backend_names)
+    if len(target_languages) == 1:
+        options = dict(backend_options, progressive=True) if progressive else backend_options
+        cache_key = result_cache.make_cache_key(source_digest, target_languages[0], **options)
+        response = cached_response(cache_key, progressive)
+        if response:
+            return response
+        
+        try:
+            probe = media_probe.probe_source(video_path, youtube_url)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Process video asynchronously
+        if youtube_url:
+            task = start_youtube_job(
+                youtube_url, target_languages[0], cache_key=cache_key, progressive=progressive,
+                backend_names=backend_names, probe=probe
+            )
+        else:
+            task = start_video_job(
+                video_path, target_languages[0], cache_key=cache_key, progressive=progressive,
+                backend_names=backend_names, probe=probe
+            )
+        response = {
+            'task_id': task.id,
+            'status': 'processing'
+        }
+        if progressive:
+            response['playlist'] = hls.playlist_url(task.id)
+        return jsonify(response)
+    
+    if progressive:
+        return jsonify({'error': 'Progressive output supports a single target language'}), 400
+    
+    cache_keys = {
+        language: result_cache.make_cache_key(source_digest, language, **backend_options)
+        for language in target_languages
+    }
+    cached_languages = {}
+    for language, cache_key in cache_keys.items():
+        cached = result_cache.lookup(cache_key)
+        if cached:
+            cached_languages[language] = {
+                'status': 'success',
+                'video_path': cached['video_path'],
+                'video_id': cached['task_id'],
+                'cached': True
+            }
+    
+    if len(cached_languages) == len(target_languages):
+        task_id = str(uuid.uuid4())
+        result = languages_result(cached_languages)
+        celery.backend.store_result(task_id, result, 'SUCCESS')
+        progress.publish(task_id, 'SUCCESS', result=result)
+        return jsonify({
+            'task_id': task_id,
+            'status': 'completed',
+            'cached': True,
+            'languages': target_languages
+        })
+    
+    try:
+        probe = media_probe.probe_source(video_path, youtube_url)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    task = start_languages_job(
+        target_languages, cache_keys, cached_languages, video_path=video_path, youtube_url=youtube_url,
+        backend_names=backend_names, probe=probe
+    )
+    return jsonify({
+        'task_id': task.id,
+        'status': 'processing',
+        'languages': target_languages
+    })
+
+@api.route('/')
+def index():
+    return render_template('index.html')
+
+@api.route('/api/upload', methods=['POST'])
+def upload_video():
+    if 'video' not in request.files:
+        return jsonify({'error': 'No video file provided'}), 400
+    
+    video_file = request.files['video']
+    try:
+        target_languages = requested_languages(request.form)
+        backend_names = requested_backends(request.form)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if video_file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    # Stream the upload to disk under its content-derived name
+    video_path, digest = uploads.save_file_upload(video_file)
+    return start_translation(
+        digest, target_languages, video_path=video_path, progressive=wants_progressive(request.form),
+        backend_names=backend_names
+    )
+
+@api.route('/api/youtube', methods=['POST'])
+def process_youtube():
+    data = request.get_json(silent=True) or {}
+    youtube_url = data.get('url')
+    try:
+        target_languages = requested_languages(data)
+        backend_names = requested_backends(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not youtube_url:
+        return jsonify({'error': 'No YouTube URL provided'}), 400
+    
+    source_digest = result_cache.source_digest_for_url(youtube_url)
+    return start_translation(
+        source_digest, target_languages, youtube_url=youtube_url, progressive=wants_progressive(data),
+        backend_names=backend_names
+    )
 
 @app.route('/api/translate', methods=['POST'])
 def translate_video():
-    target_language = request.form.get('target_language', 'en')
+    progressive = wants_progressive(request.form)
+    try:
+        target_languages = requested_languages(request.form)
+        backend_names = requested_backends(request.form)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     if 'video' in request.files:
         video_file = request.files['video']
         if video_file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
         
-        # Save the video file temporarily
-        video_path = os.path.join('uploads', video_file.filename)
-        os.makedirs('uploads', exist_ok=True)
-        video_file.save(video_path)
-        
-        # Process video asynchronously
-        task = process_video.delay(video_path, target_language)
+        # Stream the upload to disk under its content-derived name
+        video_path, digest = uploads.save_file_upload(video_file)
+        return start_translation(
+            digest, target_languages, video_path=video_path, progressive=progressive, backend_names=backend_names
+        )
         
     elif 'youtube_url' in request.form:
         youtube_url = request.form.get('youtube_url')
         if not youtube_url:
             return jsonify({'error': 'No YouTube URL provided'}), 400
         
-        # Process YouTube video asynchronously
-        task = process_youtube_video.delay(youtube_url, target_language)
+        source_digest = result_cache.source_digest_for_url(youtube_url)
+        return start_translation(
+            source_digest, target_languages, youtube_url=youtube_url, progressive=progressive,
+            backend_names=backend_names
+        )
         
     else:
         return jsonify({'error': 'No video file or YouTube URL provided'}), 400
 
+@api.route('/api/uploads', methods=['POST'])
+def init_chunked_upload():
+    data = request.get_json(silent=True) or request.form
+    filename = data.get('filename')
+    if not filename:
+        return jsonify({'error': 'No filename provided'}), 400
+    
+    try:
+        session = uploads.init_upload(filename, data.get('size'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify({
-        'task_id': task.id,
-        'status': 'processing'
+        'upload_id': session['upload_id'],
+        'offset': session['offset'],
+        'chunk_size': uploads.UPLOAD_CHUNK_SIZE
     })
 
-@app.route('/api/status/<task_id>', methods=['GET'])
+@api.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_chunked_upload(upload_id):
+    try:
+        session = uploads.get_upload(upload_id)
+    except uploads.UploadNotFound:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    return jsonify({
+        'upload_id': upload_id,
+        'offset': session['offset'],
+        'size': session['size']
+    })
+
+@api.route('/api/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    offset = request.headers.get('Upload-Offset', request.args.get('offset'))
+    if offset is None or not offset.isdigit():
+        return jsonify({'error': 'Upload-Offset header or offset parameter required'}), 400
+    
+    try:
+        new_offset = uploads.append_chunk(upload_id, int(offset), request.stream, request.content_length)
+    except uploads.UploadNotFound:
+        return jsonify({'error': 'Upload not found'}), 404
+    except uploads.UploadOffsetMismatch as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), 409
+    except uploads.UploadBusy as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'upload_id': upload_id,
+        'offset': new_offset
+    })
+
+@api.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    data = request.get_json(silent=True) or request.form
+    try:
+        target_languages = requested_languages(data)
+        backend_names = requested_backends(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        video_path, digest = uploads.complete_upload(upload_id)
+    except uploads.UploadNotFound:
+        return jsonify({'error': 'Upload not found'}), 404
+    except uploads.UploadBusy as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return start_translation(
+        digest, target_languages, video_path=video_path, progressive=wants_progressive(data),
+        backend_names=backend_names
+    )
+
+def task_snapshot(task_id):
+    """Return the job's latest published state, falling back to the result backend."""
+    return progress.current(task_id) or progress.snapshot_from_result(celery.AsyncResult(task_id))
+
+@api.route('/api/status/<task_id>', methods=['GET'])
 def get_status(task_id):
-    task = celery.AsyncResult(task_id)
+    """Return a job's state. Clients that send If-None-Match with ?wait=<seconds>
+    are held until the state changes and get 304 if it does not."""
+    snapshot = task_snapshot(task_id)
+    wait = min(request.args.get('wait', 0, type=float), progress.LONG_POLL_MAX_SECONDS)
     
-    if task.state == 'PENDING':
-        response = {
-            'state': task.state,
-            'status': 'Task is pending...'
-        }
-    elif task.state == 'SUCCESS':
-        response = {
-            'state': task.state,
-            'result': task.result
-        }
-    else:
-        response = {
-            'state': task.state,
-            'error': str(task.info)
-        }
+    if progress.etag(snapshot) in request.if_none_match:
+        if wait > 0 and snapshot['state'] not in progress.TERMINAL_STATES:
+            snapshot = progress.wait_for_update(task_id, snapshot['seq'], wait) or task_snapshot(task_id)
+        if progress.etag(snapshot) in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(progress.etag(snapshot))
+            return response
+    
+    response = jsonify(progress.response_body(snapshot))
+    response.set_etag(progress.etag(snapshot))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api.route('/api/events/<task_id>', methods=['GET'])
+def stream_events(task_id):
+    """Push each state change of a job as a Server-Sent Event until it finishes."""
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_seq = int(last_event_id) if last_event_id.isdigit() else 0
+    initial = None
+    if progress.current(task_id) is None:
+        initial = progress.response_body(progress.snapshot_from_result(celery.AsyncResult(task_id)))
     
-    return jsonify(response)
+    events = progress.stream(task_id, last_seq=last_seq, initial=initial)
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/download/<video_id>', methods=['GET'])
 def download_video(video_id):
-    video_path = os.path.join('outputs', f'{video_id}.mp4')
+    video_path = os.path.join('outputs', f'{secure_filename(video_id)}.mp4')
     if not os.path.exists(video_path):
         return jsonify({'error': 'Video not found'}), 404
-    return send_file(video_path, as_attachment=True) 
\ No newline at end of file
+    return send_output(video_path) 
+
+@api.route('/api/hls/<job_id>/<filename>', methods=['GET'])
+def get_hls_file(job_id, filename):
+    """Serve the playlist and segments of a progressive job while it is still running."""
+    playlist_dir = os.path.abspath(hls.job_dir(secure_filename(job_id)))
+    if filename == hls.PLAYLIST_NAME:
+        # The playlist grows until the job finishes, so players must always re-fetch it
+        janitor.mark_used(os.path.join(playlist_dir, filename))
+        response = send_from_directory(playlist_dir, filename, mimetype='application/vnd.apple.mpegurl', max_age=0)
+        response.cache_control.no_cache = True
+        return response
+    if not filename.endswith('.ts'):
+        return jsonify({'error': 'Not found'}), 404
+    # Segments never change once listed in the playlist
+    response = send_from_directory(playlist_dir, filename, mimetype='video/mp2t', max_age=DOWNLOAD_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+@api.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    queues = [
+        celery.conf.get('CELERY_DEFAULT_QUEUE') or 'celery', CELERY_IO_QUEUE, CELERY_CPU_QUEUE,
+        CELERY_IO_FAST_QUEUE, CELERY_CPU_FAST_QUEUE
+    ]
+    body = metrics.render_metrics(queue_depth=metrics.queue_depths(celery, queues))
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+app.register_blueprint(api)
\ No newline at end of file
@@ -1,247 +1,667 @@
-from celery import Task, chain
+from celery import Task, chain, chord
+from celery.canvas import Signature
+from celery.signals import worker_init, worker_process_init, task_failure
+from celery.concurrency import get_implementation
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from billiard.exceptions import WorkerLostError
 from app import celery
 from app.utils.video_processor import extract_audio, create_video_with_audio
-from app.utils.audio_processor import transcribe_audio, translate_text, generate_speech
+from app.utils.ffmpeg_utils import probe_media
+from app.utils.audio_processor import (
+    transcribe_audio, translate_text, generate_speech, audio_chunks, chunk_seconds, recognize_chunks,
+    MINIMAL_SPEECH_LABEL
+)
+from app.utils import result_cache
+from app.utils import hls
+from app.utils import youtube
+from app.utils import media_cache
+from app.utils import janitor
+from app.utils import scratch
+from app.utils import media_probe
+from app.utils.translation_memory import join_units
+from app.utils.clients import client_stats
+from app.utils import backends
+from app.utils import metrics
+from app.utils import progress
 import os
-import tempfile
 import shutil
-import yt_dlp
 import logging
 import time
+import uuid
+import functools
+import wave
+from concurrent.futures import ThreadPoolExecutor
+import speech_recognition as sr
 from speech_recognition import UnknownValueError, RequestError
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Create clients and load models for the default backends once per worker process, after the fork."""
+    backends.warm()
+
+@worker_init.connect
+def init_worker(sender=None, **kwargs):
+    """Warm the default backends in workers whose pool runs tasks in the main process.
+
+    Thread, gevent and solo pools never send worker_process_init. Prefork parents
+    are skipped, because clients created before the fork must not be shared.
+    """
+    if not issubclass(get_implementation(sender.pool_cls), PreforkPool):
+        backends.warm()
+
+# Windows of a progressive job whose speech is prepared while earlier segments are encoded
+HLS_SPEECH_WORKERS = int(os.getenv('HLS_SPEECH_WORKERS', '2'))
+
+MINIMAL_SPEECH_MESSAGE = 'This video appears to have minimal or no speech to translate. Please try a video with more dialogue.'
+
+def new_job(target_language, cache_key=None, **fields):
+    """Create the state dict that is passed from stage to stage along a job's chain."""
+    job = {
+        'job_id': str(uuid.uuid4()),
+        'target_language': target_language,
+        'cache_key': cache_key,
+        'created_at': time.time(),
+        'result': None
+    }
+    job.update(fields)
+    metrics.job_started(job['job_id'])
+    return job
+
+def assign_lane(job, probe, languages=1):
+    """Pick the job's lane (see route_stage) and keep its probe for later stages.
+
+    The probe is a small dict (see probe_media), so it travels with the job's
+    messages and the mux need not run ffprobe again.
+    """
+    job['probe'] = probe
+    job['lane'] = media_probe.choose_lane(probe, languages)
+    duration = (probe or {}).get('duration')
+    logger.info(f"Job {job['job_id']} ({duration or 'unknown'} seconds) goes to the {job['lane']} lane")
+
+def video_probe(job):
+    """Return the probe of the job's video file, or None if it has to be probed.
+
+    A YouTube job's probe describes the video's metadata, not the format it downloaded.
+    """
+    return None if job.get('youtube_url') else job.get('probe')
+
+def job_backend(job, kind):
+    """Return the name of the job's ASR, MT or TTS backend, None meaning the configured default."""
+    return (job.get('backends') or {}).get(kind)
+
+def report_progress(task, job, status):
+    """Publish a stage transition under the job's id, which is what clients follow.
+
+    Stages of one language in a multi-language job report under the parent job,
+    together with the languages that have already finished.
+    """
+    parent_job_id = job.get('parent_job_id')
+    if parent_job_id:
+        meta = {
+            'status': f"{status} ({job['target_language']})",
+            'languages': progress.finished_languages(parent_job_id)
+        }
+        task.update_state(task_id=parent_job_id, state='PROGRESS', meta=meta)
+    else:
+        task.update_state(task_id=job['job_id'], state='PROGRESS', meta={'status': status})
+
+def job_scratch(job, duration=None):
+    """Return the job's scratch directory, creating it on first use.
+
+    ``duration`` (seconds of media) decides whether it fits in RAM; without it the
+    directory goes on disk.
+    """
+    if not job.get('work_dir'):
+        languages = len(job.get('pending_languages') or [job['target_language']])
+        needed = scratch.estimate_bytes(duration, languages) if duration else None
+        job['work_dir'], job['scratch_medium'] = scratch.create(job['job_id'], needed)
+    return job['work_dir']
+
+def track_scratch(job):
+    """Remember the most scratch space the job has used so far."""
+    if job.get('work_dir') and os.path.isdir(job['work_dir']):
+        job['scratch_peak_bytes'] = max(job.get('scratch_peak_bytes', 0), scratch.size(job['work_dir']))
+
+def cleanup_job(job):
+    """Remove a job's intermediate files and scratch directory, reporting the space it used."""
+    logger.info("Cleaning up temporary files")
+    for key in ('audio_path', 'translated_audio_path'):
+        path = job.get(key)
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except Exception as cleanup_error:
+            logger.error(f"Error during cleanup: {str(cleanup_error)}")
+
+    media_cache.release(job['job_id'])
+    work_dir = job.get('work_dir')
+    if work_dir:
+        track_scratch(job)
+        peak = job.get('scratch_peak_bytes', 0)
+        medium = job.get('scratch_medium', 'disk')
+        logger.info(f"Job {job['job_id']} used up to {peak} bytes of scratch space on {medium}")
+        metrics.observe_job_scratch(peak, medium)
+        try:
+            shutil.rmtree(work_dir)
+            logger.info(f"Cleaned up temporary directory: {work_dir}")
+        except Exception as cleanup_error:
+            logger.error(f"Error cleaning up temporary directory: {str(cleanup_error)}")
+
+def cleanup_language(job):
+    """Remove the files of one language; the shared audio and video belong to the parent job."""
+    path = job.get('translated_audio_path')
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except Exception as cleanup_error:
+        logger.error(f"Error during cleanup: {str(cleanup_error)}")
+
+def languages_result(languages):
+    """Combine per-language results into the result of a multi-language job."""
+    succeeded = [language for language, result in languages.items() if result.get('status') == 'success']
+    if len(succeeded) == len(languages):
+        status = 'success'
+    elif succeeded:
+        status = 'partial'
+    else:
+        return {'status': 'error', 'message': 'Translation failed for every language', 'languages': languages}
+    return {'status': status, 'languages': languages}
+
+def language_job(job, language):
+    """Derive the job that runs translate, speech and mux for one language of ``job``."""
+    return dict(
+        job,
+        target_language=language,
+        cache_key=job['cache_keys'][language],
+        output_id=f"{job['job_id']}-{language}",
+        parent_job_id=job['job_id'],
+        result=None
+    )
+
+def error_result(exc):
+    message = str(exc)
+    if "minimal or no speech" in message:
+        return {'status': 'info', 'message': MINIMAL_SPEECH_MESSAGE}
+    return {'status': 'error', 'message': message}
+
+def fail_job(backend, exc, task_id, args):
+    """Clean up after a stage that crashed, and publish the failure under the job id.
+
+    The chain stops at the crashed stage, so without this clients would be left waiting.
+    """
+    job = args[0] if args and isinstance(args[0], dict) else None
+    if job and job.get('parent_job_id'):
+        # One language of a multi-language job; the others carry on, and once they are
+        # done the chord's error callback (languages_failed_stage) finishes the job
+        cleanup_language(job)
+        progress.record_language(job['parent_job_id'], job['target_language'], error_result(exc))
+    elif job and job.get('job_id') and job['job_id'] != task_id:
+        cleanup_job(job)
+        metrics.job_finished(job['job_id'])
+        result = error_result(exc)
+        backend.store_result(job['job_id'], result, 'SUCCESS')
+        progress.publish(job['job_id'], 'SUCCESS', result=result)
+
+@task_failure.connect
+def cleanup_lost_stage(sender=None, task_id=None, exception=None, args=None, **kwargs):
+    """Clean up after a stage whose worker process died, e.g. killed for using too much memory.
+
+    on_failure does not run then; the failure is only reported by the parent process.
+    """
+    if isinstance(exception, WorkerLostError) and isinstance(sender, TranslationTask):
+        logger.error(f"Worker running task {task_id} was lost: {exception}")
+        fail_job(sender.backend, exception, task_id, args)
+
 class TranslationTask(Task):
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         logger.error(f"Task {task_id} failed: {exc}")
         logger.error(f"Error info: {einfo}")
+        fail_job(self.backend, exc, task_id, args)
         super().on_failure(exc, task_id, args, kwargs, einfo)
 
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        """Store the state in the result backend and push it to subscribed clients."""
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        progress.publish(task_id or self.request.id, state, meta=meta)
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        logger.info(f"Cloud client stats after task {task_id}: {client_stats()}")
+        super().after_return(status, retval, task_id, args, kwargs, einfo)
+
+def pipeline_stage(status, metric):
+    """Wrap a stage task so jobs that already finished or failed pass straight through.
+
+    The stage's latency is recorded under ``metric``.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, job):
+            if job.get('result'):
+                return job
+            report_progress(self, job, status)
+            try:
+                with metrics.stage_timer(metric):
+                    func(self, job)
+            except Exception as e:
+                logger.error(f"Error during {func.__name__} for job {job['job_id']}: {str(e)}", exc_info=True)
+                job['result'] = error_result(e)
+            track_scratch(job)
+            return job
+        return wrapper
+    return decorator
+
 @celery.task(bind=True, base=TranslationTask)
-def process_video(self, video_path, target_language):
-    """Process video for translation."""
-    try:
-        logger.info(f"Starting video processing: {video_path}")
-        
-        # Create output directory if it doesn't exist
-        os.makedirs('outputs', exist_ok=True)
-        
-        # Extract audio from video
-        self.update_state(state='PROGRESS', meta={'status': 'Extracting audio...'})
-        logger.info("Extracting audio from video")
-        audio_path = extract_audio(video_path)
-        
-        # Transcribe audio to text
-        self.update_state(state='PROGRESS', meta={'status': 'Transcribing audio...'})
-        logger.info("Transcribing audio to text")
-        try:
-            transcript = transcribe_audio(audio_path)
-            if not transcript:
-                raise ValueError("No speech detected in the video")
-            logger.info(f"Transcription result: {transcript[:100]}...")
-        except UnknownValueError:
-            logger.error("Speech recognition failed to understand the audio")
-            raise ValueError("Could not understand the speech in the video. Please ensure the audio is clear and in a supported language.")
-        except RequestError as e:
-            logger.error(f"Speech recognition service error: {str(e)}")
-            raise ValueError("Speech recognition service is currently unavailable. Please try again later.")
-        
-        # Translate text
-        self.update_state(state='PROGRESS', meta={'status': 'Translating text...'})
-        logger.info(f"Translating text to {target_language}")
-        translated_text = translate_text(transcript, target_language)
-        logger.info(f"Translation result: {translated_text[:100]}...")
-        
-        # Generate speech from translated text
-        self.update_state(state='PROGRESS', meta={'status': 'Generating speech...'})
-        logger.info("Generating speech from translated text")
-        translated_audio_path = generate_speech(translated_text, target_language)
-        
-        # Create video with translated audio
-        self.update_state(state='PROGRESS', meta={'status': 'Creating final video...'})
-        logger.info("Creating final video with translated audio")
-        output_path = os.path.join('outputs', f'{self.request.id}.mp4')
-        create_video_with_audio(video_path, translated_audio_path, output_path)
-        
-        # Clean up temporary files
-        logger.info("Cleaning up temporary files")
-        for path in [audio_path, translated_audio_path]:
-            if os.path.exists(path):
-                os.remove(path)
-        
-        logger.info("Video processing completed successfully")
-        return {'status': 'success', 'video_path': output_path}
-        
-    except Exception as e:
-        logger.error(f"Error during video processing: {str(e)}", exc_info=True)
-        # Clean up any temporary files
-        try:
-            if 'audio_path' in locals() and os.path.exists(audio_path):
-                os.remove(audio_path)
-            if 'translated_audio_path' in locals() and os.path.exists(translated_audio_path):
-                os.remove(translated_audio_path)
-        except Exception as cleanup_error:
-            logger.error(f"Error during cleanup: {str(cleanup_error)}")
-        
-        return {'status': 'error', 'message': str(e)}
+@pipeline_stage('Fetching YouTube video details...', 'youtube_info')
+def youtube_info_stage(self, job):
+    """Fetch a YouTube video's metadata once and store it for both download branches.
+
+    Fetched here rather than reused from the submission probe, so the signed format
+    URLs are fresh however long the job waited in the queue.
+    """
+    logger.info(f"Processing YouTube URL: {job['youtube_url']}")
+    info = youtube.fetch_info(job['youtube_url'])
+    job['info_path'] = youtube.save_info(info, job_scratch(job, info.get('duration')))
+
+def download_cached(job, format_selector):
+    """Return one format of a job's YouTube video from the shared media cache, downloading on a miss.
+
+    The job gets its own link to the file (see media_cache.link_into), so it is used from there.
+    """
+    info = youtube.load_info(job['info_path'])
+    path, hit = media_cache.fetch(
+        info['id'],
+        format_selector,
+        lambda output_dir, name: youtube.download_format(info, format_selector, output_dir, name)
+    )
+    if not hit:
+        metrics.add_file_bytes('download', path)
+    return media_cache.link_into(path, job['work_dir'], job['job_id'])
 
 @celery.task(bind=True, base=TranslationTask)
-def process_youtube_video(self, youtube_url, target_language):
-    """Process YouTube video for translation."""
-    try:
-        # Download YouTube video
-        self.update_state(state='PROGRESS', meta={'status': 'Downloading YouTube video...'})
-        logger.info(f"Processing YouTube URL: {youtube_url}")
-        
-        # Create temporary directory that persists until we're done
-        temp_dir = tempfile.mkdtemp()
-        try:
-            video_path = None
+@pipeline_stage('Downloading audio...', 'download_audio')
+def audio_download_stage(self, job):
+    """Download only the audio stream of a YouTube video."""
+    job['source_audio_path'] = download_cached(job, youtube.YOUTUBE_AUDIO_FORMAT)
+
+@celery.task(bind=True, base=TranslationTask)
+@pipeline_stage('Downloading video...', 'download_video')
+def video_download_stage(self, job):
+    """Download the video stream of a YouTube video while its audio is being processed."""
+    job['video_path'] = download_cached(job, youtube.YOUTUBE_VIDEO_FORMAT)
+
+@celery.task(bind=True, base=TranslationTask)
+def merge_streams_stage(self, branches):
+    """Join the video and audio branches of a YouTube job before anything needs the video."""
+    video_job, job = branches
+    job['video_path'] = video_job.get('video_path')
+    if not job.get('result') and video_job.get('result'):
+        job['result'] = video_job['result']
+    return job
+
+@celery.task(bind=True, base=TranslationTask)
+@pipeline_stage('Extracting audio...', 'extract')
+def extract_stage(self, job):
+    """Extract audio from the job's video, or from its separately downloaded audio stream."""
+    source_path = job.get('source_audio_path') or job['video_path']
+    logger.info(f"Extracting audio from: {source_path}")
+    if not job.get('work_dir'):
+        duration = (job.get('probe') or {}).get('duration')
+        if duration is None:
             try:
-                # Download the video
-                video_path = download_youtube_video(youtube_url, temp_dir)
-                logger.info(f"YouTube video downloaded to: {video_path}")
-                
-                # Process the video directly
-                self.update_state(state='PROGRESS', meta={'status': 'Processing video...'})
-                
-                # Create output directory if it doesn't exist
-                os.makedirs('outputs', exist_ok=True)
-                
-                # Extract audio from video
-                self.update_state(state='PROGRESS', meta={'status': 'Extracting audio...'})
-                logger.info("Extracting audio from video")
-                audio_path = extract_audio(video_path)
-                
-                # Transcribe audio to text
-                self.update_state(state='PROGRESS', meta={'status': 'Transcribing audio...'})
-                logger.info("Transcribing audio to text")
-                transcript = transcribe_audio(audio_path)
-                
-                # Handle case where there's minimal or no speech
-                if transcript == "[Background music or minimal speech detected]":
-                    logger.info("Video contains minimal or no speech")
-                    return {
-                        'status': 'info',
-                        'message': 'This video appears to have minimal or no speech to translate. Please try a video with more dialogue.'
-                    }
-                
-                logger.info(f"Transcription result: {transcript[:100]}...")
-                
-                # Translate text
-                self.update_state(state='PROGRESS', meta={'status': 'Translating text...'})
-                logger.info(f"Translating text to {target_language}")
-                translated_text = translate_text(transcript, target_language)
-                logger.info(f"Translation result: {translated_text[:100]}...")
-                
-                # Generate speech from translated text
-                self.update_state(state='PROGRESS', meta={'status': 'Generating speech...'})
-                logger.info("Generating speech from translated text")
-                translated_audio_path = generate_speech(translated_text, target_language)
-                
-                # Create video with translated audio
-                self.update_state(state='PROGRESS', meta={'status': 'Creating final video...'})
-                logger.info("Creating final video with translated audio")
-                output_path = os.path.join('outputs', f'{self.request.id}.mp4')
-                create_video_with_audio(video_path, translated_audio_path, output_path)
-                
-                # Clean up temporary files
-                logger.info("Cleaning up temporary files")
-                for path in [audio_path, translated_audio_path]:
-                    if os.path.exists(path):
-                        os.remove(path)
-                
-                logger.info("Video processing completed successfully")
-                return {'status': 'success', 'video_path': output_path}
-                
+                duration = probe_media(source_path)['duration']
             except Exception as e:
-                logger.error(f"Error processing YouTube video: {str(e)}", exc_info=True)
-                error_msg = str(e)
-                if "minimal or no speech" in error_msg:
-                    return {
-                        'status': 'info',
-                        'message': 'This video appears to have minimal or no speech to translate. Please try a video with more dialogue.'
-                    }
-                return {'status': 'error', 'message': error_msg}
-                
-            finally:
-                # Clean up the downloaded video in the finally block
-                if video_path and os.path.exists(video_path):
-                    try:
-                        os.remove(video_path)
-                        logger.info(f"Cleaned up temporary video file: {video_path}")
-                    except Exception as cleanup_error:
-                        logger.error(f"Error cleaning up temporary file: {str(cleanup_error)}")
-                        
-        finally:
-            # Clean up the temporary directory
-            try:
-                shutil.rmtree(temp_dir)
-                logger.info(f"Cleaned up temporary directory: {temp_dir}")
-            except Exception as cleanup_error:
-                logger.error(f"Error cleaning up temporary directory: {str(cleanup_error)}")
-            
-    except Exception as e:
-        error_msg = str(e)
-        logger.error(f"YouTube processing error: {error_msg}")
-        return {'status': 'error', 'message': error_msg}
-
-def download_youtube_video(youtube_url, output_dir):
-    """Download YouTube video to the specified directory using yt-dlp."""
+                logger.warning(f"Could not probe {source_path}, using disk for scratch: {str(e)}")
+        job_scratch(job, duration)
+    # Sources may be shared with other jobs, so the WAV goes into the job's own directory
+    job['audio_path'] = extract_audio(source_path, output_path=os.path.join(job['work_dir'], 'audio.wav'))
+    metrics.add_file_bytes('extract', source_path)
+
+@celery.task(bind=True, base=TranslationTask)
+@pipeline_stage('Transcribing audio...', 'transcribe')
+def transcribe_stage(self, job):
+    """Transcribe the extracted audio to text."""
+    logger.info("Transcribing audio to text")
     try:
-        logger.info(f"Attempting to download video from URL: {youtube_url}")
-        
-        # Clean and validate the URL
-        if not youtube_url or not isinstance(youtube_url, str):
-            raise ValueError("Invalid YouTube URL")
-            
-        # Configure yt-dlp options
-        ydl_opts = {
-            'format': 'best[ext=mp4]',  # Best quality MP4
-            'outtmpl': os.path.join(output_dir, '%(title)s.%(ext)s'),
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-            'logger': logger,
-            'socket_timeout': 30,  # Timeout in seconds
-            'retries': 3,  # Number of retries
-            'fragment_retries': 3,
-            'skip_unavailable_fragments': True,
-            'ignoreerrors': True
-        }
-        
-        # Download the video
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            try:
-                # First, try to extract info to verify the video is accessible
-                info = ydl.extract_info(youtube_url, download=False)
-                logger.info(f"Successfully found video: {info.get('title', 'Unknown title')}")
-                
-                # If video info was retrieved successfully, proceed with download
-                info = ydl.extract_info(youtube_url, download=True)
-                video_path = ydl.prepare_filename(info)
-                
-                if not os.path.exists(video_path):
-                    raise Exception("Video download failed - file not found")
-                    
-                logger.info(f"Video downloaded successfully to: {video_path}")
-                return video_path
-                
-            except yt_dlp.utils.DownloadError as e:
-                error_msg = str(e).lower()
-                if "copyright" in error_msg:
-                    raise Exception("Cannot process copyrighted content")
-                elif "private" in error_msg:
-                    raise Exception("Cannot process private videos")
-                elif "not available" in error_msg:
-                    raise Exception("This video is not available")
-                else:
-                    raise Exception(f"Failed to download video: {str(e)}")
-                    
-    except Exception as e:
-        error_msg = str(e)
-        logger.error(f"YouTube download error: {error_msg}", exc_info=True)
-        raise Exception(f"Failed to download YouTube video: {error_msg}") 
\ No newline at end of file
+        transcript = transcribe_audio(job['audio_path'], backend=job_backend(job, 'asr'))
+    except UnknownValueError:
+        logger.error("Speech recognition failed to understand the audio")
+        raise ValueError("Could not understand the speech in the video. Please ensure the audio is clear and in a supported language.")
+    except RequestError as e:
+        logger.error(f"Speech recognition service error: {str(e)}")
+        raise ValueError("Speech recognition service is currently unavailable. Please try again later.")
+
+    if not transcript:
+        raise ValueError("No speech detected in the video")
+
+    # Handle case where there's minimal or no speech
+    if transcript == MINIMAL_SPEECH_LABEL:
+        logger.info("Video contains minimal or no speech")
+        job['result'] = {'status': 'info', 'message': MINIMAL_SPEECH_MESSAGE}
+        return
+
+    logger.info(f"Transcription result: {transcript[:100]}...")
+    job['transcript'] = transcript
+
+@celery.task(bind=True, base=TranslationTask)
+@pipeline_stage('Translating text...', 'translate')
+def translate_stage(self, job):
+    """Translate the transcript to the target language."""
+    logger.info(f"Translating text to {job['target_language']}")
+    job['translated_text'] = translate_text(
+        job['transcript'], job['target_language'], backend=job_backend(job, 'mt')
+    )
+    logger.info(f"Translation result: {job['translated_text'][:100]}...")
+
+@celery.task(bind=True, base=TranslationTask)
+@pipeline_stage('Generating speech...', 'tts')
+def speech_stage(self, job):
+    """Generate speech from the translated text."""
+    logger.info("Generating speech from translated text")
+    job['translated_audio_path'] = generate_speech(
+        job['translated_text'], job['target_language'],
+        output_path=os.path.join(job['work_dir'], f"speech-{job['target_language']}.wav"),
+        backend=job_backend(job, 'tts')
+    )
+    metrics.add_file_bytes('tts', job['translated_audio_path'])
+
+@celery.task(bind=True, base=TranslationTask)
+@pipeline_stage('Creating final video...', 'mux')
+def mux_stage(self, job):
+    """Create the final video with the translated audio."""
+    logger.info("Creating final video with translated audio")
+    os.makedirs('outputs', exist_ok=True)
+    output_id = job.get('output_id', job['job_id'])
+    output_path = os.path.join('outputs', f"{output_id}.mp4")
+    create_video_with_audio(job['video_path'], job['translated_audio_path'], output_path, probe=video_probe(job))
+    metrics.add_file_bytes('mux', output_path)
+    result_cache.store_result(job['cache_key'], output_id, output_path)
+    logger.info("Video processing completed successfully")
+    job['result'] = {'status': 'success', 'video_path': output_path}
+
+def prepare_window_speech(job, chunks, window, output_path):
+    """Transcribe, translate and voice the speech chunks of one progressive window into ``output_path``.
+
+    Returns (speech_path, offset of the speech into the window), or (None, 0.0)
+    for a window without usable speech.
+    """
+    texts = recognize_chunks(chunks, job_backend(job, 'asr'))
+    if not texts:
+        return None, 0.0
+    translated = translate_text(join_units(texts), job['target_language'], backend=job_backend(job, 'mt'))
+    speech_path = generate_speech(
+        translated, job['target_language'], output_path=output_path, backend=job_backend(job, 'tts')
+    )
+    return speech_path, chunks[0][0] - window[0]
+
+@celery.task(bind=True, base=TranslationTask)
+@pipeline_stage('Translating segments...', 'progressive')
+def progressive_stage(self, job):
+    """Translate the video window by window, publishing each HLS segment once it is muxed.
+
+    Replaces the transcribe, translate, speech and mux stages for progressive jobs.
+    Speech for upcoming windows is prepared while the current segment is encoded.
+    When every segment is written the playlist is closed and the segments are
+    joined into the usual MP4 output.
+    """
+    chunks = audio_chunks(sr.Recognizer(), job['audio_path'])
+    if not chunks:
+        logger.info("Video contains minimal or no speech")
+        job['result'] = {'status': 'info', 'message': MINIMAL_SPEECH_MESSAGE}
+        return
+
+    with wave.open(job['audio_path'], 'rb') as reader:
+        duration = reader.getnframes() / reader.getframerate()
+    speech = [(offset, offset + chunk_seconds(audio)) for offset, audio in chunks]
+    windows = hls.plan_windows(duration, speech)
+    target_duration = max(end - start for start, end in windows)
+    playlist_dir = hls.job_dir(job['job_id'])
+    os.makedirs(playlist_dir, exist_ok=True)
+    job['playlist'] = hls.playlist_url(job['job_id'])
+    logger.info(f"Streaming {duration:.1f}s of video as {len(windows)} segments to {playlist_dir}")
+
+    segments = []
+    # Speech not yet muxed to its end: translations can run longer than their windows
+    placed = []
+    spoken = False
+    executor = ThreadPoolExecutor(max_workers=HLS_SPEECH_WORKERS)
+    futures = [
+        executor.submit(
+            prepare_window_speech, job, [chunk for chunk in chunks if start <= chunk[0] < end],
+            (start, end), os.path.join(job['work_dir'], f'speech-{index:05d}.wav')
+        )
+        for index, (start, end) in enumerate(windows)
+    ]
+    try:
+        for index, ((start, end), future) in enumerate(zip(windows, futures)):
+            speech_path, speech_offset = future.result()
+            if speech_path:
+                hls.place_speech(placed, speech_path, start + speech_offset)
+            name = f'segment{index:05d}.ts'
+            hls.mux_segment(
+                job['video_path'], start, end - start, os.path.join(playlist_dir, name),
+                speech=hls.segment_speech(placed, start, end)
+            )
+            for finished in [item for item in placed if item[2] <= end]:
+                placed.remove(finished)
+                os.remove(finished[0])
+            spoken = spoken or speech_path is not None
+            segments.append((name, end - start))
+            hls.write_playlist(playlist_dir, segments, target_duration)
+
+            if index == 0:
+                metrics.observe_time_to_first_frame(time.time() - job['created_at'])
+            self.update_state(task_id=job['job_id'], state='PROGRESS', meta={
+                'status': f'Segment {index + 1} of {len(windows)} ready',
+                'playlist': job['playlist'],
+                'segments_ready': index + 1,
+                'segments_total': len(windows)
+            })
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        # Speech running past the last segment, or prepared for windows that were never muxed
+        for speech_path, _, _ in placed:
+            if os.path.exists(speech_path):
+                os.remove(speech_path)
+        for future in futures[len(segments):]:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                speech_path = future.result()[0]
+                if speech_path and os.path.exists(speech_path):
+                    os.remove(speech_path)
+
+    hls.write_playlist(playlist_dir, segments, target_duration, finished=True)
+    if not spoken:
+        logger.info("Video contains minimal or no speech")
+        job['result'] = {'status': 'info', 'message': MINIMAL_SPEECH_MESSAGE}
+        return
+
+    os.makedirs('outputs', exist_ok=True)
+    output_path = os.path.join('outputs', f"{job['job_id']}.mp4")
+    hls.concat_segments(playlist_dir, segments, output_path)
+    metrics.add_file_bytes('progressive', output_path)
+    result_cache.store_result(job['cache_key'], job['job_id'], output_path)
+    logger.info("Progressive video processing completed successfully")
+    job['result'] = {'status': 'success', 'video_path': output_path, 'playlist': job['playlist']}
+
+@celery.task(bind=True, base=TranslationTask)
+def finalize_stage(self, job):
+    """Clean up after a job and return its result; runs under the job's id."""
+    cleanup_job(job)
+    metrics.job_finished(job['job_id'])
+    result = job['result'] or {'status': 'error', 'message': 'Job finished without a result'}
+    # The backend stores the return value after this; publish it now so streams can close
+    progress.publish(job['job_id'], 'SUCCESS', result=result)
+    return result
+
+@celery.task(bind=True, base=TranslationTask)
+def fanout_stage(self, job):
+    """Run translate, speech and mux for every pending language of a job in parallel.
+
+    Runs after the shared extract and transcribe stages. The chord callback runs
+    under the job's id once every language has finished.
+    """
+    for language, result in job['cached_languages'].items():
+        progress.record_language(job['job_id'], language, result)
+
+    if job.get('result') or not job['pending_languages']:
+        finalize_languages_stage.apply_async(args=([], job), task_id=job['job_id'])
+        return job['job_id']
+
+    logger.info(f"Fanning out job {job['job_id']} to {', '.join(job['pending_languages'])}")
+    branches = [
+        chain(translate_stage.s(language_job(job, language)), speech_stage.s(), mux_stage.s(), language_done_stage.s())
+        for language in job['pending_languages']
+    ]
+    callback = finalize_languages_stage.s(job).set(task_id=job['job_id'])
+    callback.link_error(languages_failed_stage.s())
+    chord(branches)(callback)
+    return job['job_id']
+
+@celery.task(bind=True, base=TranslationTask)
+def language_done_stage(self, job):
+    """Report one language of a multi-language job as soon as it has finished."""
+    cleanup_language(job)
+    language = job['target_language']
+    result = job['result'] or {'status': 'error', 'message': 'Language finished without a result'}
+    if result.get('status') == 'success':
+        result = dict(result, video_id=job['output_id'])
+    finished = progress.record_language(job['parent_job_id'], language, result)
+    self.update_state(
+        task_id=job['parent_job_id'],
+        state='PROGRESS',
+        meta={'status': f'Finished {language}', 'languages': finished}
+    )
+    return {'language': language, 'result': result, 'scratch_peak_bytes': job.get('scratch_peak_bytes', 0)}
+
+@celery.task(bind=True, base=TranslationTask)
+def finalize_languages_stage(self, results, job):
+    """Clean up after a multi-language job and return every language's result."""
+    # The languages ran side by side in the shared scratch directory
+    job['scratch_peak_bytes'] = max(
+        [job.get('scratch_peak_bytes', 0)] + [item.get('scratch_peak_bytes', 0) for item in results]
+    )
+    cleanup_job(job)
+    metrics.job_finished(job['job_id'])
+    if job['result']:
+        # Failed, or found no speech, before the fan-out
+        result = job['result']
+    else:
+        languages = dict(job['cached_languages'])
+        languages.update({item['language']: item['result'] for item in results})
+        result = languages_result(languages)
+    progress.publish(job['job_id'], 'SUCCESS', result=result)
+    return result
+
+@celery.task
+def languages_failed_stage(request, exc, traceback):
+    """Finish a multi-language job whose chord failed because a language crashed.
+
+    Celery calls this instead of finalize_languages_stage once every language has
+    finished. Languages without a recorded result are reported as failed, and
+    finalize_languages_stage then runs under the job's id as usual.
+    """
+    job = request.args[0]
+    logger.error(f"Language of job {job['job_id']} crashed: {exc}")
+    finished = progress.finished_languages(job['job_id'])
+    results = [
+        {'language': language, 'result': finished.get(language) or error_result(exc)}
+        for language in job['pending_languages']
+    ]
+    finalize_languages_stage.apply_async(args=(results, job), task_id=job['job_id'])
+
+def run_pipeline(job, stages, fanout=False):
+    """Chain the stages for a job and queue it.
+
+    Each stage is routed to its own queue (see CELERY_ROUTES). The task that
+    finishes the job uses the job id as its task id, so the returned AsyncResult
+    follows the whole job. With ``fanout`` the chain ends in fanout_stage, which
+    starts that task itself once every language is done.
+    """
+    signatures = [stage if isinstance(stage, Signature) else stage.s() for stage in stages]
+    signatures[0] = signatures[0].clone(args=(job,))
+    if fanout:
+        signatures.append(fanout_stage.s())
+    else:
+        signatures.append(finalize_stage.s().set(task_id=job['job_id']))
+    chain(*signatures).apply_async()
+    return celery.AsyncResult(job['job_id'])
+
+@celery.task
+def janitor_task():
+    """Reclaim disk space; scheduled by Celery beat every JANITOR_INTERVAL seconds."""
+    return janitor.sweep(celery)
+
+def translation_stages(progressive=False):
+    """Return the stages that follow audio extraction, as (audio-only stages, stages
+    that also need the video).
+
+    Progressive jobs produce HLS segments as they go instead of one file at the end.
+    """
+    if progressive:
+        return [], [progressive_stage]
+    return [transcribe_stage, translate_stage, speech_stage], [mux_stage]
+
+def youtube_stages(audio_stages):
+    """Return the stages that ingest a YouTube video.
+
+    After one metadata fetch the audio stream is downloaded and ``audio_stages`` run
+    on it while the video stream downloads in parallel; the two are merged before
+    the next stage.
+    """
+    audio_branch = chain(audio_download_stage.s(), *[stage.s() for stage in audio_stages])
+    return [
+        youtube_info_stage.s(),
+        chord([video_download_stage.s(), audio_branch], merge_streams_stage.s())
+    ]
+
+def start_video_job(video_path, target_language, cache_key=None, progressive=False, backend_names=None,
+                    probe=None):
+    """Queue the translation pipeline for an uploaded video.
+
+    ``backend_names`` maps 'asr', 'mt' and 'tts' to the backends this job uses.
+    ``probe`` is the video's probe_media() result, which picks the job's lane.
+    """
+    logger.info(f"Starting video processing: {video_path}")
+    job = new_job(target_language, cache_key, video_path=video_path, backends=backend_names)
+    assign_lane(job, probe)
+    audio_stages, video_stages = translation_stages(progressive)
+    return run_pipeline(job, [extract_stage] + audio_stages + video_stages)
+
+def start_youtube_job(youtube_url, target_language, cache_key=None, progressive=False, backend_names=None,
+                      probe=None):
+    """Queue the translation pipeline for a YouTube video.
+
+    ``probe`` is media_probe.probe_youtube()'s description of it, which picks the job's lane.
+    """
+    job = new_job(target_language, cache_key, youtube_url=youtube_url, backends=backend_names)
+    assign_lane(job, probe)
+    audio_stages, video_stages = translation_stages(progressive)
+    return run_pipeline(job, youtube_stages([extract_stage] + audio_stages) + video_stages)
+
+def start_languages_job(target_languages, cache_keys, cached_languages=None, video_path=None, youtube_url=None,
+                        backend_names=None, probe=None):
+    """Queue one job that extracts and transcribes once, then translates into every language.
+
+    ``cached_languages`` maps languages the result cache already answered to their
+    results; they are reported as finished without being processed again.
+    """
+    cached_languages = cached_languages or {}
+    job = new_job(
+        None,
+        target_languages=list(target_languages),
+        cache_keys=cache_keys,
+        cached_languages=cached_languages,
+        pending_languages=[language for language in target_languages if language not in cached_languages],
+        backends=backend_names
+    )
+    assign_lane(job, probe, len(job['pending_languages']))
+    if youtube_url:
+        job['youtube_url'] = youtube_url
+        stages = youtube_stages([extract_stage, transcribe_stage])
+    else:
+        job['video_path'] = video_path
+        stages = [extract_stage, transcribe_stage]
+    return run_pipeline(job, stages, fanout=True)
\ No newline at end of file
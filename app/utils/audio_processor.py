@@ -1,15 +1,22 @@
 import os
+import re
 import speech_recognition as sr
-from google.cloud import translate_v2 as translate
-import google.cloud.texttospeech as texttospeech
 from gtts import gTTS
 import tempfile
 import soundfile as sf
 import logging
-import time
+import wave
 from typing import Optional
 import numpy as np
 from pydub import AudioSegment
+from app.utils.translation_memory import (
+    translate_with_memory, split_sentences, normalize_sentence, join_units, join_sentences
+)
+from app.utils import tts_cache
+from app.utils.wav_utils import write_wav_payloads, mmap_wav
+from app.utils.vad import detect_speech_segments
+from app.utils.janitor import TEMP_PREFIX
+from app.utils import backends
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,19 +26,9 @@ logger = logging.getLogger(__name__)
 GOOGLE_CREDENTIALS = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
 logger.info(f"Google Credentials Path: {GOOGLE_CREDENTIALS}")
 
-if not os.path.exists(GOOGLE_CREDENTIALS):
+if not GOOGLE_CREDENTIALS or not os.path.exists(GOOGLE_CREDENTIALS):
     logger.error(f"Google credentials file not found at: {GOOGLE_CREDENTIALS}")
 
-def get_translate_client():
-    """Get or create Google Translate client."""
-    try:
-        client = translate.Client()
-        logger.info("Google Translate client created successfully")
-        return client
-    except Exception as e:
-        logger.error(f"Error creating Google Translate client: {str(e)}")
-        raise
-
 def process_audio_for_recognition(audio_path: str) -> str:
     """Process audio file to improve speech recognition quality."""
     try:
@@ -46,7 +43,7 @@ def process_audio_for_recognition(audio_path: str) -> str:
         normalized_audio = audio.normalize()
         
         # Export processed audio to a temporary file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+        with tempfile.NamedTemporaryFile(prefix=TEMP_PREFIX, suffix='.wav', delete=False) as temp_file:
             normalized_audio.export(temp_file.name, format='wav')
             return temp_file.name
             
@@ -54,65 +51,103 @@ def process_audio_for_recognition(audio_path: str) -> str:
         logger.error(f"Error processing audio: {str(e)}")
         return audio_path  # Return original file if processing fails
 
-def transcribe_audio(audio_path):
+# Returned instead of a transcript when the audio has no usable speech
+MINIMAL_SPEECH_LABEL = "[Background music or minimal speech detected]"
+
+def speech_chunks(audio_path):
+    """Cut a 16-bit WAV into speech segments found by voice-activity detection.
+
+    Returns a list of (offset_seconds, AudioData). Pauses longer than
+    VAD_MAX_GAP_SECONDS are cut out of each chunk's audio.
+    Raises ValueError if the file is not 16-bit PCM.
+    """
+    with wave.open(audio_path, 'rb') as reader:
+        sample_rate = reader.getframerate()
+    samples = mmap_wav(audio_path)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1).astype(np.int16)
+    
+    duration = len(samples) / sample_rate
+    segments = detect_speech_segments(samples, sample_rate)
+    speech_seconds = sum(end - start for pieces in segments for start, end in pieces)
+    fixed_window_calls = int(np.ceil(duration / 30))
+    logger.info(
+        f"VAD found {len(segments)} speech segments covering {speech_seconds:.1f}s of {duration:.1f}s "
+        f"({fixed_window_calls - len(segments)} fewer API calls than 30s windows, "
+        f"{duration - speech_seconds:.1f}s of audio skipped)"
+    )
+    
+    chunks = []
+    for pieces in segments:
+        pcm = np.concatenate([samples[int(start * sample_rate):int(end * sample_rate)] for start, end in pieces])
+        chunks.append((round(pieces[0][0], 2), sr.AudioData(pcm.tobytes(), sample_rate, 2)))
+    return chunks
+
+def fixed_window_chunks(recognizer, audio_path):
+    """Cut any WAV the recognizer can read into 30 second chunks."""
+    with sr.AudioFile(audio_path) as source:
+        logger.info("Audio processed for recognition")
+        # Adjust the recognizer sensitivity
+        recognizer.dynamic_energy_threshold = True
+        recognizer.energy_threshold = 300  # Lower threshold for quieter audio
+        
+        logger.info("Adjusting for ambient noise...")
+        recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        
+        # Get the duration of the audio file
+        duration = source.DURATION
+        logger.info(f"Audio duration: {duration} seconds")
+        
+        chunk_duration = 30
+        offset = 0
+        chunks = []
+        
+        while offset < duration:
+            audio = recognizer.record(source, duration=min(chunk_duration, duration - offset))
+            chunks.append((offset, audio))
+            offset += chunk_duration
+        return chunks
+
+def audio_chunks(recognizer, audio_path):
+    """Cut the audio at pauses, falling back to fixed windows for non 16-bit input."""
+    try:
+        return speech_chunks(audio_path)
+    except (ValueError, wave.Error) as e:
+        logger.warning(f"Voice-activity detection unavailable, using 30s windows: {str(e)}")
+        return fixed_window_chunks(recognizer, audio_path)
+
+def chunk_seconds(audio):
+    """Return the duration of an AudioData chunk."""
+    return len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+def recognize_chunks(chunks, backend=None):
+    """Recognize (offset, AudioData) chunks with the selected ASR backend, returning their texts in offset order."""
+    if not chunks:
+        return []
+    return [text for text in backends.get_backend('asr', backend).transcribe(chunks) if text]
+
+def transcribe_audio(audio_path, backend=None):
     """Transcribe audio file to text."""
     logger.info("Starting audio transcription")
     recognizer = sr.Recognizer()
     
     try:
-        with sr.AudioFile(audio_path) as source:
-            logger.info("Audio processed for recognition")
-            # Adjust the recognizer sensitivity
-            recognizer.dynamic_energy_threshold = True
-            recognizer.energy_threshold = 300  # Lower threshold for quieter audio
-            
-            logger.info("Adjusting for ambient noise...")
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            
-            # Get the duration of the audio file
-            duration = source.DURATION
-            logger.info(f"Audio duration: {duration} seconds")
-            
-            # Process audio in chunks of 30 seconds
-            chunk_duration = 30
-            offset = 0
-            transcript = []
-            
-            while offset < duration:
-                logger.info(f"Processing chunk at offset {offset} seconds")
-                # Record chunk
-                audio = recognizer.record(source, duration=min(chunk_duration, duration - offset))
-                try:
-                    # Try with English first
-                    chunk_text = recognizer.recognize_google(audio, language='en-US')
-                    if chunk_text.strip():
-                        transcript.append(chunk_text)
-                except sr.UnknownValueError:
-                    logger.warning(f"Could not understand audio in chunk at offset {offset}")
-                    # Skip silences
-                    pass
-                except sr.RequestError as e:
-                    if "Bad Request" in str(e):
-                        # Try without language specification
-                        try:
-                            chunk_text = recognizer.recognize_google(audio)
-                            if chunk_text.strip():
-                                transcript.append(chunk_text)
-                        except (sr.UnknownValueError, sr.RequestError) as e2:
-                            logger.warning(f"Second attempt failed for chunk at offset {offset}: {str(e2)}")
-                            pass
-                    else:
-                        raise
-                
-                offset += chunk_duration
-            
-            if not transcript:
-                logger.warning("No speech detected in any chunk")
-                return "[Background music or minimal speech detected]"
-            
-            final_transcript = " ".join(transcript)
-            logger.info(f"Transcription completed, length: {len(final_transcript)} characters")
-            return final_transcript
+        chunks = audio_chunks(recognizer, audio_path)
+        
+        if not chunks:
+            logger.warning("No speech detected, skipping recognition")
+            return MINIMAL_SPEECH_LABEL
+        
+        transcript = recognize_chunks(chunks, backend)
+        
+        if not transcript:
+            logger.warning("No speech detected in any chunk")
+            return MINIMAL_SPEECH_LABEL
+        
+        # One line per chunk, which the translation memory remembers as a unit
+        final_transcript = join_units(transcript)
+        logger.info(f"Transcription completed, length: {len(final_transcript)} characters")
+        return final_transcript
             
     except Exception as e:
         logger.error(f"Error during transcription: {str(e)}", exc_info=True)
@@ -120,19 +155,30 @@ def transcribe_audio(audio_path):
             raise ValueError("The audio file appears to be corrupted or in an unsupported format.")
         raise
 
-def translate_text(text: str, target_language: str) -> str:
-    """Translate text to target language using Google Translate API."""
+def translate_text(text: str, target_language: str, source_language: Optional[str] = None,
+                   backend: Optional[str] = None) -> str:
+    """Translate text to target language with the selected MT backend (Google Translate by default).
+
+    Sentences already in the translation memory are reused; only new ones are sent to the backend.
+    """
     try:
-        # Initialize the translation client
-        translate_client = translate.Client()
-        
-        # Translate the text
-        result = translate_client.translate(
-            text,
-            target_language=target_language
-        )
-        
-        translated_text = result['translatedText']
+        translator = backends.get_backend('mt', backend)
+
+        def translate_batch(sentences):
+            return translator.translate(sentences, target_language, source_language)
+
+        if translator.cached:
+            translated_text = translate_with_memory(
+                text,
+                target_language,
+                translate_batch,
+                source_language=source_language,
+                # Google keeps the keys the memory had before backends existed
+                engine=None if translator.name == 'google' else translator.name
+            )
+        else:
+            sentences = [normalize_sentence(sentence) for sentence in split_sentences(text)]
+            translated_text = join_sentences(translate_batch(sentences), target_language) if sentences else ''
         logger.info(f"Text translated to {target_language}")
         return translated_text
         
@@ -140,9 +186,42 @@ def translate_text(text: str, target_language: str) -> str:
         logger.error(f"Error in translation: {str(e)}")
         raise
 
+# Where a run of text without spaces (Japanese, Chinese) may be cut
+UNSPACED_BREAK = re.compile(r'(?<=[。！？、，])')
+
+def split_unspaced(word, max_bytes):
+    """Cut a run of text without spaces into pieces within the byte limit.
+
+    Cuts after punctuation where possible, otherwise between characters.
+    """
+    pieces = []
+    current = ''
+    for part in UNSPACED_BREAK.split(word):
+        while len(part.encode('utf-8')) > max_bytes:
+            cut = len(part.encode('utf-8')[:max_bytes].decode('utf-8', 'ignore'))
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(part[:cut])
+            part = part[cut:]
+        if len((current + part).encode('utf-8')) > max_bytes:
+            pieces.append(current)
+            current = part
+        else:
+            current += part
+    if current:
+        pieces.append(current)
+    return pieces
+
 def split_text(text, max_bytes=4500):
     """Split text into chunks that are within the byte limit."""
-    words = text.split()
+    words = []
+    for word in text.split():
+        # Leave room for the space between words
+        if len(word.encode('utf-8')) + 1 > max_bytes:
+            words.extend(split_unspaced(word, max_bytes - 1))
+        else:
+            words.append(word)
     chunks = []
     current_chunk = []
     current_size = 0
@@ -167,72 +246,49 @@ def split_text(text, max_bytes=4500):
     
     return chunks
 
-def generate_speech(text: str, language_code: str) -> str:
-    """Generate speech from text using Google Text-to-Speech."""
+def generate_speech(text: str, language_code: str, output_path: Optional[str] = None,
+                    backend: Optional[str] = None) -> str:
+    """Generate speech from text with the selected TTS backend (Google Text-to-Speech by default).
+
+    The WAV is written to ``output_path``, or to a temporary file if not given.
+    """
     try:
-        # Initialize the Text-to-Speech client
-        client = texttospeech.TextToSpeechClient()
+        synthesizer = backends.get_backend('tts', backend)
         
         # Split text into chunks
-        text_chunks = split_text(text)
+        text_chunks = split_text(text, max_bytes=synthesizer.max_text_bytes)
         logger.info(f"Split text into {len(text_chunks)} chunks")
         
-        # Process each chunk and collect audio data
-        audio_segments = []
+        # Reuse audio synthesized earlier for the same text and settings
+        keys = [None] * len(text_chunks)
+        payloads = [None] * len(text_chunks)
+        if synthesizer.cached:
+            voice_params, audio_params = synthesizer.cache_params(language_code)
+            for i, chunk in enumerate(text_chunks):
+                keys[i] = tts_cache.synthesis_key(chunk, language_code, voice_params, audio_params)
+                payloads[i] = tts_cache.get(keys[i])
         
-        for i, chunk in enumerate(text_chunks, 1):
-            logger.info(f"Processing chunk {i}/{len(text_chunks)}")
-            
-            # Set the text input
-            synthesis_input = texttospeech.SynthesisInput(text=chunk)
-            
-            # Build the voice request
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=language_code,
-                ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
-            )
-            
-            # Select the audio file type
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.LINEAR16,
-                speaking_rate=1.0,
-                pitch=0.0,
-                volume_gain_db=0.0
-            )
-            
-            # Perform the text-to-speech request
-            response = client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
-            
-            # Save chunk to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_file.write(response.audio_content)
-                audio_segments.append(temp_file.name)
-        
-        # Combine all audio segments
-        if len(audio_segments) == 1:
-            final_audio_path = audio_segments[0]
+        missing = [i for i, payload in enumerate(payloads) if payload is None]
+        if missing:
+            synthesized = synthesizer.synthesize([text_chunks[i] for i in missing], language_code)
+            for i, audio_content in zip(missing, synthesized):
+                payloads[i] = audio_content
+                if keys[i]:
+                    tts_cache.put(keys[i], audio_content)
+        
+        logger.info(f"TTS cache: {len(text_chunks) - len(missing)}/{len(text_chunks)} chunks reused")
+        
+        # Append every chunk's PCM frames to a single WAV file, written once
+        if output_path:
+            final_audio_path = output_path
         else:
-            # Combine audio segments using pydub
-            logger.info("Combining audio segments...")
-            combined = AudioSegment.from_wav(audio_segments[0])
-            for segment_path in audio_segments[1:]:
-                segment = AudioSegment.from_wav(segment_path)
-                combined += segment
-            
-            # Export final audio
-            final_audio_path = tempfile.mktemp(suffix='.wav')
-            combined.export(final_audio_path, format='wav')
-            
-            # Clean up temporary files
-            for segment_path in audio_segments:
-                try:
-                    os.remove(segment_path)
-                except Exception as e:
-                    logger.warning(f"Error cleaning up temporary file {segment_path}: {str(e)}")
+            fd, final_audio_path = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix='.wav')
+            os.close(fd)
+        try:
+            write_wav_payloads(payloads, final_audio_path)
+        except Exception:
+            os.remove(final_audio_path)
+            raise
         
         logger.info("Speech generation completed successfully")
         return final_audio_path
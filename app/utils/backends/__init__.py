@@ -0,0 +1,121 @@
+"""Speech recognition, translation and speech synthesis backends.
+
+Each kind of backend has a small batch interface (see the base classes below) and
+any number of registered implementations. The defaults come from ASR_BACKEND,
+MT_BACKEND and TTS_BACKEND; a job can pick its own with ``resolve()``.
+"""
+import os
+import logging
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KINDS = ('asr', 'mt', 'tts')
+
+DEFAULT_BACKENDS = {
+    'asr': os.getenv('ASR_BACKEND', 'google'),
+    'mt': os.getenv('MT_BACKEND', 'google'),
+    'tts': os.getenv('TTS_BACKEND', 'google')
+}
+
+class Backend:
+    name = None
+    # Results are stored in the translation memory or TTS cache. Off for backends
+    # whose output is cheaper to produce than to look up.
+    cached = True
+
+    def warm(self):
+        """Create clients or load models ahead of the first job."""
+
+class SpeechRecognizer(Backend):
+    def transcribe(self, chunks):
+        """Transcribe (offset_seconds, AudioData) chunks.
+
+        Returns one text per chunk, in order, with None for chunks without usable speech.
+        """
+        raise NotImplementedError
+
+class Translator(Backend):
+    def translate(self, sentences, target_language, source_language=None):
+        """Translate a batch of sentences, returning the translations in the same order."""
+        raise NotImplementedError
+
+class Synthesizer(Backend):
+    # Longest text, in UTF-8 bytes, passed in one synthesis request
+    max_text_bytes = 4500
+
+    def cache_params(self, language_code):
+        """Return (voice, audio config) dicts that identify this backend's output in the TTS cache."""
+        return {'backend': self.name, 'language_code': language_code}, {}
+
+    def synthesize(self, texts, language_code):
+        """Synthesize a batch of texts, returning one WAV payload per text in the same order.
+
+        Every payload of one call has the same sample rate, width and channel count.
+        """
+        raise NotImplementedError
+
+_registry = {kind: {} for kind in KINDS}
+_instances = {}
+_lock = threading.Lock()
+
+def register(kind, name):
+    """Class decorator that registers a backend implementation under ``name``."""
+    def decorator(cls):
+        cls.name = name
+        _registry[kind][name] = cls
+        return cls
+    return decorator
+
+def names(kind):
+    return sorted(_registry[kind])
+
+def resolve(selection=None):
+    """Return the backend name for every kind, filling in the defaults.
+
+    Raises ValueError for a kind or name that is not registered.
+    """
+    resolved = dict(DEFAULT_BACKENDS)
+    for kind, name in (selection or {}).items():
+        if kind not in _registry:
+            raise ValueError(f"Unknown backend kind: {kind}")
+        if name:
+            resolved[kind] = name
+    for kind, name in resolved.items():
+        if name not in _registry[kind]:
+            raise ValueError(f"Unknown {kind} backend '{name}', choose one of: {', '.join(names(kind))}")
+    return resolved
+
+def cache_options(selection):
+    """Return the result cache options for a backend selection.
+
+    Empty for the Google backends, so results cached before backends existed stay valid.
+    """
+    if all(name == 'google' for name in selection.values()):
+        return {}
+    return {'backends': selection}
+
+def get_backend(kind, name=None):
+    """Return this process's shared instance of a backend, ``name`` defaulting to the configured one."""
+    name = name or DEFAULT_BACKENDS[kind]
+    with _lock:
+        instance = _instances.get((kind, name))
+        if instance is None:
+            if name not in _registry[kind]:
+                raise ValueError(f"Unknown {kind} backend '{name}', choose one of: {', '.join(names(kind))}")
+            instance = _registry[kind][name]()
+            _instances[(kind, name)] = instance
+        return instance
+
+def warm():
+    """Warm the default backends, best effort; a backend that fails is retried on first use."""
+    for kind in KINDS:
+        try:
+            get_backend(kind).warm()
+        except Exception as e:
+            logger.warning(f"Could not warm the {DEFAULT_BACKENDS[kind]} {kind} backend: {str(e)}")
+
+# Register the implementations
+from app.utils.backends import google, local, stub  # noqa: E402,F401
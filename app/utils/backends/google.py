@@ -0,0 +1,162 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import speech_recognition as sr
+import google.cloud.texttospeech as texttospeech
+from app.utils import metrics
+from app.utils.clients import get_translate_client, get_tts_client, reset_client, is_connection_error, warm_client
+from app.utils.backends import SpeechRecognizer, Translator, Synthesizer, register
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Maximum number of speech recognition requests in flight per transcription
+TRANSCRIBE_MAX_WORKERS = int(os.getenv('TRANSCRIBE_MAX_WORKERS', '8'))
+
+# Maximum number of TTS requests in flight per job, and attempts per chunk
+TTS_MAX_WORKERS = int(os.getenv('TTS_MAX_WORKERS', '4'))
+TTS_MAX_RETRIES = int(os.getenv('TTS_MAX_RETRIES', '3'))
+
+def recognize_google(recognizer, audio, **kwargs):
+    """Call Google speech recognition, counting the call and any service error."""
+    try:
+        text = recognizer.recognize_google(audio, **kwargs)
+    except sr.RequestError:
+        metrics.count_api_call('asr', error=True)
+        raise
+    metrics.count_api_call('asr')
+    return text
+
+def recognize_chunk(recognizer, audio, offset):
+    """Recognize a single audio chunk, returning None if it contains no usable speech."""
+    logger.info(f"Processing chunk at offset {offset} seconds")
+    try:
+        # Try with English first
+        chunk_text = recognize_google(recognizer, audio, language='en-US')
+        if chunk_text.strip():
+            return chunk_text
+    except sr.UnknownValueError:
+        logger.warning(f"Could not understand audio in chunk at offset {offset}")
+        # Skip silences
+        pass
+    except sr.RequestError as e:
+        if "Bad Request" in str(e):
+            # Try without language specification
+            try:
+                chunk_text = recognize_google(recognizer, audio)
+                if chunk_text.strip():
+                    return chunk_text
+            except (sr.UnknownValueError, sr.RequestError) as e2:
+                logger.warning(f"Second attempt failed for chunk at offset {offset}: {str(e2)}")
+                pass
+        else:
+            raise
+    return None
+
+@register('asr', 'google')
+class GoogleSpeechRecognizer(SpeechRecognizer):
+    """Google Web Speech API, one request per chunk with several in flight."""
+
+    def transcribe(self, chunks):
+        if not chunks:
+            return []
+        recognizer = sr.Recognizer()
+        # map() keeps results in offset order
+        max_workers = max(1, min(TRANSCRIBE_MAX_WORKERS, len(chunks)))
+        logger.info(f"Recognizing {len(chunks)} chunks with {max_workers} workers")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda chunk: recognize_chunk(recognizer, chunk[1], chunk[0]), chunks))
+
+@register('mt', 'google')
+class GoogleTranslator(Translator):
+    """Google Translate v2, one request per batch of sentences."""
+
+    def warm(self):
+        warm_client('translate')
+
+    def _call(self, sentences, target_language, source_language):
+        try:
+            results = get_translate_client().translate(
+                sentences,
+                target_language=target_language,
+                source_language=source_language
+            )
+        except Exception:
+            metrics.count_api_call('translate', error=True)
+            raise
+        metrics.count_api_call('translate')
+        return results
+
+    def translate(self, sentences, target_language, source_language=None):
+        try:
+            results = self._call(sentences, target_language, source_language)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            # Rebuild the pooled client once if its connection went bad
+            reset_client('translate')
+            results = self._call(sentences, target_language, source_language)
+        return [result['translatedText'] for result in results]
+
+@register('tts', 'google')
+class GoogleSynthesizer(Synthesizer):
+    """Google Cloud Text-to-Speech with a neutral voice, several chunks in flight."""
+
+    audio_params = {
+        'audio_encoding': 'LINEAR16',
+        'speaking_rate': 1.0,
+        'pitch': 0.0,
+        'volume_gain_db': 0.0
+    }
+
+    def warm(self):
+        warm_client('tts')
+
+    def cache_params(self, language_code):
+        # The same settings the TTS cache was keyed on before backends existed
+        voice_params = {
+            'language_code': language_code,
+            'ssml_gender': 'NEUTRAL'
+        }
+        return voice_params, dict(self.audio_params)
+
+    def synthesize(self, texts, language_code):
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=language_code,
+            ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
+        )
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.LINEAR16,
+            speaking_rate=self.audio_params['speaking_rate'],
+            pitch=self.audio_params['pitch'],
+            volume_gain_db=self.audio_params['volume_gain_db']
+        )
+
+        def synthesize_one(indexed_text):
+            i, text = indexed_text
+            logger.info(f"Processing chunk {i}/{len(texts)}")
+            # Retry only this chunk on failure
+            for attempt in range(1, TTS_MAX_RETRIES + 1):
+                try:
+                    response = get_tts_client().synthesize_speech(
+                        input=texttospeech.SynthesisInput(text=text),
+                        voice=voice,
+                        audio_config=audio_config
+                    )
+                    metrics.count_api_call('tts')
+                    return response.audio_content
+                except Exception as e:
+                    metrics.count_api_call('tts', error=True)
+                    if is_connection_error(e):
+                        reset_client('tts')
+                    if attempt == TTS_MAX_RETRIES:
+                        raise
+                    logger.warning(f"Chunk {i} failed (attempt {attempt}/{TTS_MAX_RETRIES}): {str(e)}")
+                    time.sleep(2 ** (attempt - 1))
+
+        # map() keeps results in text order
+        max_workers = max(1, min(TTS_MAX_WORKERS, len(texts)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(synthesize_one, enumerate(texts, 1)))
@@ -0,0 +1,130 @@
+import io
+import os
+import wave
+import struct
+import logging
+import threading
+import subprocess
+import numpy as np
+from app.utils.backends import SpeechRecognizer, Translator, Synthesizer, register
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Offline engines that run on the worker's CPU. Their packages are optional and only
+# needed where they are selected:
+#   asr: pip install faster-whisper   (model downloaded on first use)
+#   mt:  pip install argostranslate   (plus a package per language pair)
+#   tts: apt install espeak-ng
+LOCAL_ASR_MODEL = os.getenv('LOCAL_ASR_MODEL', 'base')
+LOCAL_ASR_LANGUAGE = os.getenv('LOCAL_ASR_LANGUAGE', 'en') or None
+LOCAL_ASR_COMPUTE_TYPE = os.getenv('LOCAL_ASR_COMPUTE_TYPE', 'int8')
+LOCAL_ASR_THREADS = int(os.getenv('LOCAL_ASR_THREADS', '0'))
+LOCAL_MT_SOURCE_LANGUAGE = os.getenv('LOCAL_MT_SOURCE_LANGUAGE', 'en')
+ESPEAK_BINARY = os.getenv('ESPEAK_BINARY', 'espeak-ng')
+
+def _primary_language(code):
+    """Return the primary subtag of a language code, e.g. 'pt' for 'pt-BR'."""
+    return code.replace('_', '-').split('-')[0].lower()
+
+@register('asr', 'local')
+class WhisperSpeechRecognizer(SpeechRecognizer):
+    """Whisper through faster-whisper (CTranslate2), quantized for CPU."""
+
+    def __init__(self):
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError:
+                    raise RuntimeError("The local ASR backend needs faster-whisper: pip install faster-whisper")
+                logger.info(f"Loading Whisper model '{LOCAL_ASR_MODEL}' ({LOCAL_ASR_COMPUTE_TYPE})")
+                self._model = WhisperModel(
+                    LOCAL_ASR_MODEL, device='cpu', compute_type=LOCAL_ASR_COMPUTE_TYPE, cpu_threads=LOCAL_ASR_THREADS
+                )
+            return self._model
+
+    def warm(self):
+        self._get_model()
+
+    def transcribe(self, chunks):
+        model = self._get_model()
+        texts = []
+        for offset, audio in chunks:
+            # Whisper takes 16 kHz mono float samples
+            pcm = np.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), dtype=np.int16)
+            segments, _ = model.transcribe(
+                pcm.astype(np.float32) / 32768.0, language=LOCAL_ASR_LANGUAGE, beam_size=1
+            )
+            text = ' '.join(segment.text.strip() for segment in segments).strip()
+            if not text:
+                logger.warning(f"No speech recognized in chunk at offset {offset}")
+            texts.append(text or None)
+        return texts
+
+@register('mt', 'local')
+class ArgosTranslator(Translator):
+    """Argos Translate (OpenNMT models run by CTranslate2)."""
+
+    def __init__(self):
+        self._translations = {}
+        self._lock = threading.Lock()
+
+    def _get_translation(self, source_language, target_language):
+        pair = (_primary_language(source_language), _primary_language(target_language))
+        with self._lock:
+            if pair not in self._translations:
+                try:
+                    from argostranslate import translate as argos_translate
+                except ImportError:
+                    raise RuntimeError("The local MT backend needs argostranslate: pip install argostranslate")
+                translation = argos_translate.get_translation_from_codes(*pair)
+                if translation is None:
+                    raise ValueError(f"No local translation model installed for {pair[0]} to {pair[1]}")
+                self._translations[pair] = translation
+            return self._translations[pair]
+
+    def translate(self, sentences, target_language, source_language=None):
+        translation = self._get_translation(source_language or LOCAL_MT_SOURCE_LANGUAGE, target_language)
+        return [translation.translate(sentence) for sentence in sentences]
+
+def _fix_stream_header(payload):
+    """Rewrite the WAV header espeak-ng writes to stdout, whose sizes are placeholders."""
+    channels, sample_rate = struct.unpack('<HI', payload[22:28])
+    sample_width = struct.unpack('<H', payload[34:36])[0] // 8
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(sample_rate)
+        writer.writeframes(payload[44:])
+    return buffer.getvalue()
+
+@register('tts', 'local')
+class EspeakSynthesizer(Synthesizer):
+    """eSpeak NG formant synthesis; robotic, but fast and available for most languages."""
+
+    max_text_bytes = 20000
+
+    def _run(self, text, voice):
+        return subprocess.run(
+            [ESPEAK_BINARY, '-v', voice, '--stdout'],
+            input=text.encode('utf-8'), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    def synthesize(self, texts, language_code):
+        payloads = []
+        for text in texts:
+            result = self._run(text, language_code.lower())
+            if result.returncode != 0 or not result.stdout:
+                # espeak-ng knows regional voices for only some languages
+                result = self._run(text, _primary_language(language_code))
+            if result.returncode != 0 or not result.stdout:
+                raise RuntimeError(f"espeak-ng failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+            payloads.append(_fix_stream_header(result.stdout))
+        return payloads
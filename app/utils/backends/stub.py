@@ -0,0 +1,53 @@
+import io
+import os
+import wave
+import numpy as np
+from app.utils.backends import SpeechRecognizer, Translator, Synthesizer, register
+
+# Deterministic engines for tests and offline benchmarks: no network, no models, and
+# the same input always gives the same output.
+STUB_TTS_SAMPLE_RATE = 16000
+# Speech length per character of text, about the pace of real synthesized speech
+STUB_TTS_SECONDS_PER_CHAR = float(os.getenv('STUB_TTS_SECONDS_PER_CHAR', '0.06'))
+
+@register('asr', 'stub')
+class StubSpeechRecognizer(SpeechRecognizer):
+    """Describes each chunk instead of recognizing it."""
+
+    def transcribe(self, chunks):
+        texts = []
+        for offset, audio in chunks:
+            seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+            texts.append(f"Speech at {offset:.2f} seconds lasting {seconds:.2f} seconds.")
+        return texts
+
+@register('mt', 'stub')
+class StubTranslator(Translator):
+    """Tags each sentence with the target language."""
+
+    cached = False
+
+    def translate(self, sentences, target_language, source_language=None):
+        return [f"[{target_language}] {sentence}" for sentence in sentences]
+
+@register('tts', 'stub')
+class StubSynthesizer(Synthesizer):
+    """A quiet tone whose pitch depends on the text and whose length follows its length."""
+
+    cached = False
+
+    def synthesize(self, texts, language_code):
+        payloads = []
+        for text in texts:
+            samples = max(1, int(len(text) * STUB_TTS_SECONDS_PER_CHAR * STUB_TTS_SAMPLE_RATE))
+            frequency = 200 + sum(text.encode('utf-8')) % 200
+            t = np.arange(samples) / STUB_TTS_SAMPLE_RATE
+            pcm = (np.sin(2 * np.pi * frequency * t) * 3000).astype(np.int16)
+            buffer = io.BytesIO()
+            with wave.open(buffer, 'wb') as writer:
+                writer.setnchannels(1)
+                writer.setsampwidth(2)
+                writer.setframerate(STUB_TTS_SAMPLE_RATE)
+                writer.writeframes(pcm.tobytes())
+            payloads.append(buffer.getvalue())
+        return payloads
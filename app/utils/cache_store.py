@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import time
+import logging
+from contextlib import closing
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv('CACHE_DIR', 'cache')
+
+class LRUStore:
+    """Small SQLite-backed key/value index with LRU, TTL and size bounds.
+
+    The index lives in a single SQLite file so it is shared between the Flask
+    process and every Celery worker. Values are strings (JSON, text or a file
+    path); ``size`` is whatever the caller wants counted against ``max_bytes``.
+    Hit/miss counters are persisted alongside the entries so they aggregate
+    across processes.
+    """
+
+    def __init__(self, name, max_entries=None, max_bytes=None, ttl=None, on_evict=None):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.name = name
+        self.db_path = os.path.join(CACHE_DIR, f'{name}.sqlite3')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_db(self):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL DEFAULT 0, '
+                'created_at REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)')
+            conn.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    def _bump(self, conn, counter, amount=1):
+        conn.execute('UPDATE stats SET value = value + ? WHERE name = ?', (amount, counter))
+
+    def get(self, key, count=True):
+        """Return the value for ``key`` or None, counting a hit or a miss unless ``count`` is False."""
+        values = self.get_many([key], count=count)
+        return values.get(key)
+
+    def get_many(self, keys, count=True):
+        """Return a dict of the keys that are present and not expired."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(
+                    f'SELECT key, value, created_at FROM entries WHERE key IN ({placeholders})', batch
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self.ttl is not None and now - created_at > self.ttl:
+                        continue
+                    found[key] = value
+            if found:
+                conn.executemany(
+                    'UPDATE entries SET last_access = ? WHERE key = ?',
+                    [(now, key) for key in found]
+                )
+            if count:
+                self._bump(conn, 'hits', len(found))
+                self._bump(conn, 'misses', len(keys) - len(found))
+        return found
+
+    def record(self, hits=0, misses=0):
+        """Count lookups made with ``count=False`` once their outcome is known."""
+        with closing(self._connect()) as conn:
+            self._bump(conn, 'hits', hits)
+            self._bump(conn, 'misses', misses)
+
+    def put(self, key, value, size=0):
+        """Insert or replace ``key`` and evict anything over the bounds."""
+        self.put_many([(key, value, size)])
+
+    def put_many(self, items):
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO entries (key, value, size, created_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(key, value, size, now, now) for key, value, size in items]
+            )
+        self.evict()
+
+    def delete(self, key):
+        with closing(self._connect()) as conn:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until within bounds."""
+        evicted = []
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if self.ttl is not None:
+                    evicted += conn.execute(
+                        'SELECT key, value FROM entries WHERE created_at < ?',
+                        (time.time() - self.ttl,)
+                    ).fetchall()
+                    conn.execute('DELETE FROM entries WHERE created_at < ?', (time.time() - self.ttl,))
+
+                count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+                if (self.max_entries is not None and count > self.max_entries) or \
+                        (self.max_bytes is not None and total > self.max_bytes):
+                    for key, value, size in conn.execute(
+                        'SELECT key, value, size FROM entries ORDER BY last_access ASC'
+                    ).fetchall():
+                        if (self.max_entries is None or count <= self.max_entries) and \
+                                (self.max_bytes is None or total <= self.max_bytes):
+                            break
+                        conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                        evicted.append((key, value))
+                        count -= 1
+                        total -= size
+
+                self._bump(conn, 'evictions', len(evicted))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        if evicted:
+            logger.info(f"Cache '{self.name}' evicted {len(evicted)} entries")
+        if self.on_evict:
+            for key, value in evicted:
+                try:
+                    self.on_evict(key, value)
+                except Exception as e:
+                    logger.warning(f"Error evicting cache entry {key}: {str(e)}")
+        return evicted
+
+    def stats(self):
+        """Return hit/miss/eviction counters plus current entry count and size."""
+        with closing(self._connect()) as conn:
+            stats = dict(conn.execute('SELECT name, value FROM stats').fetchall())
+            stats['entries'], stats['bytes'] = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+import threading
+import requests
+from google.api_core import exceptions as google_exceptions
+from google.cloud import translate_v2 as translate
+import google.cloud.texttospeech as texttospeech
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Make one cheap API call per client at worker start so auth and TLS are done before the first task
+CLIENT_WARMUP_CALLS = os.getenv('CLIENT_WARMUP_CALLS', 'true').lower() == 'true'
+
+# Errors that mean the underlying channel or connection is broken and should be rebuilt
+CONNECTION_ERRORS = (
+    ConnectionError,
+    requests.exceptions.ConnectionError,
+    google_exceptions.ServiceUnavailable
+)
+
+_factories = {
+    'translate': translate.Client,
+    'tts': texttospeech.TextToSpeechClient
+}
+
+_clients = {}
+_lock = threading.Lock()
+_stats = {
+    name: {'created': 0, 'setup_seconds_total': 0.0, 'last_setup_seconds': None, 'calls': 0, 'resets': 0}
+    for name in _factories
+}
+
+def get_client(name):
+    """Return this process's shared client, creating it on first use or after a fork."""
+    pid = os.getpid()
+    with _lock:
+        _stats[name]['calls'] += 1
+        entry = _clients.get(name)
+        if entry is not None and entry[0] == pid:
+            return entry[1]
+
+        start = time.perf_counter()
+        try:
+            client = _factories[name]()
+        except Exception as e:
+            logger.error(f"Error creating {name} client: {str(e)}")
+            raise
+        elapsed = time.perf_counter() - start
+        _clients[name] = (pid, client)
+        stats = _stats[name]
+        stats['created'] += 1
+        stats['setup_seconds_total'] += elapsed
+        stats['last_setup_seconds'] = round(elapsed, 4)
+        logger.info(f"Created {name} client in {elapsed:.3f}s (pid {pid})")
+        return client
+
+def reset_client(name):
+    """Drop the shared client so the next get_client() call rebuilds it."""
+    with _lock:
+        if _clients.pop(name, None) is not None:
+            _stats[name]['resets'] += 1
+            logger.warning(f"Discarded broken {name} client, it will be rebuilt on next use")
+
+def is_connection_error(exc):
+    return isinstance(exc, CONNECTION_ERRORS)
+
+def get_translate_client():
+    """Get or create Google Translate client."""
+    return get_client('translate')
+
+def get_tts_client():
+    """Get or create Google Text-to-Speech client."""
+    return get_client('tts')
+
+def warm_client(name):
+    """Create a client up front and optionally exercise its connection once."""
+    try:
+        start = time.perf_counter()
+        client = get_client(name)
+        if CLIENT_WARMUP_CALLS:
+            if name == 'translate':
+                client.get_languages()
+            else:
+                client.list_voices(language_code='en-US')
+        logger.info(f"Warmed {name} client in {time.perf_counter() - start:.3f}s")
+    except Exception as e:
+        # Warm-up is best effort; the task will retry client creation on first use
+        logger.warning(f"Could not warm {name} client: {str(e)}")
+        reset_client(name)
+
+def warm_clients():
+    """Create and warm every client."""
+    for name in _factories:
+        warm_client(name)
+
+def client_stats():
+    """Return per-client creation counts and connection setup times for this process."""
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
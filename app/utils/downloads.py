@@ -0,0 +1,52 @@
+import os
+import logging
+from flask import request, send_file, Response
+from app.utils.janitor import mark_used
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# '' serves bytes from Flask, 'x-sendfile' hands the file to Apache/lighttpd,
+# 'x-accel' hands it to nginx through an internal location
+DOWNLOAD_OFFLOAD = os.getenv('DOWNLOAD_OFFLOAD', '').lower()
+# nginx internal location that maps to the outputs/ directory
+X_ACCEL_PREFIX = os.getenv('X_ACCEL_PREFIX', '/protected/outputs/')
+# Outputs never change once written, so clients and proxies may cache them
+DOWNLOAD_MAX_AGE = int(os.getenv('DOWNLOAD_MAX_AGE', str(7 * 24 * 3600)))
+
+def _content_disposition(download_name, as_attachment):
+    kind = 'attachment' if as_attachment else 'inline'
+    return f'{kind}; filename="{download_name}"'
+
+def send_output(video_path, download_name='translated_video.mp4'):
+    """Serve a finished output with Range, conditional GET and optional proxy offload.
+
+    ``?inline=1`` serves the file for in-browser playback instead of as an attachment.
+    """
+    as_attachment = request.args.get('inline') not in ('1', 'true')
+    # Outputs are evicted least recently downloaded first
+    mark_used(video_path)
+
+    if DOWNLOAD_OFFLOAD == 'x-accel':
+        # nginx serves the bytes itself, including Range requests and ETags
+        response = Response(mimetype='video/mp4')
+        response.headers['X-Accel-Redirect'] = X_ACCEL_PREFIX + os.path.basename(video_path)
+        response.headers['Content-Disposition'] = _content_disposition(download_name, as_attachment)
+        response.headers['Cache-Control'] = f'public, max-age={DOWNLOAD_MAX_AGE}, immutable'
+        return response
+
+    # With USE_X_SENDFILE (set from DOWNLOAD_OFFLOAD), send_file only sets the
+    # X-Sendfile header and the proxy sends the body
+    response = send_file(
+        os.path.abspath(video_path),
+        mimetype='video/mp4',
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=True,
+        max_age=DOWNLOAD_MAX_AGE
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
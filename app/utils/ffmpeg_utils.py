@@ -0,0 +1,72 @@
+import os
+import json
+import subprocess
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = os.getenv('FFPROBE_BINARY', 'ffprobe')
+
+class FFmpegError(Exception):
+    """Raised when an ffmpeg or ffprobe invocation fails."""
+
+def run_ffmpeg(args, capture_stdout=False):
+    """Run ffmpeg with ``args`` and return stdout bytes when ``capture_stdout`` is set."""
+    cmd = [FFMPEG_BINARY, '-hide_banner', '-nostdin', '-v', 'error', '-y'] + list(args)
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE if capture_stdout else subprocess.DEVNULL,
+        stderr=subprocess.PIPE
+    )
+    if result.returncode != 0:
+        raise FFmpegError(f"ffmpeg failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout if capture_stdout else None
+
+def _parse_rate(rate):
+    try:
+        num, den = rate.split('/')
+        return float(num) / float(den) if float(den) else None
+    except (AttributeError, ValueError):
+        return None
+
+def probe_media(path):
+    """Return duration, container and first video/audio stream details for a media file."""
+    cmd = [
+        FFPROBE_BINARY, '-v', 'error', '-print_format', 'json',
+        '-show_format', '-show_streams', path
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise FFmpegError(f"ffprobe failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+    data = json.loads(result.stdout or b'{}')
+    format_info = data.get('format', {})
+    video = audio = None
+    for stream in data.get('streams', []):
+        if stream.get('codec_type') == 'video' and video is None \
+                and not stream.get('disposition', {}).get('attached_pic'):
+            video = {
+                'codec': stream.get('codec_name'),
+                'width': stream.get('width'),
+                'height': stream.get('height'),
+                'fps': _parse_rate(stream.get('avg_frame_rate')),
+                'pix_fmt': stream.get('pix_fmt')
+            }
+        elif stream.get('codec_type') == 'audio' and audio is None:
+            audio = {
+                'codec': stream.get('codec_name'),
+                'sample_rate': int(stream.get('sample_rate') or 0) or None,
+                'channels': stream.get('channels')
+            }
+
+    duration = format_info.get('duration')
+    return {
+        'format': format_info.get('format_name'),
+        'duration': float(duration) if duration else None,
+        'size': int(format_info.get('size') or 0) or None,
+        'video': video,
+        'audio': audio
+    }
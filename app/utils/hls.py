@@ -0,0 +1,152 @@
+import os
+import math
+import wave
+import logging
+from app.utils.ffmpeg_utils import run_ffmpeg
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HLS_DIR = os.path.join('outputs', 'hls')
+PLAYLIST_NAME = 'index.m3u8'
+# Target length of each segment; a segment is extended rather than cut inside speech
+HLS_SEGMENT_SECONDS = float(os.getenv('HLS_SEGMENT_SECONDS', '6'))
+# Segments are encoded one after another as the job runs, so favour speed over size
+HLS_X264_PRESET = os.getenv('HLS_X264_PRESET', 'veryfast')
+
+def job_dir(job_id):
+    return os.path.join(HLS_DIR, job_id)
+
+def playlist_url(job_id):
+    return f'/api/hls/{job_id}/{PLAYLIST_NAME}'
+
+def plan_windows(duration, speech, segment_seconds=HLS_SEGMENT_SECONDS):
+    """Split [0, duration) into time-ordered (start, end) windows of about ``segment_seconds``.
+
+    ``speech`` is a list of (start, end) seconds; a cut that would fall inside one
+    is moved to its end, so every utterance is translated within a single window.
+    """
+    windows = []
+    start = 0.0
+    while duration - start > 0.01:
+        cut = min(start + segment_seconds, duration)
+        for speech_start, speech_end in speech:
+            if speech_start < cut < speech_end:
+                cut = min(speech_end, duration)
+                break
+        windows.append((start, cut))
+        start = cut
+    return windows
+
+def speech_seconds(path):
+    """Return the length of a WAV file of synthesized speech."""
+    with wave.open(path, 'rb') as reader:
+        return reader.getnframes() / reader.getframerate()
+
+def place_speech(placed, speech_path, start):
+    """Add a window's speech to ``placed``.
+
+    ``placed`` holds (path, start, end) seconds on the video's timeline. The speech
+    starts at ``start`` or, if the speech before it runs past that, right after it.
+    """
+    if placed:
+        start = max(start, placed[-1][2])
+    placed.append((speech_path, start, start + speech_seconds(speech_path)))
+
+def segment_speech(placed, start, end):
+    """Return the (path, position) speech of the segment [start, end) for mux_segment.
+
+    Speech that began in an earlier segment has a negative position; the rest of it
+    is played at the start of this one.
+    """
+    return [
+        (speech_path, speech_start - start) for speech_path, speech_start, speech_end in placed
+        if speech_start < end and speech_end > start
+    ]
+
+def _speech_filter(speech):
+    """Return the filtergraph joining mux_segment's speech inputs into [speech]."""
+    filters = []
+    labels = ''
+    cursor = 0.0
+    for index, (speech_path, position) in enumerate(speech, start=1):
+        skip = max(-position, 0.0)
+        steps = [f'atrim=start={skip:.3f}', 'asetpts=PTS-STARTPTS'] if skip else []
+        steps.append(f'adelay={int(max(position - cursor, 0.0) * 1000)}:all=1')
+        filters.append(f'[{index}:a]{",".join(steps)}[s{index}]')
+        labels += f'[s{index}]'
+        cursor = max(position, cursor) + speech_seconds(speech_path) - skip
+    filters.append(f'{labels}concat=n={len(speech)}:v=0:a=1,apad[speech]')
+    return ';'.join(filters)
+
+def mux_segment(video_path, start, duration, output_path, speech=()):
+    """Encode one MPEG-TS segment of the video with the translated speech for its window.
+
+    ``speech`` is (path, position) pairs from segment_speech, one after another:
+    each starts ``position`` seconds into the segment, or is cut to its remainder
+    when the position is negative. The audio is padded with silence and anything
+    past the segment end is carried by the next segment. Timestamps continue from
+    ``start`` so the segments play back as one stream.
+    """
+    args = ['-ss', f'{start:.3f}', '-t', f'{duration:.3f}', '-i', video_path]
+    if speech:
+        for speech_path, _ in speech:
+            args += ['-i', speech_path]
+        audio_args = ['-filter_complex', _speech_filter(speech), '-map', '0:v:0', '-map', '[speech]']
+    else:
+        # No speech in this window
+        args += ['-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo']
+        audio_args = ['-map', '0:v:0', '-map', '1:a:0']
+    args += audio_args + [
+        # Each segment must start on a keyframe, so the video is encoded per segment
+        '-c:v', 'libx264',
+        '-preset', HLS_X264_PRESET,
+        '-c:a', 'aac',
+        '-b:a', '128k',
+        '-t', f'{duration:.3f}',
+        '-output_ts_offset', f'{start:.3f}',
+        '-f', 'mpegts',
+        output_path
+    ]
+    run_ffmpeg(args)
+    return output_path
+
+def write_playlist(playlist_dir, segments, target_duration, finished=False):
+    """Atomically rewrite the playlist for (filename, duration) segments written so far.
+
+    Until ``finished`` the playlist is an EVENT playlist that players re-fetch and
+    follow as it grows.
+    """
+    lines = [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        f'#EXT-X-TARGETDURATION:{int(math.ceil(target_duration))}',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXT-X-PLAYLIST-TYPE:EVENT'
+    ]
+    for name, duration in segments:
+        lines.append(f'#EXTINF:{duration:.3f},')
+        lines.append(name)
+    if finished:
+        lines.append('#EXT-X-ENDLIST')
+
+    path = os.path.join(playlist_dir, PLAYLIST_NAME)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(temp_path, path)
+    return path
+
+def concat_segments(playlist_dir, segments, output_path):
+    """Join the segments into a single MP4 without re-encoding."""
+    inputs = '|'.join(os.path.join(playlist_dir, name) for name, _ in segments)
+    run_ffmpeg([
+        '-i', f'concat:{inputs}',
+        '-map', '0',
+        '-c', 'copy',
+        '-bsf:a', 'aac_adtstoasc',
+        '-movflags', '+faststart',
+        output_path
+    ])
+    return output_path
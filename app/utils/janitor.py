@@ -0,0 +1,256 @@
+import os
+import stat
+import time
+import shutil
+import logging
+import tempfile
+from app.utils import metrics
+from app.utils.uploads import UPLOAD_DIR, PARTIAL_DIR
+from app.utils.hls import HLS_DIR
+from app.utils import media_cache
+from app.utils.media_cache import YOUTUBE_CACHE_DIR
+from app.utils.tts_cache import TTS_CACHE_DIR
+from app.utils import scratch
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = 'outputs'
+# Every temporary file or directory the pipeline creates starts with this, so the
+# sweeper can tell ours apart from anything else in the temp directory
+TEMP_PREFIX = 'vlt-'
+
+JANITOR_INTERVAL = int(os.getenv('JANITOR_INTERVAL', '600'))
+UPLOAD_TTL = int(os.getenv('UPLOAD_TTL', str(24 * 3600)))
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(50 * 1024 ** 3)))
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', str(24 * 3600)))
+OUTPUT_TTL = int(os.getenv('OUTPUT_TTL', str(7 * 24 * 3600)))
+OUTPUT_MAX_BYTES = int(os.getenv('OUTPUT_MAX_BYTES', str(100 * 1024 ** 3)))
+# Temporary files older than this belong to a job that died
+TEMP_TTL = int(os.getenv('TEMP_TTL', str(metrics.INFLIGHT_JOB_TTL)))
+# Nothing used more recently than this is evicted, even over the size cap, so
+# queued and running jobs keep their inputs and outputs
+JANITOR_MIN_AGE = int(os.getenv('JANITOR_MIN_AGE', str(metrics.INFLIGHT_JOB_TTL)))
+
+def mark_used(path):
+    """Record that a file was just used (e.g. downloaded) for LRU eviction.
+
+    Only the access time is updated; the modification time, which downloads use
+    for ETag and Last-Modified, is left alone.
+    """
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError as e:
+        logger.debug(f"Could not mark {path} as used: {str(e)}")
+
+def _last_used(path):
+    """Return when an entry was last written or used; directories use their newest file."""
+    if not os.path.isdir(path):
+        st = os.stat(path)
+        return max(st.st_atime, st.st_mtime)
+    newest = os.stat(path).st_mtime
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+                newest = max(newest, st.st_atime, st.st_mtime)
+            except FileNotFoundError:
+                pass
+    return newest
+
+def _size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except FileNotFoundError:
+                pass
+    return total
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def _is_file_or_dir(path):
+    """Return whether path is a regular file or directory, not a socket, pipe or link."""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return False
+    return stat.S_ISREG(mode) or stat.S_ISDIR(mode)
+
+def _entries(paths):
+    entries = []
+    for path in paths:
+        try:
+            entries.append((path, _size(path), _last_used(path)))
+        except FileNotFoundError:
+            pass
+    return entries
+
+def evict(entries, ttl, max_bytes, protected=None):
+    """Remove expired entries, then least recently used ones until under ``max_bytes``.
+
+    ``entries`` are (path, size, last_used). Entries used within JANITOR_MIN_AGE,
+    or for which ``protected(path)`` is true, are always kept. Returns
+    (bytes kept, entries kept, bytes reclaimed, entries removed).
+    """
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    kept = len(entries)
+    reclaimed = removed = 0
+    for path, size, last_used in sorted(entries, key=lambda entry: entry[2]):
+        expired = now - last_used > ttl
+        if not expired and total <= max_bytes:
+            # Sorted by last use, so nothing after this is expired either
+            break
+        if now - last_used < JANITOR_MIN_AGE or (protected and protected(path)):
+            continue
+        _remove(path)
+        logger.info(f"Evicted {path} ({size} bytes, {'expired' if expired else 'over size cap'})")
+        total -= size
+        kept -= 1
+        reclaimed += size
+        removed += 1
+    return total, kept, reclaimed, removed
+
+def _list(directory, skip=()):
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name not in skip and not name.startswith('.')
+    ]
+
+def output_id(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def is_referenced(celery_app, path):
+    """Return True if a task result that has not expired still points at this output.
+
+    Multi-language outputs are named <job id>-<language> and are referenced both
+    by their own id (cache hits) and by the job's result.
+    """
+    name = output_id(path)
+    for task_id in {name, name[:36]}:
+        try:
+            if celery_app.AsyncResult(task_id).state != 'PENDING':
+                return True
+        except Exception as e:
+            logger.warning(f"Could not check the task result for {task_id}, keeping {path}: {str(e)}")
+            return True
+    return False
+
+def sweep_temp_files():
+    """Remove temporary files and directories left behind by jobs that died.
+
+    Returns (bytes reclaimed, entries removed).
+    """
+    now = time.time()
+    # Sockets are left alone: a service listening on one is not a job that died
+    candidates = [
+        os.path.join(tempfile.gettempdir(), name) for name in os.listdir(tempfile.gettempdir())
+        if name.startswith(TEMP_PREFIX) and not name.startswith(scratch.SCRATCH_PREFIX)
+        and _is_file_or_dir(os.path.join(tempfile.gettempdir(), name))
+    ]
+    # Partial writes of the caches and of chunked uploads
+    candidates += [path for path in _list(TTS_CACHE_DIR) if path.endswith('.part')]
+    if os.path.isdir(YOUTUBE_CACHE_DIR):
+        candidates += [
+            os.path.join(YOUTUBE_CACHE_DIR, name) for name in os.listdir(YOUTUBE_CACHE_DIR)
+            if name.startswith('.download-')
+        ]
+
+    reclaimed = removed = 0
+    for path, size, last_used in _entries(candidates):
+        if now - last_used > TEMP_TTL:
+            _remove(path)
+            reclaimed += size
+            removed += 1
+    if os.path.isdir(PARTIAL_DIR):
+        for name in os.listdir(PARTIAL_DIR):
+            if not name.endswith('.json'):
+                continue
+            session_path = os.path.join(PARTIAL_DIR, name)
+            base = session_path[:-len('.json')]
+            try:
+                idle = now - max(os.path.getmtime(p) for p in (session_path, base + '.part') if os.path.exists(p))
+            except (OSError, ValueError):
+                continue
+            if idle > UPLOAD_SESSION_TTL:
+                for path in (base + '.part', base + '.lock', session_path):
+                    if os.path.exists(path):
+                        reclaimed += os.path.getsize(path)
+                        os.remove(path)
+                removed += 1
+    return reclaimed, removed
+
+def sweep_scratch():
+    """Remove the scratch directories of jobs that are no longer in flight.
+
+    Normally a job removes its own directory; this catches jobs whose worker died.
+    Returns {medium: (bytes kept, directories kept)}.
+    """
+    usage = {'ram': (0, 0), 'disk': (0, 0)}
+    for path, job_id, medium in scratch.directories():
+        if metrics.job_in_flight(job_id):
+            size, count = usage[medium]
+            usage[medium] = (size + scratch.size(path), count + 1)
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed scratch directory of finished or lost job {job_id}: {path}")
+    return usage
+
+def sweep_media_links():
+    """Drop the media cache links held by jobs that are no longer in flight (see media_cache.release)."""
+    for path, job_id in media_cache.job_link_dirs():
+        if not metrics.job_in_flight(job_id):
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Released media cache links of finished or lost job {job_id}")
+
+def sweep(celery_app):
+    """Run one janitor pass over uploads, outputs and temporary files and publish disk gauges."""
+    start = time.perf_counter()
+    usage = {}
+
+    uploads_entries = _entries(_list(UPLOAD_DIR))
+    kept_bytes, kept, reclaimed, removed = evict(uploads_entries, UPLOAD_TTL, UPLOAD_MAX_BYTES)
+    usage['uploads'] = (kept_bytes, kept)
+    logger.info(f"Janitor: uploads/ {kept_bytes} bytes in {kept} files, reclaimed {reclaimed} bytes from {removed}")
+
+    output_entries = _entries(_list(OUTPUT_DIR, skip=('hls',)) + _list(HLS_DIR))
+    kept_bytes, kept, reclaimed, removed = evict(
+        output_entries, OUTPUT_TTL, OUTPUT_MAX_BYTES,
+        protected=lambda path: is_referenced(celery_app, path)
+    )
+    usage['outputs'] = (kept_bytes, kept)
+    logger.info(f"Janitor: outputs/ {kept_bytes} bytes in {kept} entries, reclaimed {reclaimed} bytes from {removed}")
+
+    reclaimed, removed = sweep_temp_files()
+    logger.info(f"Janitor: reclaimed {reclaimed} bytes from {removed} orphaned temporary entries")
+
+    for medium, kept in sweep_scratch().items():
+        usage[f'scratch_{medium}'] = kept
+    sweep_media_links()
+    free = {name: disk_free(path) for name, path in (('uploads', UPLOAD_DIR), ('outputs', OUTPUT_DIR))}
+    free['scratch_ram'] = scratch.ram_free()
+    free['scratch_disk'] = disk_free(scratch.SCRATCH_DISK_DIR)
+    metrics.set_disk_usage(usage, free)
+    metrics.observe_stage('janitor', time.perf_counter() - start)
+    return usage
+
+def disk_free(path):
+    """Return the free bytes on the filesystem holding ``path``."""
+    os.makedirs(path, exist_ok=True)
+    return shutil.disk_usage(path).free
+
+if __name__ == '__main__':
+    # One pass, e.g. from cron when Celery beat is not running
+    from app import celery
+    sweep(celery)
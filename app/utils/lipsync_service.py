@@ -0,0 +1,217 @@
+"""Long-lived Wav2Lip inference service.
+
+Running ``Wav2Lip/inference.py`` per job pays for interpreter startup, the torch
+import, checkpoint loading and face detector construction before a single frame
+is processed. This service does that once and then accepts jobs over a local
+socket.
+
+Start it next to the Celery workers, as the user they run as:
+    python -m app.utils.lipsync_service
+
+By default it listens on a Unix socket (LIPSYNC_SERVICE_SOCKET) that only its own
+user can open. Setting LIPSYNC_SERVICE_HOST listens on TCP instead, which requires
+a LIPSYNC_SERVICE_AUTHKEY shared with the workers. Messages are JSON.
+
+``process_video_with_lipsync`` sends jobs here and falls back to the one-off
+subprocess when the service is not running.
+"""
+import os
+import sys
+import json
+import stat
+import time
+import logging
+import tempfile
+import threading
+from multiprocessing.connection import Listener, Client
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+wav2lip_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'Wav2Lip')
+checkpoint_path = os.getenv(
+    'WAV2LIP_CHECKPOINT',
+    os.path.join(wav2lip_path, 'checkpoints', 'wav2lip.pth')
+)
+
+# Not named with the janitor's temporary file prefix, which would sweep it away
+LIPSYNC_SERVICE_SOCKET = os.getenv('LIPSYNC_SERVICE_SOCKET', os.path.join(tempfile.gettempdir(), 'wav2lip-service.sock'))
+# TCP only when a host is set, and then only with an authkey
+LIPSYNC_SERVICE_HOST = os.getenv('LIPSYNC_SERVICE_HOST', '')
+LIPSYNC_SERVICE_PORT = int(os.getenv('LIPSYNC_SERVICE_PORT', '6001'))
+LIPSYNC_SERVICE_AUTHKEY = os.getenv('LIPSYNC_SERVICE_AUTHKEY', '').encode('utf-8') or None
+LIPSYNC_SERVICE_TIMEOUT = int(os.getenv('LIPSYNC_SERVICE_TIMEOUT', '3600'))
+# Jobs are three paths, results a path and some timings
+MAX_MESSAGE_BYTES = 64 * 1024
+
+class LipSyncServiceUnavailable(Exception):
+    """Raised when no lip-sync service is listening."""
+
+def service_address():
+    """Return (address, family, authkey) of the service.
+
+    Raises ValueError for a TCP address without an authkey.
+    """
+    if not LIPSYNC_SERVICE_HOST:
+        return LIPSYNC_SERVICE_SOCKET, 'AF_UNIX', None
+    if not LIPSYNC_SERVICE_AUTHKEY:
+        raise ValueError("LIPSYNC_SERVICE_AUTHKEY must be set when LIPSYNC_SERVICE_HOST is")
+    return (LIPSYNC_SERVICE_HOST, LIPSYNC_SERVICE_PORT), 'AF_INET', LIPSYNC_SERVICE_AUTHKEY
+
+def send_message(conn, message):
+    conn.send_bytes(json.dumps(message).encode('utf-8'))
+
+def recv_message(conn):
+    return json.loads(conn.recv_bytes(MAX_MESSAGE_BYTES))
+
+def parse_job(job):
+    if not isinstance(job, dict) or not all(isinstance(job.get(key), str) for key in ('face', 'audio', 'outfile')):
+        raise ValueError("A job needs 'face', 'audio' and 'outfile' paths")
+    return job
+
+class LipSyncService:
+    """Holds the Wav2Lip model and face detector in memory and runs jobs one at a time."""
+
+    def __init__(self):
+        self.inference = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Import Wav2Lip's inference module and load the checkpoint and face detector once."""
+        start = time.perf_counter()
+        if wav2lip_path not in sys.path:
+            sys.path.insert(0, wav2lip_path)
+
+        # inference.py parses its arguments at import time
+        argv = sys.argv
+        sys.argv = ['inference.py', '--checkpoint_path', checkpoint_path, '--face', '', '--audio', '']
+        try:
+            import inference
+        finally:
+            sys.argv = argv
+
+        model = inference.load_model(checkpoint_path)
+        detector = inference.face_detection.FaceAlignment(
+            inference.face_detection.LandmarksType._2D,
+            flip_input=False,
+            device=inference.device
+        )
+
+        # Route Wav2Lip's per-run loading through the instances loaded above
+        inference.load_model = lambda path: model
+        inference.face_detection.FaceAlignment = lambda *args, **kwargs: detector
+
+        self.inference = inference
+        logger.info(f"Wav2Lip model loaded on {inference.device} in {time.perf_counter() - start:.2f}s")
+
+    def run_job(self, job):
+        """Run one lip-sync job and return its output path and timings."""
+        received = time.perf_counter()
+        with self.lock:
+            started = time.perf_counter()
+            args = self.inference.args
+            args.face = job['face']
+            args.audio = job['audio']
+            args.outfile = job['outfile']
+            args.static = job['face'].lower().endswith(('.jpg', '.png', '.jpeg'))
+
+            # Wav2Lip writes its intermediates to temp/ relative to the working directory
+            os.makedirs('temp', exist_ok=True)
+            os.makedirs(os.path.dirname(os.path.abspath(job['outfile'])), exist_ok=True)
+            self.inference.main()
+            finished = time.perf_counter()
+
+        if not os.path.exists(job['outfile']):
+            raise RuntimeError(f"Wav2Lip did not produce {job['outfile']}")
+        return {
+            'output_path': job['outfile'],
+            'timings': {
+                'queue_wait_seconds': round(started - received, 3),
+                'inference_seconds': round(finished - started, 3)
+            }
+        }
+
+    def handle(self, conn):
+        try:
+            try:
+                job = parse_job(recv_message(conn))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Rejected malformed lip-sync request: {str(e)}")
+                send_message(conn, {'status': 'error', 'message': 'Malformed request'})
+                return
+            logger.info(f"Lip-sync job received: {job['outfile']}")
+            try:
+                response = {'status': 'success', **self.run_job(job)}
+                logger.info(f"Lip-sync job finished: {job['outfile']} {response['timings']}")
+            except Exception as e:
+                logger.error(f"Lip-sync job failed: {str(e)}", exc_info=True)
+                response = {'status': 'error', 'message': str(e)}
+            send_message(conn, response)
+        except EOFError:
+            pass
+        finally:
+            conn.close()
+
+    def listen(self):
+        """Open the listening socket; a Unix socket is created readable by this user only."""
+        address, family, authkey = service_address()
+        if family != 'AF_UNIX':
+            return Listener(address, family=family, authkey=authkey)
+
+        # A socket left behind by a service that crashed
+        if os.path.exists(address) and stat.S_ISSOCK(os.lstat(address).st_mode):
+            os.remove(address)
+        umask = os.umask(0o177)
+        try:
+            listener = Listener(address, family=family)
+        finally:
+            os.umask(umask)
+        os.chmod(address, 0o600)
+        return listener
+
+    def serve_forever(self):
+        try:
+            listener = self.listen()
+        except ValueError as e:
+            sys.exit(f"Refusing to start the lip-sync service: {str(e)}")
+        self.load()
+        with listener:
+            logger.info(f"Lip-sync service listening on {listener.address}")
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+def request_lipsync(video_path, audio_path, output_path):
+    """Send a lip-sync job to the running service and wait for the result.
+
+    Raises LipSyncServiceUnavailable if no service is listening.
+    """
+    start = time.perf_counter()
+    try:
+        address, family, authkey = service_address()
+        conn = Client(address, family=family, authkey=authkey)
+    except (ValueError, ConnectionRefusedError, FileNotFoundError) as e:
+        raise LipSyncServiceUnavailable(str(e))
+
+    try:
+        send_message(conn, {
+            'face': os.path.abspath(video_path),
+            'audio': os.path.abspath(audio_path),
+            'outfile': os.path.abspath(output_path)
+        })
+        if not conn.poll(LIPSYNC_SERVICE_TIMEOUT):
+            raise TimeoutError(f"Lip-sync service did not answer within {LIPSYNC_SERVICE_TIMEOUT}s")
+        response = recv_message(conn)
+    finally:
+        conn.close()
+
+    if response['status'] != 'success':
+        raise RuntimeError(f"Lip-sync service error: {response['message']}")
+
+    response['timings']['total_seconds'] = round(time.perf_counter() - start, 3)
+    logger.info(f"Lip-sync completed for {output_path}: {response['timings']}")
+    return output_path
+
+if __name__ == '__main__':
+    LipSyncService().serve_forever()
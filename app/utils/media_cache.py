@@ -0,0 +1,166 @@
+import os
+import time
+import errno
+import fcntl
+import shutil
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+from app.utils.cache_store import CACHE_DIR, LRUStore
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+YOUTUBE_CACHE_DIR = os.path.join(CACHE_DIR, 'youtube')
+YOUTUBE_CACHE_MAX_BYTES = int(os.getenv('YOUTUBE_CACHE_MAX_BYTES', str(20 * 1024 ** 3)))
+# How long a worker waits for another worker that is downloading the same media
+YOUTUBE_CACHE_LOCK_TIMEOUT = int(os.getenv('YOUTUBE_CACHE_LOCK_TIMEOUT', '3600'))
+# Links held by jobs whose work dir is on another filesystem, such as RAM scratch
+YOUTUBE_CACHE_JOBS_DIR = os.path.join(YOUTUBE_CACHE_DIR, '.jobs')
+
+_store = None
+
+def _remove_media(key, path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def get_store():
+    """Get or create the downloaded-media index; evicted entries delete their files."""
+    global _store
+    if _store is None:
+        os.makedirs(YOUTUBE_CACHE_DIR, exist_ok=True)
+        _store = LRUStore('youtube', max_bytes=YOUTUBE_CACHE_MAX_BYTES, on_evict=_remove_media)
+    return _store
+
+def media_key(video_id, format_selector):
+    """Build the cache key for one format of a YouTube video."""
+    format_digest = hashlib.sha256(format_selector.encode('utf-8')).hexdigest()[:16]
+    return f'{video_id}-{format_digest}'
+
+def _lookup(key, count=True):
+    path = get_store().get(key, count=count)
+    if path and not os.path.exists(path):
+        get_store().delete(key)
+        return None
+    return path
+
+@contextmanager
+def _download_lock(key):
+    """Hold an exclusive per-key lock shared by every worker on this cache directory.
+
+    The lock is released by the kernel if the holder dies, so a crashed download
+    never blocks the key.
+    """
+    lock_path = os.path.join(YOUTUBE_CACHE_DIR, f'{key}.lock')
+    with open(lock_path, 'w') as lock_file:
+        deadline = time.monotonic() + YOUTUBE_CACHE_LOCK_TIMEOUT
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for another download of {key}")
+                time.sleep(0.5)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _log_outcome(outcome, key):
+    stats = get_store().stats()
+    logger.info(
+        f"YouTube media cache {outcome} for {key} "
+        f"(hits={stats['hits']}, misses={stats['misses']}, hit_ratio={stats['hit_ratio']:.2f}, "
+        f"bytes={stats['bytes']})"
+    )
+
+def fetch(video_id, format_selector, download):
+    """Return (path, hit) for one format of a video, downloading it on a miss.
+
+    ``download(output_dir, name)`` must download the media into ``output_dir`` and
+    return its path. Only one worker downloads a given key; the others wait for it
+    and then use the cached file.
+    """
+    key = media_key(video_id, format_selector)
+    # Only counted here on a hit, so every miss in the stats is one real download
+    path = _lookup(key, count=False)
+    if path:
+        get_store().record(hits=1)
+        _log_outcome('hit', key)
+        return path, True
+
+    os.makedirs(YOUTUBE_CACHE_DIR, exist_ok=True)
+    with _download_lock(key):
+        # Another worker may have finished the download while we waited
+        path = _lookup(key)
+        if path:
+            _log_outcome('hit after waiting', key)
+            return path, True
+
+        _log_outcome('miss', key)
+        staging_dir = tempfile.mkdtemp(dir=YOUTUBE_CACHE_DIR, prefix='.download-')
+        try:
+            downloaded = download(staging_dir, key)
+            path = os.path.join(YOUTUBE_CACHE_DIR, os.path.basename(downloaded))
+            os.replace(downloaded, path)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        get_store().put(key, path, size=os.path.getsize(path))
+        return path, False
+
+def job_links_dir(job_id):
+    return os.path.join(YOUTUBE_CACHE_JOBS_DIR, job_id)
+
+def _link(path, link_path):
+    """Hard-link ``path`` as ``link_path``, copying it on filesystems without hard links.
+
+    Raises OSError with EXDEV when the two are on different filesystems.
+    """
+    if os.path.exists(link_path):
+        # The stage is being retried
+        return link_path
+    try:
+        os.link(path, link_path)
+    except OSError as e:
+        if e.errno == errno.EXDEV:
+            raise
+        logger.warning(f"Could not hard-link {path}, copying it instead: {str(e)}")
+        temp_path = link_path + '.part'
+        shutil.copyfile(path, temp_path)
+        os.replace(temp_path, link_path)
+    return link_path
+
+def link_into(path, work_dir, job_id):
+    """Give a job its own name for a cached file, so eviction cannot remove it mid-job.
+
+    The file is hard-linked into ``work_dir``. A work dir on another filesystem (RAM
+    scratch always is) gets the link in the job's directory under
+    YOUTUBE_CACHE_JOBS_DIR instead, which release() removes when the job ends.
+    """
+    try:
+        return _link(path, os.path.join(work_dir, os.path.basename(path)))
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    links_dir = job_links_dir(job_id)
+    os.makedirs(links_dir, exist_ok=True)
+    return _link(path, os.path.join(links_dir, os.path.basename(path)))
+
+def release(job_id):
+    """Drop the links a job holds outside its work dir."""
+    shutil.rmtree(job_links_dir(job_id), ignore_errors=True)
+
+def job_link_dirs():
+    """Return (path, job_id) for every job holding links outside its work dir."""
+    try:
+        names = os.listdir(YOUTUBE_CACHE_JOBS_DIR)
+    except FileNotFoundError:
+        return []
+    return [(os.path.join(YOUTUBE_CACHE_JOBS_DIR, name), name) for name in names]
+
+def stats():
+    """Return hit/miss counters for the downloaded-media cache."""
+    return get_store().stats()
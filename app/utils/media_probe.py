@@ -0,0 +1,117 @@
+import os
+import logging
+from app.utils.ffmpeg_utils import probe_media, FFmpegError
+from app.utils import youtube
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Jobs within both limits go to the fast-lane queues so they never wait behind long
+# ones. The duration limit counts every target language, since each one is
+# translated and synthesized separately.
+FAST_LANE_MAX_SECONDS = float(os.getenv('FAST_LANE_MAX_SECONDS', '600'))
+FAST_LANE_MAX_BYTES = int(os.getenv('FAST_LANE_MAX_BYTES', str(500 * 1024 * 1024)))
+
+# The YouTube probe runs inside the submitting request, so it gets one short attempt
+YOUTUBE_PROBE_TIMEOUT = float(os.getenv('YOUTUBE_PROBE_TIMEOUT', '10'))
+
+FAST_LANE = 'fast'
+BULK_LANE = 'bulk'
+
+class NoAudioError(ValueError):
+    """Raised for an input without an audio stream; there is nothing to translate."""
+
+def require_audio(probe):
+    if probe and not probe.get('audio'):
+        raise NoAudioError("The video has no audio track to translate")
+    return probe
+
+def _discard(video_path):
+    try:
+        os.remove(video_path)
+    except OSError as e:
+        logger.warning(f"Could not remove rejected upload {video_path}: {str(e)}")
+
+def probe_upload(video_path):
+    """Probe an uploaded video with ffprobe.
+
+    Returns None if ffprobe is not installed; the job then runs without a probe.
+    Raises ValueError for a file ffprobe cannot read or one without audio, after
+    deleting it, since no job will use it.
+    """
+    try:
+        probe = probe_media(video_path)
+    except FFmpegError as e:
+        logger.warning(f"Rejecting unreadable upload {video_path}: {str(e)}")
+        _discard(video_path)
+        raise ValueError("The uploaded file is not a video that can be read")
+    except OSError as e:
+        logger.warning(f"Could not run ffprobe on {video_path}: {str(e)}")
+        return None
+    try:
+        return require_audio(probe)
+    except NoAudioError:
+        logger.warning(f"Rejecting upload without audio {video_path}")
+        _discard(video_path)
+        raise
+
+def _has_audio(info):
+    formats = info.get('formats') or [info]
+    # yt-dlp uses 'none' for a stream that is known to be missing and None for unknown
+    return any(f.get('acodec') != 'none' for f in formats)
+
+def probe_youtube(youtube_url):
+    """Fetch a YouTube video's metadata and describe it like probe_media().
+
+    Only the probe is kept. The job fetches the metadata again when it starts, so
+    the signed format URLs in it have not expired by the time it downloads.
+    Returns None if the fetch failed; the job then fetches it itself and reports
+    the error. Raises ValueError for a video without audio.
+    """
+    try:
+        info = youtube.fetch_info(youtube_url, socket_timeout=YOUTUBE_PROBE_TIMEOUT, retries=0)
+    except Exception as e:
+        logger.warning(f"Could not probe {youtube_url} before queueing: {str(e)}")
+        return None
+
+    probe = {
+        'format': info.get('ext'),
+        'duration': float(info['duration']) if info.get('duration') else None,
+        # The job downloads at most YOUTUBE_MAX_HEIGHT, so the size of yt-dlp's
+        # default (often much larger) format says little about it
+        'size': None,
+        'video': {
+            'codec': info.get('vcodec'),
+            'width': info.get('width'),
+            'height': info.get('height'),
+            'fps': info.get('fps'),
+            'pix_fmt': None
+        } if info.get('vcodec') != 'none' else None,
+        'audio': {
+            'codec': info.get('acodec'),
+            'sample_rate': info.get('asr'),
+            'channels': info.get('audio_channels')
+        } if _has_audio(info) else None
+    }
+    return require_audio(probe)
+
+def probe_source(video_path=None, youtube_url=None):
+    """Probe a job's input before it is queued.
+
+    Returns None when the input could not be probed (see probe_upload and
+    probe_youtube). Raises ValueError for input that cannot be translated.
+    """
+    if youtube_url:
+        return probe_youtube(youtube_url)
+    return probe_upload(video_path)
+
+def choose_lane(probe, languages=1):
+    """Return FAST_LANE for a job known to be short and small, BULK_LANE otherwise."""
+    if not probe or not probe.get('duration'):
+        return BULK_LANE
+    if probe['duration'] * languages > FAST_LANE_MAX_SECONDS:
+        return BULK_LANE
+    if probe.get('size') and probe['size'] > FAST_LANE_MAX_BYTES:
+        return BULK_LANE
+    return FAST_LANE
@@ -0,0 +1,254 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+import redis
+from app.utils import result_cache, translation_memory, tts_cache, media_cache
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Metrics live in Redis so every web and worker process, on any host, adds to the same series
+METRICS_REDIS_URL = os.getenv('METRICS_REDIS_URL', os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'))
+METRICS_PREFIX = 'metrics:'
+
+# Jobs older than this are assumed lost (e.g. a killed worker) and no longer counted as in flight
+INFLIGHT_JOB_TTL = int(os.getenv('INFLIGHT_JOB_TTL', str(6 * 3600)))
+
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+SCRATCH_BUCKETS = tuple(1024 ** 2 * mb for mb in (1, 4, 16, 64, 256, 1024, 4096, 16384))
+
+_redis = None
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(METRICS_REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+    return _redis
+
+def _record(update):
+    """Run a metrics update; metrics must never fail the pipeline."""
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        update(pipe)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Failed to record metric: {str(e)}")
+
+def _observe(pipe, key, value, buckets=STAGE_BUCKETS):
+    bucket = next((str(le) for le in buckets if value <= le), '+Inf')
+    pipe.hincrby(key, bucket, 1)
+    pipe.hincrby(key, 'count', 1)
+    pipe.hincrbyfloat(key, 'sum', value)
+
+def observe_stage(stage, seconds):
+    """Add one latency observation to the stage's histogram."""
+    def update(pipe):
+        _observe(pipe, f'{METRICS_PREFIX}stage_seconds:{stage}', seconds)
+        pipe.sadd(f'{METRICS_PREFIX}stages', stage)
+    _record(update)
+
+def observe_time_to_first_frame(seconds):
+    """Record how long after submission the first playable segment of a job was ready."""
+    _record(lambda pipe: _observe(pipe, f'{METRICS_PREFIX}time_to_first_frame_seconds', seconds))
+
+def observe_job_scratch(nbytes, medium):
+    """Record the most scratch space a job used, on 'ram' or 'disk'."""
+    def update(pipe):
+        _observe(pipe, f'{METRICS_PREFIX}job_scratch_bytes:{medium}', nbytes, buckets=SCRATCH_BUCKETS)
+        pipe.sadd(f'{METRICS_PREFIX}scratch_media', medium)
+    _record(update)
+
+@contextmanager
+def stage_timer(stage):
+    """Time a block of work as one observation of ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def add_bytes(stage, count):
+    """Count bytes read or written by a stage."""
+    if count:
+        _record(lambda pipe: pipe.hincrby(f'{METRICS_PREFIX}bytes', stage, int(count)))
+
+def add_file_bytes(stage, path):
+    try:
+        add_bytes(stage, os.path.getsize(path))
+    except OSError:
+        pass
+
+def count_api_call(service, error=False):
+    """Count one external API call and whether it failed."""
+    def update(pipe):
+        pipe.hincrby(f'{METRICS_PREFIX}api_calls', service, 1)
+        if error:
+            pipe.hincrby(f'{METRICS_PREFIX}api_errors', service, 1)
+    _record(update)
+
+def job_started(job_id):
+    _record(lambda pipe: pipe.zadd(f'{METRICS_PREFIX}inflight', {job_id: time.time()}))
+
+def job_finished(job_id):
+    _record(lambda pipe: pipe.zrem(f'{METRICS_PREFIX}inflight', job_id))
+
+def job_in_flight(job_id):
+    """Return True unless a job has finished or is old enough to be assumed lost.
+
+    Also True when Redis cannot be reached, so callers never act on a running job.
+    """
+    try:
+        started = get_redis().zscore(f'{METRICS_PREFIX}inflight', job_id)
+    except Exception as e:
+        logger.warning(f"Could not check whether job {job_id} is in flight: {str(e)}")
+        return True
+    return started is not None and started > time.time() - INFLIGHT_JOB_TTL
+
+def set_disk_usage(usage, free):
+    """Publish the janitor's view of disk usage.
+
+    ``usage`` maps a directory name to (bytes, entries); ``free`` maps it to the
+    free bytes on its filesystem.
+    """
+    def update(pipe):
+        for name, (size, entries) in usage.items():
+            pipe.hset(f'{METRICS_PREFIX}disk_bytes', name, int(size))
+            pipe.hset(f'{METRICS_PREFIX}disk_entries', name, int(entries))
+        for name, value in free.items():
+            pipe.hset(f'{METRICS_PREFIX}disk_free_bytes', name, int(value))
+    _record(update)
+
+def queue_depths(celery_app, queues):
+    """Return the number of waiting messages per Celery queue."""
+    depths = {}
+    try:
+        with celery_app.connection_or_acquire() as conn:
+            channel = conn.default_channel
+            for queue in queues:
+                try:
+                    depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+                except conn.channel_errors:
+                    # Queue has not been declared yet, so nothing is waiting on it
+                    depths[queue] = 0
+    except Exception as e:
+        logger.warning(f"Could not read queue depths: {str(e)}")
+    return depths
+
+def _decode(mapping):
+    return {key.decode('utf-8'): value.decode('utf-8') for key, value in mapping.items()}
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+def cache_stats():
+    """Return hit/miss counters for each cache, skipping any that cannot be read."""
+    stats = {}
+    caches = (
+        ('result', result_cache), ('translation_memory', translation_memory), ('tts', tts_cache),
+        ('youtube_media', media_cache)
+    )
+    for name, module in caches:
+        try:
+            stats[name] = module.stats()
+        except Exception as e:
+            logger.warning(f"Could not read {name} cache stats: {str(e)}")
+    return stats
+
+def _histogram_lines(name, data, buckets=STAGE_BUCKETS, **labels):
+    lines = []
+    cumulative = 0
+    for le in [str(le) for le in buckets] + ['+Inf']:
+        cumulative += int(data.get(le, 0))
+        lines.append(f'{name}_bucket{_labels(**labels, le=le)} {cumulative}')
+    suffix = _labels(**labels) if labels else ''
+    lines.append(f'{name}_sum{suffix} {float(data.get("sum", 0))}')
+    lines.append(f'{name}_count{suffix} {int(data.get("count", 0))}')
+    return lines
+
+def _redis_lines(r):
+    """Render the metrics kept in Redis."""
+    lines = []
+
+    lines.append('# HELP pipeline_stage_seconds Latency of each pipeline stage.')
+    lines.append('# TYPE pipeline_stage_seconds histogram')
+    for stage in sorted(member.decode('utf-8') for member in r.smembers(f'{METRICS_PREFIX}stages')):
+        data = _decode(r.hgetall(f'{METRICS_PREFIX}stage_seconds:{stage}'))
+        lines.extend(_histogram_lines('pipeline_stage_seconds', data, stage=stage))
+
+    lines.append('# HELP time_to_first_frame_seconds Time from submission until the first segment of a progressive job was playable.')
+    lines.append('# TYPE time_to_first_frame_seconds histogram')
+    data = _decode(r.hgetall(f'{METRICS_PREFIX}time_to_first_frame_seconds'))
+    lines.extend(_histogram_lines('time_to_first_frame_seconds', data))
+
+    lines.append('# HELP job_scratch_bytes Most scratch space each job used, by medium.')
+    lines.append('# TYPE job_scratch_bytes histogram')
+    for medium in sorted(member.decode('utf-8') for member in r.smembers(f'{METRICS_PREFIX}scratch_media')):
+        data = _decode(r.hgetall(f'{METRICS_PREFIX}job_scratch_bytes:{medium}'))
+        lines.extend(_histogram_lines('job_scratch_bytes', data, buckets=SCRATCH_BUCKETS, medium=medium))
+
+    counters = [
+        ('pipeline_bytes_processed_total', 'Bytes processed per stage.', 'bytes', 'stage'),
+        ('external_api_calls_total', 'Calls made to external APIs.', 'api_calls', 'service'),
+        ('external_api_errors_total', 'Failed calls to external APIs.', 'api_errors', 'service')
+    ]
+    for name, help_text, key, label in counters:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for label_value, value in sorted(_decode(r.hgetall(f'{METRICS_PREFIX}{key}')).items()):
+            lines.append(f'{name}{_labels(**{label: label_value})} {int(value)}')
+
+    inflight_key = f'{METRICS_PREFIX}inflight'
+    r.zremrangebyscore(inflight_key, 0, time.time() - INFLIGHT_JOB_TTL)
+    lines.append('# HELP pipeline_jobs_in_flight Jobs queued or running.')
+    lines.append('# TYPE pipeline_jobs_in_flight gauge')
+    lines.append(f'pipeline_jobs_in_flight {r.zcard(inflight_key)}')
+
+    gauges = [
+        ('disk_usage_bytes', 'Bytes kept in each managed directory after the last janitor pass.', 'disk_bytes'),
+        ('disk_usage_entries', 'Files or output directories kept in each managed directory.', 'disk_entries'),
+        ('disk_free_bytes', 'Free bytes on the filesystem holding each managed directory.', 'disk_free_bytes')
+    ]
+    for name, help_text, key in gauges:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for directory, value in sorted(_decode(r.hgetall(f'{METRICS_PREFIX}{key}')).items()):
+            lines.append(f'{name}{_labels(directory=directory)} {int(value)}')
+    return lines
+
+def render_metrics(queue_depth=None):
+    """Render all metrics in the Prometheus text exposition format.
+
+    When Redis cannot be reached its series are left out and metrics_redis_up is 0;
+    the queue depths and cache counters are still rendered.
+    """
+    try:
+        lines = _redis_lines(get_redis())
+        redis_up = 1
+    except redis.RedisError as e:
+        logger.warning(f"Could not read metrics from Redis: {str(e)}")
+        lines = []
+        redis_up = 0
+    lines.append('# HELP metrics_redis_up Whether the metrics kept in Redis could be read.')
+    lines.append('# TYPE metrics_redis_up gauge')
+    lines.append(f'metrics_redis_up {redis_up}')
+
+    if queue_depth is not None:
+        lines.append('# HELP celery_queue_depth Messages waiting in each Celery queue.')
+        lines.append('# TYPE celery_queue_depth gauge')
+        for queue, depth in sorted(queue_depth.items()):
+            lines.append(f'celery_queue_depth{_labels(queue=queue)} {depth}')
+
+    caches = cache_stats()
+    lines.append('# HELP cache_lookups_total Cache lookups by outcome.')
+    lines.append('# TYPE cache_lookups_total counter')
+    for name, stats in sorted(caches.items()):
+        for outcome in ('hits', 'misses'):
+            lines.append(f'cache_lookups_total{_labels(cache=name, outcome=outcome)} {stats[outcome]}')
+    lines.append('# HELP cache_bytes Bytes accounted to each cache.')
+    lines.append('# TYPE cache_bytes gauge')
+    for name, stats in sorted(caches.items()):
+        lines.append(f'cache_bytes{_labels(cache=name)} {stats["bytes"]}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+import contextlib
+import redis
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROGRESS_REDIS_URL = os.getenv('PROGRESS_REDIS_URL', os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0'))
+# How long the latest snapshot of a job is kept for late subscribers and pollers
+PROGRESS_TTL = int(os.getenv('PROGRESS_TTL', str(24 * 3600)))
+# Idle streams send a comment this often so proxies keep the connection open
+HEARTBEAT_SECONDS = 15
+# Longest a status long-poll may hold the connection open
+LONG_POLL_MAX_SECONDS = int(os.getenv('LONG_POLL_MAX_SECONDS', '30'))
+# Longest a stream or long-poll waits for the shared subscription to (re)connect
+SUBSCRIBE_TIMEOUT_SECONDS = 5
+# A stream cut short by a Redis outage tells the browser to reconnect after this long
+STREAM_RETRY_MS = 5000
+
+TERMINAL_STATES = ('SUCCESS', 'FAILURE')
+
+_redis = None
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(PROGRESS_REDIS_URL)
+    return _redis
+
+def _state_key(job_id):
+    return f'progress:state:{job_id}'
+
+def _channel(job_id):
+    return f'progress:events:{job_id}'
+
+def publish(job_id, state, meta=None, result=None):
+    """Record a job's new state and push it to every subscriber.
+
+    Each transition gets an increasing ``seq`` so clients can tell which updates
+    they have already seen.
+    """
+    try:
+        r = get_redis()
+        seq = r.incr(f'progress:seq:{job_id}')
+        r.expire(f'progress:seq:{job_id}', PROGRESS_TTL)
+        snapshot = {'seq': seq, 'state': state}
+        if meta is not None:
+            snapshot['meta'] = meta
+        if result is not None:
+            snapshot['result'] = result
+        payload = json.dumps(snapshot)
+        r.set(_state_key(job_id), payload, ex=PROGRESS_TTL)
+        r.publish(_channel(job_id), payload)
+    except Exception as e:
+        logger.warning(f"Failed to publish progress for {job_id}: {str(e)}")
+
+def current(job_id):
+    """Return the latest snapshot for a job, or None if nothing was published or Redis is down."""
+    try:
+        payload = get_redis().get(_state_key(job_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to read progress for {job_id}: {str(e)}")
+        return None
+    return json.loads(payload) if payload else None
+
+def record_language(job_id, language, result):
+    """Store one finished language of a multi-language job and return all finished so far."""
+    try:
+        r = get_redis()
+        key = f'progress:languages:{job_id}'
+        r.hset(key, language, json.dumps(result))
+        r.expire(key, PROGRESS_TTL)
+    except Exception as e:
+        logger.warning(f"Failed to record {language} for {job_id}: {str(e)}")
+    return finished_languages(job_id)
+
+def finished_languages(job_id):
+    """Return {language: result} for the languages of a job that have finished."""
+    try:
+        stored = get_redis().hgetall(f'progress:languages:{job_id}')
+    except Exception as e:
+        logger.warning(f"Failed to read finished languages for {job_id}: {str(e)}")
+        return {}
+    return {language.decode('utf-8'): json.loads(result) for language, result in stored.items()}
+
+def snapshot_from_result(async_result):
+    """Build a snapshot from the Celery result backend for jobs with nothing published."""
+    state = async_result.state
+    if state == 'PENDING':
+        return {'seq': 0, 'state': state, 'status': 'Task is pending...'}
+    if state == 'SUCCESS':
+        return {'seq': 0, 'state': state, 'result': async_result.result}
+    if state == 'PROGRESS':
+        return {'seq': 0, 'state': state, 'meta': async_result.info}
+    return {'seq': 0, 'state': state, 'error': str(async_result.info)}
+
+def response_body(snapshot):
+    return {key: value for key, value in snapshot.items() if key != 'seq'}
+
+def etag(snapshot):
+    """Published snapshots are tagged by sequence number, backend ones by content."""
+    if snapshot['seq']:
+        return str(snapshot['seq'])
+    body = json.dumps(response_body(snapshot), sort_keys=True, default=str)
+    return 'r-' + hashlib.sha1(body.encode('utf-8')).hexdigest()[:16]
+
+class Subscriber:
+    """One Redis pub/sub connection per process, shared by every stream and long-poll in it.
+
+    A background thread receives the events of all jobs through one pattern
+    subscription and puts each on the queues registered for its job. If the
+    connection drops, every queue gets None, since events may have been missed, and
+    the thread reconnects while anyone is still waiting.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}
+        # Queues whose subscription was connected, so a drop must be reported to them
+        self._live = set()
+        self._connected = threading.Event()
+        self._thread = None
+
+    @contextlib.contextmanager
+    def subscribe(self, job_id, timeout=SUBSCRIBE_TIMEOUT_SECONDS):
+        """Yield a queue of the job's new snapshots; None on it means the subscription dropped.
+
+        Raises redis.RedisError if the subscription is not connected within ``timeout``.
+        """
+        updates = queue.Queue()
+        with self._lock:
+            self._waiters.setdefault(job_id, set()).add(updates)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='progress-subscriber', daemon=True)
+                self._thread.start()
+        try:
+            self._connected.wait(timeout)
+            with self._lock:
+                if not self._connected.is_set():
+                    raise redis.ConnectionError("Progress subscription is not connected")
+                self._live.add(updates)
+            yield updates
+        finally:
+            with self._lock:
+                self._live.discard(updates)
+                waiters = self._waiters.get(job_id, set())
+                waiters.discard(updates)
+                if not waiters:
+                    self._waiters.pop(job_id, None)
+
+    def _deliver(self, message):
+        channel = message['channel']
+        if isinstance(channel, bytes):
+            channel = channel.decode('utf-8')
+        try:
+            snapshot = json.loads(message['data'])
+        except ValueError:
+            logger.warning(f"Ignoring malformed progress event on {channel}")
+            return
+        with self._lock:
+            waiters = list(self._waiters.get(channel[len(_channel('')):], ()))
+        for updates in waiters:
+            updates.put(snapshot)
+
+    def _stop_if_idle(self):
+        """Mark the thread stopped and return True if nobody is waiting."""
+        with self._lock:
+            if self._waiters:
+                return False
+            self._connected.clear()
+            self._thread = None
+            return True
+
+    def _stop_after_error(self):
+        """Wake every waiter after a lost connection; return True if the thread should stop."""
+        with self._lock:
+            self._connected.clear()
+            live, self._live = self._live, set()
+            stop = not self._waiters
+            if stop:
+                self._thread = None
+        for updates in live:
+            updates.put(None)
+        return stop
+
+    def _run(self):
+        while True:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(_channel('*'))
+                # Waiters read the current state once connected, so nothing published later is missed
+                while not pubsub.subscribed:
+                    pubsub.get_message(timeout=1.0)
+                self._connected.set()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message['type'] == 'pmessage':
+                        self._deliver(message)
+                    elif not message and self._stop_if_idle():
+                        return
+            except (redis.RedisError, OSError) as e:
+                logger.warning(f"Progress subscription lost: {str(e)}")
+                if self._stop_after_error():
+                    return
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            time.sleep(1)
+
+_subscriber = Subscriber()
+
+def wait_for_update(job_id, after_seq, timeout):
+    """Block until a snapshot newer than ``after_seq`` exists or ``timeout`` passes.
+
+    Returns None if Redis is down or goes away while waiting.
+    """
+    try:
+        with _subscriber.subscribe(job_id, timeout=min(timeout, SUBSCRIBE_TIMEOUT_SECONDS)) as updates:
+            snapshot = current(job_id)
+            deadline = time.monotonic() + timeout
+            while not (snapshot and snapshot['seq'] > after_seq):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    snapshot = updates.get(timeout=remaining)
+                except queue.Empty:
+                    return None
+                if snapshot is None:
+                    return None
+            return snapshot
+    except redis.RedisError as e:
+        logger.warning(f"Failed to wait for progress of {job_id}: {str(e)}")
+        return None
+
+def stream(job_id, last_seq=0, initial=None):
+    """Yield Server-Sent Events for a job until it reaches a terminal state.
+
+    ``initial`` is sent first when nothing has been published for the job yet
+    (e.g. a result served from the cache before any worker touched it). If Redis
+    goes away the stream ends with a retry hint; the browser reconnects and is
+    answered from the result backend until Redis is back.
+    """
+    sent_initial = False
+    try:
+        with _subscriber.subscribe(job_id) as updates:
+            snapshot = current(job_id)
+            if snapshot is None and initial is not None:
+                # No id, so a reconnecting client still receives the first published event
+                sent_initial = True
+                yield f"data: {json.dumps(initial)}\n\n"
+                if initial['state'] in TERMINAL_STATES:
+                    return
+            last_sent = time.monotonic()
+            while True:
+                if snapshot and snapshot.get('seq', 0) > last_seq:
+                    last_seq = snapshot['seq']
+                    yield f"id: {last_seq}\ndata: {json.dumps(snapshot)}\n\n"
+                    last_sent = time.monotonic()
+                    if snapshot['state'] in TERMINAL_STATES:
+                        return
+                elif snapshot and snapshot['state'] in TERMINAL_STATES and snapshot.get('seq', 0) <= last_seq:
+                    # Client reconnected after already receiving the final event
+                    return
+
+                try:
+                    snapshot = updates.get(timeout=max(HEARTBEAT_SECONDS - (time.monotonic() - last_sent), 0.1))
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    last_sent = time.monotonic()
+                    snapshot = None
+                    continue
+                if snapshot is None:
+                    raise redis.ConnectionError("Progress subscription dropped")
+    except redis.RedisError as e:
+        logger.warning(f"Ending progress stream for {job_id}: {str(e)}")
+        if initial is not None and not sent_initial:
+            yield f"data: {json.dumps(initial)}\n\n"
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import logging
+from urllib.parse import urlparse, parse_qs
+from app.utils.cache_store import LRUStore
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump when a pipeline change makes previously cached outputs stale, or changes how
+# source digests are computed (2: block-wise content digests)
+PIPELINE_VERSION = '2'
+
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '500'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(20 * 1024 ** 3)))
+RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', str(7 * 24 * 3600)))
+
+_store = None
+
+def _remove_output(key, value):
+    """Delete an evicted entry's output unless a task result still points to it.
+
+    Those are left to the janitor, which removes them once their results expire.
+    """
+    from app import celery
+    from app.utils import janitor
+    video_path = json.loads(value)['video_path']
+    if os.path.exists(video_path) and not janitor.is_referenced(celery, video_path):
+        os.remove(video_path)
+        logger.info(f"Removed {video_path} evicted from the result cache")
+
+def get_store():
+    """Get or create the shared result cache index; evicted entries delete their outputs."""
+    global _store
+    if _store is None:
+        _store = LRUStore(
+            'results',
+            max_entries=RESULT_CACHE_MAX_ENTRIES,
+            max_bytes=RESULT_CACHE_MAX_BYTES,
+            ttl=RESULT_CACHE_TTL,
+            on_evict=_remove_output
+        )
+    return _store
+
+# Content digests hash fixed-size blocks and then the list of block digests, so a file
+# can be hashed incrementally across separate upload requests with the same result
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+def hash_block(block):
+    return hashlib.sha256(block).digest()
+
+def combine_block_digests(block_digests):
+    """Return the content digest for a file from its ordered block digests."""
+    return hashlib.sha256(b''.join(block_digests)).hexdigest()
+
+def hash_file(path):
+    """Return the content digest of a file (see HASH_BLOCK_SIZE)."""
+    block_digests = []
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            block_digests.append(hash_block(block))
+    return combine_block_digests(block_digests)
+
+def youtube_video_id(youtube_url):
+    """Return the canonical YouTube video ID for a URL, or None if it has none."""
+    parsed = urlparse(youtube_url.strip())
+    host = (parsed.hostname or '').lower()
+    if host.endswith('youtu.be'):
+        return parsed.path.lstrip('/').split('/')[0] or None
+    if 'youtube' in host:
+        if parsed.path == '/watch':
+            return parse_qs(parsed.query).get('v', [None])[0]
+        parts = parsed.path.strip('/').split('/')
+        if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+            return parts[1]
+    return None
+
+def source_digest_for_url(youtube_url):
+    """Identify a YouTube source by video ID, falling back to the raw URL."""
+    video_id = youtube_video_id(youtube_url)
+    return f'youtube:{video_id}' if video_id else f'url:{youtube_url.strip()}'
+
+def make_cache_key(source_digest, target_language, **options):
+    """Build a result cache key from the input identity and pipeline options."""
+    payload = {
+        'source': source_digest,
+        'target_language': target_language,
+        'options': options,
+        'pipeline_version': PIPELINE_VERSION
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+def lookup(cache_key):
+    """Return the cached result for ``cache_key`` if its output still exists."""
+    try:
+        store = get_store()
+        value = store.get(cache_key)
+        if value is None:
+            logger.info(f"Result cache miss: {cache_key[:12]}")
+            return None
+
+        entry = json.loads(value)
+        if not os.path.exists(entry['video_path']):
+            logger.info(f"Result cache entry {cache_key[:12]} points to a missing output, dropping it")
+            store.delete(cache_key)
+            return None
+
+        logger.info(f"Result cache hit: {cache_key[:12]} -> task {entry['task_id']}")
+        return entry
+    except Exception as e:
+        logger.warning(f"Result cache lookup failed: {str(e)}")
+        return None
+
+def store_result(cache_key, task_id, video_path):
+    """Record a finished job's output under ``cache_key``."""
+    if not cache_key or not os.path.exists(video_path):
+        return
+    try:
+        entry = {'task_id': task_id, 'video_path': video_path}
+        get_store().put(cache_key, json.dumps(entry), size=os.path.getsize(video_path))
+        logger.info(f"Result cached: {cache_key[:12]} -> task {task_id}")
+    except Exception as e:
+        logger.warning(f"Failed to store result in cache: {str(e)}")
+
+def stats():
+    """Return hit/miss counters for the result cache."""
+    return get_store().stats()
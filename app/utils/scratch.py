@@ -0,0 +1,80 @@
+import os
+import shutil
+import logging
+import tempfile
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Each job writes its intermediates into one scratch directory, on the RAM-backed
+# filesystem when they fit and on disk otherwise. Every stage of a job must see the
+# same directory, so when workers run on several hosts disable the RAM directory
+# (SCRATCH_RAM_DIR=) and point SCRATCH_DISK_DIR at shared storage.
+SCRATCH_RAM_DIR = os.getenv('SCRATCH_RAM_DIR', '/dev/shm')
+SCRATCH_DISK_DIR = os.getenv('SCRATCH_DISK_DIR', tempfile.gettempdir())
+# Share of the RAM filesystem's free space one job may take, leaving room for the
+# jobs that start alongside it
+SCRATCH_RAM_SHARE = float(os.getenv('SCRATCH_RAM_SHARE', '0.25'))
+SCRATCH_PREFIX = 'vlt-job-'
+
+# Extracted audio is 16 kHz mono 16-bit PCM, synthesized speech 24 kHz mono 16-bit PCM
+EXTRACTED_AUDIO_BYTES_PER_SECOND = 16000 * 2
+SPEECH_BYTES_PER_SECOND = 24000 * 2
+
+def estimate_bytes(duration, languages=1):
+    """Estimate the scratch space needed for ``duration`` seconds of media."""
+    per_second = EXTRACTED_AUDIO_BYTES_PER_SECOND + languages * SPEECH_BYTES_PER_SECOND
+    # Translated speech can run longer than the original, plus headers and metadata
+    return int(duration * per_second * 1.25) + 1024 ** 2
+
+def ram_free():
+    """Return the free bytes on the RAM filesystem, or 0 if it cannot be used."""
+    if not SCRATCH_RAM_DIR or not os.path.isdir(SCRATCH_RAM_DIR) or not os.access(SCRATCH_RAM_DIR, os.W_OK):
+        return 0
+    return shutil.disk_usage(SCRATCH_RAM_DIR).free
+
+def create(job_id, needed_bytes=None):
+    """Create a job's scratch directory and return (path, medium), medium being 'ram' or 'disk'.
+
+    RAM is only used when the job's need is known and fits its share of the free space.
+    """
+    if needed_bytes is not None and needed_bytes <= ram_free() * SCRATCH_RAM_SHARE:
+        base, medium = SCRATCH_RAM_DIR, 'ram'
+    else:
+        base, medium = SCRATCH_DISK_DIR, 'disk'
+    path = os.path.join(base, f'{SCRATCH_PREFIX}{job_id}')
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    logger.info(f"Scratch directory for job {job_id} on {medium}: {path} (estimated {needed_bytes} bytes)")
+    return path, medium
+
+def size(path):
+    """Return the bytes a scratch directory holds.
+
+    Hard links into the media cache are skipped, since they take no extra space.
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            if st.st_nlink == 1:
+                total += st.st_size
+    return total
+
+def directories():
+    """Return (path, job id, medium) for every scratch directory on this host."""
+    found = []
+    bases = [(SCRATCH_RAM_DIR, 'ram'), (SCRATCH_DISK_DIR, 'disk')]
+    seen = set()
+    for base, medium in bases:
+        if not base or not os.path.isdir(base) or os.path.realpath(base) in seen:
+            continue
+        seen.add(os.path.realpath(base))
+        for name in os.listdir(base):
+            path = os.path.join(base, name)
+            if name.startswith(SCRATCH_PREFIX) and os.path.isdir(path):
+                found.append((path, name[len(SCRATCH_PREFIX):], medium))
+    return found
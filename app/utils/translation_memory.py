@@ -0,0 +1,117 @@
+import os
+import re
+import hashlib
+import logging
+import unicodedata
+from app.utils.cache_store import LRUStore
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', '200000'))
+TRANSLATION_MEMORY_MAX_BYTES = int(os.getenv('TRANSLATION_MEMORY_MAX_BYTES', str(256 * 1024 ** 2)))
+
+# Google Translate v2 accepts at most 128 segments per request
+MAX_SEGMENTS_PER_REQUEST = 100
+
+# Transcripts put each recognized chunk on its own line (see join_units). Recognizers
+# such as Google's return unpunctuated text, so a line is the unit the memory
+# remembers; punctuation, where there is any, splits it further. CJK sentence ends
+# are not followed by a space.
+UNIT_SEPARATOR = '\n'
+SENTENCE_BOUNDARY = re.compile(r'\s*\n\s*|(?<=[.!?])\s+|(?<=[。！？])\s*')
+
+# Target languages written without spaces between sentences
+UNSPACED_LANGUAGES = ('ja', 'zh', 'yue')
+
+_store = None
+
+def get_store():
+    """Get or create the shared translation memory index."""
+    global _store
+    if _store is None:
+        _store = LRUStore(
+            'translation_memory',
+            max_entries=TRANSLATION_MEMORY_MAX_ENTRIES,
+            max_bytes=TRANSLATION_MEMORY_MAX_BYTES
+        )
+    return _store
+
+def join_units(texts):
+    """Join recognized chunks into a transcript that keeps their boundaries."""
+    return UNIT_SEPARATOR.join(texts)
+
+def split_sentences(text):
+    """Split text into transcript units and sentences, dropping empty pieces."""
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text.strip()) if sentence.strip()]
+
+def join_sentences(sentences, target_language):
+    """Join translated sentences the way the target language separates them."""
+    language = (target_language or '').split('-')[0].lower()
+    return ('' if language in UNSPACED_LANGUAGES else ' ').join(sentences)
+
+def normalize_sentence(sentence):
+    """Normalize a sentence for lookup: NFC form with collapsed whitespace."""
+    return ' '.join(unicodedata.normalize('NFC', sentence).split())
+
+def memory_key(sentence, source_language, target_language, engine=None):
+    """Build the memory key for a (sentence, source, target) triple.
+
+    Translations from an ``engine`` other than the default are kept apart.
+    """
+    payload = f"{source_language or 'auto'}\x00{target_language}\x00{normalize_sentence(sentence)}"
+    if engine:
+        payload = f"{engine}\x00{payload}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def translate_with_memory(text, target_language, translate_batch, source_language=None, engine=None):
+    """Translate ``text`` unit by unit (see split_sentences), sending only unseen units to the backend.
+
+    ``translate_batch`` takes a list of sentences and returns their translations in the
+    same order. The translated sentences are joined back in their original order.
+    """
+    sentences = [normalize_sentence(sentence) for sentence in split_sentences(text)]
+    if not sentences:
+        return ''
+
+    keys = [memory_key(sentence, source_language, target_language, engine) for sentence in sentences]
+    store = get_store()
+    try:
+        known = store.get_many(keys)
+    except Exception as e:
+        logger.warning(f"Translation memory lookup failed: {str(e)}")
+        known = {}
+
+    # Translate each distinct missing sentence once
+    missing = {}
+    for key, sentence in zip(keys, sentences):
+        if key not in known and key not in missing:
+            missing[key] = sentence
+
+    if missing:
+        missing_keys = list(missing)
+        translated = []
+        for start in range(0, len(missing_keys), MAX_SEGMENTS_PER_REQUEST):
+            batch = [missing[key] for key in missing_keys[start:start + MAX_SEGMENTS_PER_REQUEST]]
+            translated.extend(translate_batch(batch))
+
+        new_entries = dict(zip(missing_keys, translated))
+        known.update(new_entries)
+        try:
+            store.put_many(
+                (key, value, len(key) + len(value.encode('utf-8'))) for key, value in new_entries.items()
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update translation memory: {str(e)}")
+
+    hits = len(sentences) - sum(1 for key in keys if key in missing)
+    logger.info(
+        f"Translation memory: {hits}/{len(sentences)} sentences reused, "
+        f"{len(missing)} sent to backend"
+    )
+    return join_sentences([known[key] for key in keys], target_language)
+
+def stats():
+    """Return hit/miss counters for the translation memory."""
+    return get_store().stats()
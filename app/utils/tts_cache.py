@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from app.utils.cache_store import CACHE_DIR, LRUStore
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, 'tts')
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+
+_store = None
+
+def _remove_audio(key, path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def get_store():
+    """Get or create the synthesized-audio index; evicted entries delete their files."""
+    global _store
+    if _store is None:
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        _store = LRUStore('tts', max_bytes=TTS_CACHE_MAX_BYTES, on_evict=_remove_audio)
+    return _store
+
+def synthesis_key(text, language_code, voice_params, audio_config):
+    """Build the cache key for one synthesis request.
+
+    ``voice_params`` and ``audio_config`` are plain dicts of the request settings.
+    """
+    payload = {
+        'text': text,
+        'language_code': language_code,
+        'voice': voice_params,
+        'audio_config': audio_config
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+def get(key):
+    """Return the cached audio payload for ``key``, or None."""
+    try:
+        path = get_store().get(key)
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        get_store().delete(key)
+        return None
+    except Exception as e:
+        logger.warning(f"TTS cache lookup failed: {str(e)}")
+        return None
+
+def put(key, audio_content):
+    """Store an audio payload under ``key``."""
+    try:
+        store = get_store()
+        path = os.path.join(TTS_CACHE_DIR, f'{key}.wav')
+        # Write to a temporary file first so readers never see a partial payload
+        fd, temp_path = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix='.part')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio_content)
+        os.replace(temp_path, path)
+        store.put(key, path, size=len(audio_content))
+    except Exception as e:
+        logger.warning(f"Failed to store synthesized audio in cache: {str(e)}")
+
+def stats():
+    """Return hit/miss counters for the synthesized-audio cache."""
+    return get_store().stats()
@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import uuid
+import logging
+from werkzeug.utils import secure_filename
+from app.utils.result_cache import HASH_BLOCK_SIZE, hash_block, combine_block_digests
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = 'uploads'
+PARTIAL_DIR = os.path.join(UPLOAD_DIR, '.partial')
+# Suggested size of each PUT; any size works
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+# A lock older than this belongs to a request that died and may be broken
+UPLOAD_LOCK_TIMEOUT = 600
+
+READ_SIZE = 1024 * 1024
+
+class UploadNotFound(Exception):
+    """Raised for an unknown or already completed upload id."""
+
+class UploadOffsetMismatch(Exception):
+    """Raised when a chunk does not start at the upload's current offset."""
+
+    def __init__(self, offset):
+        super().__init__(f"Chunk must start at offset {offset}")
+        self.offset = offset
+
+class UploadBusy(Exception):
+    """Raised when another request is already writing to the upload."""
+
+def _paths(upload_id):
+    if not upload_id or secure_filename(upload_id) != upload_id:
+        raise UploadNotFound(upload_id)
+    base = os.path.join(PARTIAL_DIR, upload_id)
+    return base + '.json', base + '.part', base + '.lock'
+
+def _load_session(upload_id):
+    meta_path, _, _ = _paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise UploadNotFound(upload_id)
+
+def _save_session(session):
+    meta_path, _, _ = _paths(session['upload_id'])
+    temp_path = meta_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(session, f)
+    os.replace(temp_path, meta_path)
+
+def _extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ''))[1].lower()
+    return ext or '.mp4'
+
+def _content_path(digest, filename):
+    return os.path.join(UPLOAD_DIR, f'{digest}{_extension(filename)}')
+
+class _Lock:
+    """Exclusive per-upload lock held for the duration of one request."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if time.time() - os.path.getmtime(self.path) < UPLOAD_LOCK_TIMEOUT:
+                raise UploadBusy("Another chunk for this upload is still being written")
+            os.remove(self.path)
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+def _declared_size(size):
+    """Return a declared upload size: an int, or a string of digits from a form field."""
+    if size is None or size == '':
+        return None
+    # bool is an int, and int() would truncate 1.5 or accept ' 7 ' and '1_000'
+    if isinstance(size, str) and size.isascii() and size.isdigit():
+        return int(size)
+    if not isinstance(size, int) or isinstance(size, bool):
+        raise ValueError("size must be a whole number of bytes")
+    if size < 0:
+        raise ValueError("size must not be negative")
+    return size
+
+def init_upload(filename, size=None):
+    """Start a resumable upload and return its session.
+
+    Raises ValueError for a ``size`` that is not a number of bytes.
+    """
+    size = _declared_size(size)
+    os.makedirs(PARTIAL_DIR, exist_ok=True)
+    session = {
+        'upload_id': uuid.uuid4().hex,
+        'filename': filename,
+        'size': size,
+        'offset': 0,
+        'block_digests': [],
+        'created_at': time.time()
+    }
+    _, part_path, _ = _paths(session['upload_id'])
+    open(part_path, 'wb').close()
+    _save_session(session)
+    logger.info(f"Upload {session['upload_id']} started for {filename}")
+    return session
+
+def get_upload(upload_id):
+    """Return the session for an upload, including the offset to resume from."""
+    return _load_session(upload_id)
+
+def _write_stream(stream, f, tail, block_digests, limit=None):
+    """Copy a stream to ``f``, hashing every completed block. Returns bytes written."""
+    written = 0
+    while True:
+        size = READ_SIZE if limit is None else min(READ_SIZE, limit - written)
+        if size <= 0:
+            break
+        data = stream.read(size)
+        if not data:
+            break
+        f.write(data)
+        written += len(data)
+        tail.extend(data)
+        while len(tail) >= HASH_BLOCK_SIZE:
+            block_digests.append(hash_block(bytes(tail[:HASH_BLOCK_SIZE])))
+            del tail[:HASH_BLOCK_SIZE]
+    return written
+
+def append_chunk(upload_id, offset, stream, length=None):
+    """Append the bytes of ``stream`` at ``offset`` and return the new offset.
+
+    Block digests are updated as the data is written; only the unhashed tail of the
+    last block is read back from disk, so resuming never rehashes the whole file.
+    """
+    _, part_path, lock_path = _paths(upload_id)
+    with _Lock(lock_path):
+        session = _load_session(upload_id)
+        if offset != session['offset']:
+            raise UploadOffsetMismatch(session['offset'])
+
+        block_digests = [bytes.fromhex(digest) for digest in session['block_digests']]
+        hashed = len(block_digests) * HASH_BLOCK_SIZE
+        with open(part_path, 'r+b') as f:
+            f.seek(hashed)
+            tail = bytearray(f.read(session['offset'] - hashed))
+            f.seek(session['offset'])
+            f.truncate()
+            written = _write_stream(stream, f, tail, block_digests, limit=length)
+
+        session['offset'] += written
+        session['block_digests'] = [digest.hex() for digest in block_digests]
+        if session['size'] is not None and session['offset'] > session['size']:
+            raise ValueError("Upload is larger than its declared size")
+        _save_session(session)
+        return session['offset']
+
+def complete_upload(upload_id):
+    """Finish an upload, moving it under its content-derived name.
+
+    Returns (video_path, digest). If the same content was uploaded before, the
+    existing file is reused and the new copy discarded.
+    """
+    meta_path, part_path, lock_path = _paths(upload_id)
+    with _Lock(lock_path):
+        session = _load_session(upload_id)
+        if session['size'] is not None and session['offset'] != session['size']:
+            raise ValueError(f"Upload incomplete: {session['offset']} of {session['size']} bytes received")
+
+        block_digests = [bytes.fromhex(digest) for digest in session['block_digests']]
+        hashed = len(block_digests) * HASH_BLOCK_SIZE
+        if session['offset'] > hashed:
+            with open(part_path, 'rb') as f:
+                f.seek(hashed)
+                block_digests.append(hash_block(f.read()))
+        digest = combine_block_digests(block_digests)
+
+        video_path = _content_path(digest, session['filename'])
+        if os.path.exists(video_path):
+            os.remove(part_path)
+            # Reused content counts as fresh for the janitor
+            os.utime(video_path)
+        else:
+            os.replace(part_path, video_path)
+        os.remove(meta_path)
+        logger.info(f"Upload {upload_id} completed as {video_path}")
+        return video_path, digest
+
+def save_file_upload(file_storage):
+    """Stream a multipart file to disk under its content-derived name, hashing as it goes.
+
+    Returns (video_path, digest).
+    """
+    os.makedirs(PARTIAL_DIR, exist_ok=True)
+    part_path = os.path.join(PARTIAL_DIR, f'{uuid.uuid4().hex}.part')
+    tail = bytearray()
+    block_digests = []
+    try:
+        with open(part_path, 'wb') as f:
+            _write_stream(file_storage.stream, f, tail, block_digests)
+        if tail:
+            block_digests.append(hash_block(bytes(tail)))
+        digest = combine_block_digests(block_digests)
+
+        video_path = _content_path(digest, file_storage.filename)
+        if os.path.exists(video_path):
+            os.remove(part_path)
+            # Reused content counts as fresh for the janitor
+            os.utime(video_path)
+        else:
+            os.replace(part_path, video_path)
+        return video_path, digest
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
@@ -0,0 +1,196 @@
+import os
+import bisect
+import logging
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VAD_FRAME_MS = int(os.getenv('VAD_FRAME_MS', '30'))
+# Speech must be this far above the estimated noise floor
+VAD_THRESHOLD_DB = float(os.getenv('VAD_THRESHOLD_DB', '10'))
+# Frames quieter than this (dBFS) are never speech, however quiet the noise floor is
+VAD_MIN_LEVEL_DB = float(os.getenv('VAD_MIN_LEVEL_DB', '-50'))
+# Pauses shorter than this are kept inside a segment
+VAD_MIN_PAUSE_SECONDS = float(os.getenv('VAD_MIN_PAUSE_SECONDS', '0.4'))
+VAD_MIN_SPEECH_SECONDS = float(os.getenv('VAD_MIN_SPEECH_SECONDS', '0.3'))
+VAD_MAX_SEGMENT_SECONDS = float(os.getenv('VAD_MAX_SEGMENT_SECONDS', '30'))
+# Pauses longer than this are cut out of the audio sent to the recognizer
+VAD_MAX_GAP_SECONDS = float(os.getenv('VAD_MAX_GAP_SECONDS', '2'))
+# Speech loudness swings between syllables; steady tones and sustained music do not
+VAD_MIN_ENERGY_STD_DB = float(os.getenv('VAD_MIN_ENERGY_STD_DB', '3'))
+
+# Frames processed per block, so hour-long inputs never need a full float copy
+BLOCK_FRAMES = 20000
+
+def frame_features(samples, sample_rate, frame_ms=VAD_FRAME_MS):
+    """Return per-frame energy (dBFS) and zero-crossing rate for mono 16-bit PCM."""
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n_frames = len(samples) // frame_len
+    energy_db = np.empty(n_frames, dtype=np.float32)
+    zcr = np.empty(n_frames, dtype=np.float32)
+
+    for start in range(0, n_frames, BLOCK_FRAMES):
+        stop = min(start + BLOCK_FRAMES, n_frames)
+        block = np.asarray(samples[start * frame_len:stop * frame_len], dtype=np.float32)
+        frames = block.reshape(-1, frame_len) / 32768.0
+        energy_db[start:stop] = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr[start:stop] = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    return energy_db, zcr, frame_len
+
+def _runs(mask):
+    """Return (start, stop) index pairs of the True runs in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+def _next_speech(runs, starts, frame):
+    """Return the first speech frame at or after ``frame``, or None."""
+    i = bisect.bisect_right(starts, frame) - 1
+    if i >= 0 and runs[i][1] > frame:
+        return frame
+    return runs[i + 1][0] if i + 1 < len(runs) else None
+
+def _speech_end_before(runs, starts, frame):
+    """Return the end of the speech before ``frame``."""
+    i = bisect.bisect_left(starts, frame) - 1
+    return min(runs[i][1], frame)
+
+def _earliest_cuts(runs, starts, max_frames):
+    """Return the earliest frame each cut may fall on, using as few segments as possible.
+
+    Counted back from the end: each segment ends where the next one's earliest cut
+    leaves off and spans at most max_frames of the remaining speech. This uses the
+    fewest segments that can cover every speech run.
+    """
+    cuts = []
+    end = runs[-1][1]
+    while end - max_frames > runs[0][0]:
+        limit = end - max_frames
+        i = bisect.bisect_right(starts, limit) - 1
+        # Inside a run the cut goes at the limit; in a pause, anywhere after the run before it
+        cut = limit if runs[i][1] > limit else runs[i][1]
+        cuts.append(cut)
+        end = _speech_end_before(runs, starts, cut)
+    return cuts[::-1]
+
+def pack_segments(runs, energy_db, speech, max_frames):
+    """Pack speech runs into as few segments of at most max_frames as possible.
+
+    The number of segments is never more than fixed windows of max_frames would
+    take. Within that, each cut falls in a pause where it can, otherwise at the
+    quietest frame, and the pauses at cuts are not sent.
+    """
+    if not runs:
+        return []
+    starts = [start for start, _ in runs]
+    # Any pause frame is a better cut than any speech frame
+    cost = np.where(speech, energy_db, energy_db - 1000)
+    segments = []
+    segment_start = runs[0][0]
+    for earliest in _earliest_cuts(runs, starts, max_frames):
+        low = max(earliest, segment_start + 1)
+        high = min(segment_start + max_frames, len(cost))
+        cut = low + int(np.argmin(cost[low:high + 1])) if high >= low else low
+        segments.append((segment_start, _speech_end_before(runs, starts, cut)))
+        segment_start = _next_speech(runs, starts, cut)
+        if segment_start is None:
+            return segments
+    segments.append((segment_start, runs[-1][1]))
+    return segments
+
+def _merge_close(runs, max_gap):
+    """Merge runs separated by at most max_gap frames."""
+    merged = []
+    for start, stop in runs:
+        if merged and start - merged[-1][1] <= max_gap:
+            merged[-1] = (merged[-1][0], stop)
+        else:
+            merged.append((start, stop))
+    return merged
+
+def pack_pieces(runs, energy_db, speech, max_frames, max_gap):
+    """Pack speech runs into segments of at most max_frames that skip long pauses.
+
+    Runs closer than max_gap frames become one piece, pause included. The pieces
+    are laid end to end one frame apart and packed with pack_segments, so a
+    segment is sent as the concatenation of its pieces and never carries a pause
+    longer than max_gap. The shortened timeline is never longer than the original,
+    so there are still no more segments than fixed windows would take.
+    Returns a list of segments, each a list of (start, stop) frame ranges.
+    """
+    pieces = _merge_close(runs, max_gap)
+    if not pieces:
+        return []
+    # Shift from each piece's original frames to its frames on the shortened timeline
+    shifts, position = [], 0
+    for start, stop in pieces:
+        shifts.append(position - start)
+        position += stop - start + 1
+
+    # The frame between two pieces is a pause, quieter than any other frame
+    joined_energy = np.concatenate([np.append(energy_db[start:stop], -1000) for start, stop in pieces])[:-1]
+    joined_speech = np.concatenate([np.append(speech[start:stop], False) for start, stop in pieces])[:-1]
+    joined_runs, i = [], 0
+    for start, stop in runs:
+        while stop > pieces[i][1]:
+            i += 1
+        joined_runs.append((start + shifts[i], stop + shifts[i]))
+
+    segments = []
+    for low, high in pack_segments(joined_runs, joined_energy, joined_speech, max_frames):
+        segments.append([
+            (max(low, start + shift) - shift, min(high, stop + shift) - shift)
+            for (start, stop), shift in zip(pieces, shifts)
+            if low < stop + shift and start + shift < high
+        ])
+    return segments
+
+def detect_speech_segments(samples, sample_rate):
+    """Find speech in mono 16-bit PCM and return the pieces to send in each recognizer call.
+
+    Frames are classified in one vectorized pass using energy above an adaptive
+    noise floor, with the zero-crossing rate keeping quiet unvoiced consonants.
+    Utterances with a flat loudness profile (tones, hum, sustained music) are
+    dropped. The rest are packed into segments of at most VAD_MAX_SEGMENT_SECONDS
+    of audio with pauses over VAD_MAX_GAP_SECONDS cut out (see pack_pieces), so
+    there are never more recognizer calls than with fixed windows of that length.
+    Returns one list of (start_seconds, end_seconds) pieces per segment.
+    """
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    energy_db, zcr, frame_len = frame_features(samples, sample_rate)
+    if not len(energy_db):
+        return []
+
+    frame_seconds = frame_len / sample_rate
+    noise_floor = float(np.percentile(energy_db, 10))
+    threshold = max(noise_floor + VAD_THRESHOLD_DB, VAD_MIN_LEVEL_DB)
+    voiced = energy_db > threshold
+    unvoiced_threshold = max(noise_floor + VAD_THRESHOLD_DB / 2, VAD_MIN_LEVEL_DB)
+    unvoiced = (energy_db > unvoiced_threshold) & (zcr > 0.25)
+    speech = voiced | unvoiced
+
+    # Bridge pauses shorter than the minimum by dilating speech frames on both sides
+    pad = int(VAD_MIN_PAUSE_SECONDS / frame_seconds / 2)
+    if pad:
+        speech = np.convolve(speech.astype(np.int8), np.ones(2 * pad + 1, dtype=np.int8), mode='same') > 0
+
+    min_frames = max(1, int(VAD_MIN_SPEECH_SECONDS / frame_seconds))
+    max_frames = max(min_frames + 1, int(VAD_MAX_SEGMENT_SECONDS / frame_seconds))
+    utterances = []
+    for start, stop in _runs(speech):
+        if stop - start < min_frames:
+            continue
+        if float(np.std(energy_db[start:stop])) < VAD_MIN_ENERGY_STD_DB:
+            continue
+        utterances.append((int(start), int(stop)))
+
+    max_gap = int(VAD_MAX_GAP_SECONDS / frame_seconds)
+    segments = pack_pieces(utterances, energy_db, speech, max_frames, max_gap)
+    return [
+        [(float(start * frame_seconds), float(stop * frame_seconds)) for start, stop in pieces]
+        for pieces in segments
+    ]
@@ -3,19 +3,51 @@ from moviepy.editor import VideoFileClip, AudioFileClip
 import subprocess
 import torch
 import sys
+import time
+import logging
+import numpy as np
+from app.utils.ffmpeg_utils import run_ffmpeg, probe_media
+from app.utils.lipsync_service import request_lipsync, LipSyncServiceUnavailable
+from app.utils import metrics
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # Add Wav2Lip directory to Python path
 wav2lip_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'Wav2Lip')
 sys.path.append(wav2lip_path)
 
-def extract_audio(video_path):
-    """Extract audio from video file."""
-    output_path = video_path.rsplit('.', 1)[0] + '.wav'
+# Video codecs that can be copied into an MP4 container without re-encoding
+MP4_COPY_CODECS = {'h264', 'hevc', 'mpeg4', 'av1', 'vp9'}
+
+def extract_audio(video_path, sample_rate=16000, output_path=None):
+    """Extract audio from video file as a mono 16-bit WAV.
+
+    Uses a single ffmpeg pass that demuxes and resamples only the audio stream,
+    falling back to MoviePy if ffmpeg is unavailable or fails. The WAV is written
+    next to the video unless ``output_path`` is given.
+    """
+    output_path = output_path or video_path.rsplit('.', 1)[0] + '.wav'
+    
+    try:
+        run_ffmpeg([
+            '-i', video_path,
+            '-map', '0:a:0',
+            '-vn',
+            '-ac', '1',
+            '-ar', str(sample_rate),
+            '-c:a', 'pcm_s16le',
+            output_path
+        ])
+        return output_path
+    except Exception as e:
+        logger.warning(f"ffmpeg audio extraction failed, falling back to MoviePy: {str(e)}")
     
     try:
         video = VideoFileClip(video_path)
         audio = video.audio
-        audio.write_audiofile(output_path, fps=16000, nbytes=2, codec='pcm_s16le')
+        audio.write_audiofile(output_path, fps=sample_rate, nbytes=2, codec='pcm_s16le')
         audio.close()
         video.close()
         return output_path
@@ -23,11 +55,44 @@ def extract_audio(video_path):
         print(f"Error extracting audio: {str(e)}")
         raise
 
-def process_video_with_lipsync(video_path, audio_path, target_language):
-    """Process video with Wav2Lip for lip-syncing."""
-    output_path = f"output_{target_language}.mp4"
+def extract_audio_array(video_path, sample_rate=16000):
+    """Extract mono 16-bit PCM from a video straight into memory, without a WAV file.
+
+    Returns a NumPy int16 array. Use ``wav_utils.mmap_wav(extract_audio(path))`` instead
+    when the audio is too large to hold in memory.
+    """
+    pcm = run_ffmpeg([
+        '-i', video_path,
+        '-map', '0:a:0',
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 's16le',
+        '-c:a', 'pcm_s16le',
+        'pipe:1'
+    ], capture_stdout=True)
+    return np.frombuffer(pcm, dtype='<i2')
+
+def process_video_with_lipsync(video_path, audio_path, target_language, output_path=None):
+    """Process video with Wav2Lip for lip-syncing.
+
+    Jobs go to the long-lived lip-sync service when it is running, which avoids
+    reloading torch and the checkpoint for every video; otherwise Wav2Lip's
+    inference script is run as a one-off subprocess.
+    """
+    if output_path is None:
+        output_path = f"output_{target_language}.mp4"
+    
+    try:
+        start = time.perf_counter()
+        request_lipsync(video_path, audio_path, output_path)
+        metrics.observe_stage('lipsync', time.perf_counter() - start)
+        return output_path
+    except LipSyncServiceUnavailable:
+        logger.info("Lip-sync service not running, starting Wav2Lip subprocess")
     
     try:
+        start = time.perf_counter()
         # Use Wav2Lip inference script
         cmd = [
             'python',
@@ -39,6 +104,8 @@ def process_video_with_lipsync(video_path, audio_path, target_language):
         ]
         
         subprocess.run(cmd, check=True)
+        logger.info(f"Lip-sync subprocess finished in {time.perf_counter() - start:.2f}s")
+        metrics.observe_stage('lipsync', time.perf_counter() - start)
         return output_path
     except subprocess.CalledProcessError as e:
         print(f"Error in lip-sync processing: {str(e)}")
@@ -47,8 +114,51 @@ def process_video_with_lipsync(video_path, audio_path, target_language):
         print(f"Error in lip-sync processing: {str(e)}")
         raise
 
-def combine_audio_video(video_path, audio_path, output_path):
-    """Combine processed video with new audio."""
+def remux_audio_video(video_path, audio_path, output_path, probe=None):
+    """Replace the audio track by copying the video stream and encoding only the new audio.
+
+    The audio is padded with silence or trimmed so it matches the video duration.
+    ``probe`` is the video's probe_media() result; the video is probed if it is not given.
+    Raises ValueError if the video stream cannot be copied into an MP4 container.
+    """
+    probe = probe or probe_media(video_path)
+    if not probe['video']:
+        raise ValueError("Input has no video stream")
+    if probe['video']['codec'] not in MP4_COPY_CODECS:
+        raise ValueError(f"Video codec {probe['video']['codec']} cannot be copied into MP4")
+
+    args = [
+        '-i', video_path,
+        '-i', audio_path,
+        '-map', '0:v:0',
+        '-map', '1:a:0',
+        '-c:v', 'copy',
+        '-c:a', 'aac',
+        '-b:a', '192k',
+        '-af', 'apad',
+        # Put the moov atom first so players can start and seek before the download ends
+        '-movflags', '+faststart'
+    ]
+    if probe['duration']:
+        args += ['-t', f"{probe['duration']:.3f}"]
+    else:
+        args += ['-shortest']
+    run_ffmpeg(args + [output_path])
+    return output_path
+
+def combine_audio_video(video_path, audio_path, output_path, probe=None):
+    """Combine processed video with new audio.
+
+    Uses a stream-copy remux when possible and only re-encodes the video with
+    MoviePy when the codec or container requires it.
+    """
+    try:
+        remux_audio_video(video_path, audio_path, output_path, probe=probe)
+        logger.info(f"Remuxed translated audio into {output_path} without re-encoding video")
+        return output_path
+    except Exception as e:
+        logger.warning(f"Stream-copy remux not possible, falling back to full re-encode: {str(e)}")
+
     try:
         # Load video
         video = VideoFileClip(video_path)
@@ -66,7 +176,8 @@ def combine_audio_video(video_path, audio_path, output_path):
             output_path,
             codec='libx264',
             audio_codec='aac',
-            fps=video.fps
+            fps=video.fps,
+            ffmpeg_params=['-movflags', '+faststart']
         )
         
         # Clean up
@@ -78,16 +189,29 @@ def combine_audio_video(video_path, audio_path, output_path):
         print(f"Error combining audio and video: {str(e)}")
         raise
 
-def create_video_with_audio(video_path, audio_path, output_path):
+def apply_faststart(path):
+    """Rewrite an MP4 in place with its moov atom at the front, without re-encoding."""
+    temp_path = path + '.faststart.mp4'
+    try:
+        run_ffmpeg(['-i', path, '-map', '0', '-c', 'copy', '-movflags', '+faststart', temp_path])
+        os.replace(temp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not apply faststart to {path}: {str(e)}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path
+
+def create_video_with_audio(video_path, audio_path, output_path, probe=None):
     """Create a new video with the translated audio."""
     try:
         # First try lip-sync processing
         try:
-            return process_video_with_lipsync(video_path, audio_path, "translated")
+            # Wav2Lip writes its own MP4, so move its moov atom to the front afterwards
+            return apply_faststart(process_video_with_lipsync(video_path, audio_path, "translated", output_path))
         except Exception as e:
             print(f"Lip-sync failed, falling back to simple audio combination: {str(e)}")
             # If lip-sync fails, fall back to simple audio combination
-            return combine_audio_video(video_path, audio_path, output_path)
+            return combine_audio_video(video_path, audio_path, output_path, probe=probe)
     except Exception as e:
         print(f"Error creating video with audio: {str(e)}")
         raise 
\ No newline at end of file
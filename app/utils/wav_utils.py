@@ -0,0 +1,73 @@
+import io
+import struct
+import wave
+import numpy as np
+
+def read_wav_payload(payload):
+    """Return (params, frames) for an in-memory WAV payload such as a LINEAR16 TTS response."""
+    if not payload.startswith(b'RIFF'):
+        raise ValueError("Audio payload is not a WAV file")
+    with wave.open(io.BytesIO(payload), 'rb') as reader:
+        params = reader.getparams()
+        frames = reader.readframes(params.nframes)
+    return params, frames
+
+def write_wav_payloads(payloads, output_path):
+    """Stream WAV payloads into a single WAV file, written once.
+
+    Payloads are consumed one at a time and their PCM frames appended directly to the
+    output, so the cost is linear in the total audio and only one payload is held in
+    memory at a time. All payloads must share the same channel count, sample width and
+    sample rate.
+    """
+    writer = None
+    try:
+        for payload in payloads:
+            params, frames = read_wav_payload(payload)
+            if writer is None:
+                writer = wave.open(output_path, 'wb')
+                writer.setnchannels(params.nchannels)
+                writer.setsampwidth(params.sampwidth)
+                writer.setframerate(params.framerate)
+                expected = (params.nchannels, params.sampwidth, params.framerate)
+            elif (params.nchannels, params.sampwidth, params.framerate) != expected:
+                raise ValueError("Audio payloads have mismatched formats and cannot be concatenated")
+            writer.writeframes(frames)
+        if writer is None:
+            raise ValueError("No audio payloads to write")
+    finally:
+        if writer is not None:
+            writer.close()
+    return output_path
+
+
+def mmap_wav(path):
+    """Memory-map the PCM data of a 16-bit WAV file as a read-only int16 array.
+
+    Multi-channel audio is returned with shape (frames, channels).
+    """
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError(f"{path} is not a WAV file")
+        channels = sampwidth = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                channels = struct.unpack('<H', fmt[2:4])[0]
+                sampwidth = struct.unpack('<H', fmt[14:16])[0] // 8
+            elif chunk_id == b'data':
+                offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), io.SEEK_CUR)
+
+    if sampwidth != 2:
+        raise ValueError(f"{path} is not 16-bit PCM")
+    frames = chunk_size // (2 * channels)
+    shape = (frames, channels) if channels > 1 else (frames,)
+    return np.memmap(path, dtype='<i2', mode='r', offset=offset, shape=shape)
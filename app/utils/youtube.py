@@ -0,0 +1,98 @@
+import os
+import copy
+import json
+import logging
+import yt_dlp
+from app.utils import metrics
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Audio is fetched first so transcription can start long before the video arrives
+YOUTUBE_AUDIO_FORMAT = os.getenv('YOUTUBE_AUDIO_FORMAT', 'bestaudio[ext=m4a]/bestaudio/best[ext=mp4]/best')
+# Capped at the height of the combined MP4 the pipeline used to download, and
+# H.264 first so the mux can copy the video stream
+YOUTUBE_MAX_HEIGHT = int(os.getenv('YOUTUBE_MAX_HEIGHT', '720'))
+YOUTUBE_VIDEO_FORMAT = os.getenv(
+    'YOUTUBE_VIDEO_FORMAT',
+    f'bestvideo[height<={YOUTUBE_MAX_HEIGHT}][vcodec^=avc1]/bestvideo[height<={YOUTUBE_MAX_HEIGHT}][ext=mp4]'
+    f'/best[ext=mp4]/best'
+)
+
+INFO_FILENAME = 'info.json'
+
+def ydl_options(**overrides):
+    options = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': False,
+        'logger': logger,
+        'socket_timeout': 30,  # Timeout in seconds
+        'retries': 3,  # Number of retries
+        'fragment_retries': 3,
+        'skip_unavailable_fragments': True
+    }
+    options.update(overrides)
+    return options
+
+def _download_error(e):
+    error_msg = str(e).lower()
+    if "copyright" in error_msg:
+        return Exception("Cannot process copyrighted content")
+    elif "private" in error_msg:
+        return Exception("Cannot process private videos")
+    elif "not available" in error_msg:
+        return Exception("This video is not available")
+    return Exception(f"Failed to download video: {str(e)}")
+
+def fetch_info(youtube_url, **options):
+    """Fetch a video's metadata, including every available format, with one request.
+
+    ``options`` override ydl_options(), e.g. a shorter ``socket_timeout``.
+    """
+    if not youtube_url or not isinstance(youtube_url, str):
+        raise ValueError("Invalid YouTube URL")
+
+    logger.info(f"Fetching video info for URL: {youtube_url}")
+    with yt_dlp.YoutubeDL(ydl_options(**options)) as ydl:
+        try:
+            info = ydl.extract_info(youtube_url, download=False)
+        except yt_dlp.utils.DownloadError as e:
+            metrics.count_api_call('youtube', error=True)
+            raise _download_error(e)
+        metrics.count_api_call('youtube')
+        if not info:
+            raise Exception("This video is not available")
+        logger.info(f"Successfully found video: {info.get('title', 'Unknown title')}")
+        return ydl.sanitize_info(info)
+
+def save_info(info, output_dir):
+    """Write fetched metadata next to the downloads so any worker can reuse it."""
+    path = os.path.join(output_dir, INFO_FILENAME)
+    with open(path, 'w') as f:
+        json.dump(info, f)
+    return path
+
+def load_info(path):
+    with open(path) as f:
+        return json.load(f)
+
+def download_format(info, format_selector, output_dir, name):
+    """Download one format of an already fetched video, without fetching its metadata again.
+
+    Returns the path of the downloaded file, ``<output_dir>/<name>.<ext>``.
+    """
+    options = ydl_options(format=format_selector, outtmpl=os.path.join(output_dir, f'{name}.%(ext)s'))
+    with yt_dlp.YoutubeDL(options) as ydl:
+        try:
+            result = ydl.process_ie_result(copy.deepcopy(info), download=True)
+        except yt_dlp.utils.DownloadError as e:
+            raise _download_error(e)
+
+        downloads = result.get('requested_downloads') or []
+        path = downloads[0].get('filepath') if downloads else ydl.prepare_filename(result)
+    if not path or not os.path.exists(path):
+        raise Exception("Video download failed - file not found")
+    logger.info(f"Downloaded {name} ({result.get('format_id')}) to: {path}")
+    return path
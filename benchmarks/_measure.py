@@ -0,0 +1,73 @@
+"""Run a benchmarked function in a forked child process and report what it used.
+
+Shared by the benchmark scripts. Resource counters of a process only ever grow and
+RUSAGE_CHILDREN keeps the largest child seen so far, so every measurement gets a
+fresh process of its own: wall time, CPU time (including ffmpeg and other
+children) and peak RSS belong to that one call.
+"""
+import contextlib
+import multiprocessing
+import resource
+import sys
+import time
+import traceback
+
+def rss_kb():
+    """Current RSS of this process from /proc, or None where it is not available."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def cpu_seconds():
+    """CPU time of this process and the children it has waited for."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def _child(conn, func, args):
+    start_rss = rss_kb()
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    try:
+        # Keep stdout for the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            value = func(*args)
+        error = None
+    except Exception:
+        value = None
+        error = traceback.format_exc(limit=3)
+    wall = time.perf_counter() - start
+    stats = {
+        'wall_seconds': round(wall, 3),
+        'cpu_seconds': round(cpu_seconds() - cpu_start, 3),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'rss_growth_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss if start_rss else None,
+        'children_peak_rss_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    }
+    if error:
+        stats['error'] = error
+    conn.send((value, stats))
+    conn.close()
+
+def measure(func, *args):
+    """Run ``func(*args)`` in a forked child and return (its result, its resource usage).
+
+    The usage has 'error' set, and the result is None, if the call raised or the
+    child died.
+    """
+    context = multiprocessing.get_context('fork')
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(child_conn, func, args))
+    process.start()
+    child_conn.close()
+    try:
+        value, stats = parent_conn.recv()
+    except EOFError:
+        value, stats = None, {'error': f'Benchmark process died with exit code {process.exitcode}'}
+    process.join()
+    return value, stats
@@ -0,0 +1,63 @@
+"""Benchmark audio extraction: single-pass ffmpeg vs. MoviePy VideoFileClip.
+
+Run it against real uploads (the interesting case is 1 GB+ files):
+    python benchmarks/bench_extract_audio.py path/to/video.mp4 [more videos...]
+
+Each method writes a 16 kHz mono WAV into a temporary directory. Each runs in its
+own forked child process (see _measure.py), so the report gives that method's wall
+time, CPU time including ffmpeg, and peak RSS of the process and of the ffmpeg it
+started (ffmpeg runs as a child process for both methods).
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _measure import measure
+from app.utils.ffmpeg_utils import run_ffmpeg
+
+def ffmpeg_extract(video_path, output_path):
+    run_ffmpeg([
+        '-i', video_path, '-map', '0:a:0', '-vn', '-ac', '1', '-ar', '16000',
+        '-c:a', 'pcm_s16le', output_path
+    ])
+
+def moviepy_extract(video_path, output_path):
+    from moviepy.editor import VideoFileClip
+    video = VideoFileClip(video_path)
+    video.audio.write_audiofile(output_path, fps=16000, nbytes=2, codec='pcm_s16le', logger=None)
+    video.close()
+
+def run_method(func, video_path, work_dir):
+    output_path = os.path.join(work_dir, f'{func.__name__}.wav')
+    _, stats = measure(func, video_path, output_path)
+    if os.path.exists(output_path):
+        stats['output_bytes'] = os.path.getsize(output_path)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('videos', nargs='+')
+    parser.add_argument('--skip-moviepy', action='store_true')
+    args = parser.parse_args()
+
+    for video_path in args.videos:
+        work_dir = tempfile.mkdtemp()
+        try:
+            row = {
+                'video': video_path,
+                'input_bytes': os.path.getsize(video_path),
+                'ffmpeg': run_method(ffmpeg_extract, video_path, work_dir)
+            }
+            if not args.skip_moviepy:
+                row['moviepy'] = run_method(moviepy_extract, video_path, work_dir)
+            print(json.dumps(row))
+        finally:
+            shutil.rmtree(work_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark concatenation of synthesized speech chunks.
+
+Compares the streaming WAV writer used by generate_speech against the previous
+approach (one temp file per chunk, pydub ``combined += segment``, export again).
+Payloads are synthetic LINEAR16 WAVs, so no network access is needed. Each approach
+runs in its own forked child process (see _measure.py); besides its wall time, CPU
+time and peak RSS, the report gives the peak of Python allocations.
+
+Usage:
+    python benchmarks/bench_pcm_concat.py --chunks 100 200 400 --chunk-seconds 5
+"""
+import argparse
+import io
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import tracemalloc
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _measure import measure
+from app.utils.wav_utils import write_wav_payloads
+
+SAMPLE_RATE = 24000
+
+def make_payload(seconds, frequency=220):
+    """Build a LINEAR16 mono WAV payload like a Google TTS response."""
+    frames = bytearray()
+    period = [int(8000 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)) for i in range(SAMPLE_RATE // frequency)]
+    samples = (period * (int(seconds * SAMPLE_RATE) // len(period) + 1))[:int(seconds * SAMPLE_RATE)]
+    frames.extend(struct.pack(f'<{len(samples)}h', *samples))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(SAMPLE_RATE)
+        writer.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+def streaming_concat(payloads, output_path):
+    write_wav_payloads(iter(payloads), output_path)
+
+def pydub_concat(payloads, output_path):
+    from pydub import AudioSegment
+    paths = []
+    for payload in payloads:
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+            temp_file.write(payload)
+            paths.append(temp_file.name)
+    combined = AudioSegment.from_wav(paths[0])
+    for path in paths[1:]:
+        combined += AudioSegment.from_wav(path)
+    combined.export(output_path, format='wav')
+    for path in paths:
+        os.remove(path)
+
+def traced(func, payloads, output_path):
+    """Run one approach, returning its peak Python allocation and output size."""
+    tracemalloc.start()
+    func(payloads, output_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'peak_bytes': peak, 'output_bytes': os.path.getsize(output_path)}
+
+def run_approach(func, payloads):
+    fd, output_path = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        value, stats = measure(traced, func, payloads, output_path)
+        stats.update(value or {})
+        return stats
+    finally:
+        os.remove(output_path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chunks', type=int, nargs='+', default=[100, 200, 400])
+    parser.add_argument('--chunk-seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    payload = make_payload(args.chunk_seconds)
+    report = []
+    for count in args.chunks:
+        payloads = [payload] * count
+        row = {
+            'chunks': count,
+            'streaming': run_approach(streaming_concat, payloads),
+            # Reports an error where pydub is not installed
+            'pydub': run_approach(pydub_concat, payloads)
+        }
+        report.append(row)
+        print(json.dumps(row))
+
+    return report
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Benchmark each pipeline stage offline on synthetic videos.
+
+Generates test videos with ffmpeg (a moving test pattern plus speech-like noise
+with pauses) for every combination of duration, resolution and codec, then times
+extract_audio, transcribe_audio, translate_text, generate_speech and
+combine_audio_video on each. Recognition, translation and synthesis use the stub
+backends by default, so no network access or credentials are needed:
+    python benchmarks/bench_pipeline.py --durations 10 60 600 --resolutions 360p 720p --codecs h264 vp9
+
+Each stage runs in a forked child process (see _measure.py), so the report gives
+its own wall time, CPU time (including ffmpeg children) and peak RSS. Fixtures are kept in
+--fixtures-dir and reused; an hour of 1080p takes a while to generate the first time.
+
+To track regressions, save a baseline on the reference machine and compare later runs:
+    python benchmarks/bench_pipeline.py --save-baseline benchmarks/baselines/pipeline.json
+    python benchmarks/bench_pipeline.py --baseline benchmarks/baselines/pipeline.json
+The comparison exits with status 1 if any stage got slower or bigger than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _measure import measure
+from app.utils.ffmpeg_utils import run_ffmpeg
+from app.utils.video_processor import extract_audio, combine_audio_video
+from app.utils.audio_processor import transcribe_audio, translate_text, generate_speech
+
+RESOLUTIONS = {
+    '360p': (640, 360),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080)
+}
+
+# (container, video encoder arguments, audio encoder arguments); fastest presets,
+# since only the pipeline is being measured, not the fixture encode
+CODECS = {
+    'h264': ('mp4', ['-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p'], ['-c:a', 'aac']),
+    'hevc': ('mp4', ['-c:v', 'libx265', '-preset', 'ultrafast', '-tag:v', 'hvc1', '-pix_fmt', 'yuv420p'], ['-c:a', 'aac']),
+    'vp9': ('webm', ['-c:v', 'libvpx-vp9', '-deadline', 'realtime', '-cpu-used', '8', '-b:v', '1M'], ['-c:a', 'libopus']),
+    'mpeg4': ('mp4', ['-c:v', 'mpeg4', '-q:v', '5'], ['-c:a', 'aac'])
+}
+
+STAGES = ('extract_audio', 'transcribe_audio', 'translate_text', 'generate_speech', 'combine_audio_video')
+
+# Differences smaller than these are noise, whatever the ratio
+NOISE_FLOOR = {'wall_seconds': 0.05, 'cpu_seconds': 0.05, 'peak_rss_kb': 4096}
+
+def make_fixture(duration, resolution, codec, fixtures_dir, fps):
+    """Generate (or reuse) a synthetic video and return its path."""
+    container, video_args, audio_args = CODECS[codec]
+    width, height = RESOLUTIONS[resolution]
+    path = os.path.join(fixtures_dir, f'{duration}s-{resolution}-{codec}-{fps}fps.{container}')
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    temp_path = path + '.part.' + container
+    run_ffmpeg([
+        '-f', 'lavfi', '-i', f'testsrc2=size={width}x{height}:rate={fps}:duration={duration}',
+        '-f', 'lavfi', '-i', f'anoisesrc=color=pink:amplitude=0.3:sample_rate=44100:duration={duration}',
+        # 4 Hz syllables in 3 s phrases with 1.5 s pauses, so VAD finds speech and gaps
+        '-af', "volume='if(lt(mod(t,4.5),3),0.6+0.4*sin(2*PI*4*t),0.01)':eval=frame",
+        *video_args, *audio_args,
+        '-shortest',
+        temp_path
+    ])
+    os.replace(temp_path, path)
+    return path
+
+def bench_fixture(video_path, work_dir, target_language, backend_names):
+    """Time every stage on one video; a failed stage skips the stages that need its output."""
+    stages = {}
+    audio_path = os.path.join(work_dir, 'audio.wav')
+    speech_path = os.path.join(work_dir, 'speech.wav')
+    output_path = os.path.join(work_dir, 'output.mp4')
+
+    steps = [
+        ('extract_audio', extract_audio, lambda _: (video_path, 16000, audio_path)),
+        ('transcribe_audio', transcribe_audio, lambda _: (audio_path, backend_names['asr'])),
+        ('translate_text', translate_text, lambda transcript: (transcript, target_language, None, backend_names['mt'])),
+        ('generate_speech', generate_speech, lambda text: (text, target_language, speech_path, backend_names['tts'])),
+        ('combine_audio_video', combine_audio_video, lambda _: (video_path, speech_path, output_path))
+    ]
+    value = None
+    for name, func, make_args in steps:
+        value, stats = measure(func, *make_args(value))
+        stages[name] = stats
+        if 'error' in stats:
+            break
+    for path in (audio_path, speech_path, output_path):
+        if os.path.exists(path):
+            stages.setdefault('output_bytes', {})[os.path.basename(path)] = os.path.getsize(path)
+    return stages
+
+def compare(results, baseline, tolerance):
+    """Compare stage measurements with a baseline report; returns the per-metric rows."""
+    previous = {
+        (row['fixture'], stage): stats
+        for row in baseline['results'] for stage, stats in row['stages'].items() if stage in STAGES
+    }
+    rows = []
+    for row in results:
+        for stage in STAGES:
+            current = row['stages'].get(stage)
+            before = previous.get((row['fixture'], stage))
+            if not current or not before or 'error' in current or 'error' in before:
+                continue
+            for metric, floor in NOISE_FLOOR.items():
+                if not before.get(metric) or current.get(metric) is None:
+                    continue
+                ratio = current[metric] / before[metric]
+                rows.append({
+                    'fixture': row['fixture'],
+                    'stage': stage,
+                    'metric': metric,
+                    'baseline': before[metric],
+                    'current': current[metric],
+                    'ratio': round(ratio, 3),
+                    'regression': ratio > 1 + tolerance and current[metric] - before[metric] > floor
+                })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--durations', nargs='+', type=int, default=[10, 60], help='seconds, e.g. 10 60 600 3600')
+    parser.add_argument('--resolutions', nargs='+', choices=sorted(RESOLUTIONS), default=['720p'])
+    parser.add_argument('--codecs', nargs='+', choices=sorted(CODECS), default=['h264'])
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--fixtures-dir', default=os.path.join(tempfile.gettempdir(), 'vlt-bench-fixtures'))
+    parser.add_argument('--target-language', default='es')
+    parser.add_argument('--asr', default='stub', help='ASR backend')
+    parser.add_argument('--mt', default='stub', help='MT backend')
+    parser.add_argument('--tts', default='stub', help='TTS backend')
+    parser.add_argument('--output', help='also write the report to this file')
+    parser.add_argument('--baseline', help='report to compare against')
+    parser.add_argument('--save-baseline', help='write this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown or growth, 0.2 = 20%%')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    backend_names = {'asr': args.asr, 'mt': args.mt, 'tts': args.tts}
+    results = []
+    for duration in args.durations:
+        for resolution in args.resolutions:
+            for codec in args.codecs:
+                fixture = f'{duration}s-{resolution}-{codec}'
+                try:
+                    start = time.perf_counter()
+                    video_path = make_fixture(duration, resolution, codec, args.fixtures_dir, args.fps)
+                    print(f'{fixture}: fixture ready in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+                except Exception as e:
+                    # e.g. an ffmpeg build without this encoder
+                    results.append({'fixture': fixture, 'error': f'Could not generate fixture: {str(e)}', 'stages': {}})
+                    continue
+
+                work_dir = tempfile.mkdtemp(prefix='vlt-bench-')
+                try:
+                    results.append({
+                        'fixture': fixture,
+                        'duration_seconds': duration,
+                        'resolution': resolution,
+                        'codec': codec,
+                        'input_bytes': os.path.getsize(video_path),
+                        'stages': bench_fixture(video_path, work_dir, args.target_language, backend_names)
+                    })
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'fps': args.fps,
+            'backends': backend_names
+        },
+        'results': results
+    }
+    regressions = []
+    if baseline:
+        report['comparison'] = compare(results, baseline, args.tolerance)
+        regressions = [row for row in report['comparison'] if row['regression']]
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'environment': report['environment'], 'results': results}, f, indent=2)
+
+    for row in regressions:
+        print(
+            f"REGRESSION {row['fixture']} {row['stage']} {row['metric']}: "
+            f"{row['baseline']} -> {row['current']} (x{row['ratio']})",
+            file=sys.stderr
+        )
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
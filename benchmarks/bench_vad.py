@@ -0,0 +1,99 @@
+"""Report recognition API calls and audio seconds saved by voice-activity detection.
+
+Compares VAD segmentation against the previous fixed 30 s windows on a corpus of
+16-bit WAV files (for example the WAVs produced by extract_audio):
+    python benchmarks/bench_vad.py corpus/*.wav
+
+Without arguments a small synthetic corpus is generated: speech-like bursts with
+pauses, long silences, a steady tone and pure silence.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.vad import detect_speech_segments
+from app.utils.wav_utils import mmap_wav
+
+SAMPLE_RATE = 16000
+
+def speech_like(seconds, rng):
+    """Noise shaped into 4 Hz syllables with short pauses between words, over a noise floor."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    words = (np.sin(2 * np.pi * 0.7 * t) > -0.6).astype(np.float32)
+    return rng.normal(0, 0.3, len(t)) * envelope * words + silence(seconds, rng)[:len(t)]
+
+def silence(seconds, rng, level=0.002):
+    return rng.normal(0, level, int(seconds * SAMPLE_RATE))
+
+def tone(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return 0.3 * np.sin(2 * np.pi * 440 * t)
+
+def synthetic_corpus():
+    rng = np.random.default_rng(0)
+    return {
+        'lecture_with_pauses': np.concatenate([
+            speech_like(40, rng), silence(15, rng), speech_like(70, rng), silence(30, rng), speech_like(20, rng)
+        ]),
+        'intro_music_then_speech': np.concatenate([tone(45), silence(5, rng), speech_like(60, rng)]),
+        'silent': silence(120, rng),
+        'continuous_speech': speech_like(180, rng)
+    }
+
+def to_int16(signal):
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+def report(name, samples):
+    duration = len(samples) / SAMPLE_RATE
+    start = time.perf_counter()
+    segments = detect_speech_segments(samples, SAMPLE_RATE)
+    elapsed = time.perf_counter() - start
+    speech_seconds = sum(end - begin for pieces in segments for begin, end in pieces)
+    fixed_calls = math.ceil(duration / 30)
+    return {
+        'input': name,
+        'duration_seconds': round(duration, 1),
+        'fixed_window_calls': fixed_calls,
+        'vad_calls': len(segments),
+        'api_calls_saved': fixed_calls - len(segments),
+        'seconds_sent': round(speech_seconds, 1),
+        'seconds_saved': round(duration - speech_seconds, 1),
+        'vad_seconds': round(elapsed, 4),
+        'minimal_speech': not segments
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('wavs', nargs='*')
+    args = parser.parse_args()
+
+    rows = []
+    if args.wavs:
+        for path in args.wavs:
+            with wave.open(path, 'rb') as reader:
+                if reader.getframerate() != SAMPLE_RATE:
+                    print(f"Skipping {path}: expected {SAMPLE_RATE} Hz", file=sys.stderr)
+                    continue
+            rows.append(report(path, mmap_wav(path)))
+    else:
+        rows = [report(name, to_int16(signal)) for name, signal in synthetic_corpus().items()]
+
+    for row in rows:
+        print(json.dumps(row))
+    totals = {
+        'api_calls_saved': sum(row['api_calls_saved'] for row in rows),
+        'seconds_saved': round(sum(row['seconds_saved'] for row in rows), 1)
+    }
+    print(json.dumps({'total': totals}))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark YouTube ingestion: audio-first parallel download vs. the single combined MP4.
+
+Needs network access; the interesting case is long videos:
+    python benchmarks/bench_youtube_ingest.py https://www.youtube.com/watch?v=... [more URLs...]
+
+The combined path is the previous pipeline: extract_info twice, download
+best[ext=mp4], then extract audio. The parallel path fetches metadata once, then
+downloads the audio stream and extracts it while the video stream downloads.
+``audio_ready_seconds`` is when transcription can start; ``total_seconds`` is when
+both audio and video are on disk, i.e. when muxing could start.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp
+from app.utils import youtube
+from app.utils.video_processor import extract_audio
+
+def combined_ingest(url, work_dir):
+    start = time.perf_counter()
+    options = youtube.ydl_options(format='best[ext=mp4]', outtmpl=os.path.join(work_dir, '%(title)s.%(ext)s'))
+    with yt_dlp.YoutubeDL(options) as ydl:
+        ydl.extract_info(url, download=False)
+        info = ydl.extract_info(url, download=True)
+        video_path = ydl.prepare_filename(info)
+    extract_audio(video_path)
+    elapsed = round(time.perf_counter() - start, 3)
+    return {
+        'audio_ready_seconds': elapsed,
+        'total_seconds': elapsed,
+        'downloaded_bytes': os.path.getsize(video_path)
+    }
+
+def parallel_ingest(url, work_dir):
+    start = time.perf_counter()
+    info = youtube.fetch_info(url)
+    info_seconds = round(time.perf_counter() - start, 3)
+
+    def audio_branch():
+        path = youtube.download_format(info, youtube.YOUTUBE_AUDIO_FORMAT, work_dir, 'audio')
+        extract_audio(path)
+        return path, round(time.perf_counter() - start, 3)
+
+    def video_branch():
+        return youtube.download_format(info, youtube.YOUTUBE_VIDEO_FORMAT, work_dir, 'video')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        audio_future = executor.submit(audio_branch)
+        video_future = executor.submit(video_branch)
+        audio_path, audio_ready = audio_future.result()
+        video_path = video_future.result()
+    return {
+        'info_seconds': info_seconds,
+        'audio_ready_seconds': audio_ready,
+        'total_seconds': round(time.perf_counter() - start, 3),
+        'downloaded_bytes': os.path.getsize(audio_path) + os.path.getsize(video_path)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('urls', nargs='+')
+    args = parser.parse_args()
+
+    for url in args.urls:
+        report = {'url': url}
+        for name, func in (('combined', combined_ingest), ('parallel', parallel_ingest)):
+            work_dir = tempfile.mkdtemp()
+            try:
+                report[name] = func(url, work_dir)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        report['audio_ready_speedup'] = round(
+            report['combined']['audio_ready_seconds'] / report['parallel']['audio_ready_seconds'], 2
+        )
+        print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
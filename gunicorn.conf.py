@@ -0,0 +1,22 @@
+"""Gunicorn settings for the web tier, picked up automatically from this directory:
+    gunicorn app:app
+
+``app:app`` is the application of the ``app`` package, which serves the UI and
+every endpoint; app.py only runs it for local development.
+
+Every open progress stream (/api/events) and status long-poll (/api/status?wait=)
+holds its connection for as long as the job runs. A sync worker serves one
+connection at a time, so gevent workers are the default; each serves up to
+GUNICORN_WORKER_CONNECTIONS at once, all sharing one Redis subscription. Without gevent, GUNICORN_WORKER_CLASS=gthread
+gives each worker GUNICORN_THREADS threads instead.
+"""
+import os
+import multiprocessing
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+threads = int(os.getenv('GUNICORN_THREADS', '100'))
+# Uploads can take a while on slow links; streams send a heartbeat well within this
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
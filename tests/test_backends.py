@@ -0,0 +1,62 @@
+import io
+import wave
+
+import pytest
+import speech_recognition as sr
+
+from app.utils import backends
+from app.utils.backends import stub
+from app.utils.wav_utils import write_wav_payloads, mmap_wav
+
+@pytest.fixture(autouse=True)
+def google_defaults(monkeypatch):
+    for kind in backends.KINDS:
+        monkeypatch.setitem(backends.DEFAULT_BACKENDS, kind, 'google')
+
+def test_resolve_fills_in_the_defaults():
+    assert backends.resolve() == {'asr': 'google', 'mt': 'google', 'tts': 'google'}
+    assert backends.resolve({'mt': 'stub', 'asr': None, 'tts': ''}) == {'asr': 'google', 'mt': 'stub', 'tts': 'google'}
+
+@pytest.mark.parametrize('selection', [{'ocr': 'stub'}, {'asr': 'nonexistent'}, {'tts': 'Stub'}])
+def test_resolve_rejects_unknown_kinds_and_names(selection):
+    with pytest.raises(ValueError):
+        backends.resolve(selection)
+
+def test_google_results_keep_their_cache_keys():
+    assert backends.cache_options(backends.resolve()) == {}
+    selection = backends.resolve({'asr': 'local'})
+    assert backends.cache_options(selection) == {'backends': selection}
+
+def test_get_backend_returns_one_shared_instance():
+    recognizer = backends.get_backend('asr', 'stub')
+    assert isinstance(recognizer, stub.StubSpeechRecognizer)
+    assert backends.get_backend('asr', 'stub') is recognizer
+    assert backends.get_backend('mt').name == 'google'
+    with pytest.raises(ValueError):
+        backends.get_backend('tts', 'nonexistent')
+
+def test_stub_recognizer_describes_each_chunk():
+    chunks = [(0.0, sr.AudioData(b'\x00\x00' * 16000, 16000, 2)), (12.5, sr.AudioData(b'\x00\x00' * 8000, 16000, 2))]
+    assert backends.get_backend('asr', 'stub').transcribe(chunks) == [
+        'Speech at 0.00 seconds lasting 1.00 seconds.',
+        'Speech at 12.50 seconds lasting 0.50 seconds.'
+    ]
+
+def test_stub_translator_tags_the_language():
+    assert backends.get_backend('mt', 'stub').translate(['Hello.', 'Bye.'], 'es') == ['[es] Hello.', '[es] Bye.']
+
+def test_stub_synthesizer_is_deterministic_and_follows_the_text_length(tmp_path):
+    synthesizer = backends.get_backend('tts', 'stub')
+    payloads = synthesizer.synthesize(['short', 'a much longer sentence'], 'es')
+
+    assert synthesizer.synthesize(['short'], 'es') == payloads[:1]
+    lengths = []
+    for payload in payloads:
+        with wave.open(io.BytesIO(payload), 'rb') as reader:
+            assert reader.getframerate() == stub.STUB_TTS_SAMPLE_RATE
+            lengths.append(reader.getnframes())
+    assert lengths[0] < lengths[1]
+    # Payloads of one call can be joined into a single WAV
+    output_path = str(tmp_path / 'speech.wav')
+    write_wav_payloads(payloads, output_path)
+    assert len(mmap_wav(output_path)) == sum(lengths)
@@ -0,0 +1,52 @@
+import itertools
+
+import pytest
+
+from app.utils import cache_store
+from app.utils.cache_store import LRUStore
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_store, 'CACHE_DIR', str(tmp_path))
+    # Every access gets its own timestamp, so recency is unambiguous
+    clock = itertools.count(1000)
+    monkeypatch.setattr(cache_store.time, 'time', lambda: float(next(clock)))
+
+def test_least_recently_used_entry_is_evicted_over_max_entries():
+    evicted = []
+    store = LRUStore('entries', max_entries=2, on_evict=lambda key, value: evicted.append(key))
+    store.put('a', '1')
+    store.put('b', '2')
+    assert store.get('a') == '1'
+    store.put('c', '3')
+
+    assert evicted == ['b']
+    assert store.get_many(['a', 'b', 'c']) == {'a': '1', 'c': '3'}
+    assert store.stats()['evictions'] == 1
+
+def test_entries_are_evicted_until_within_max_bytes():
+    store = LRUStore('bytes', max_bytes=100)
+    store.put_many([('a', 'x', 40), ('b', 'y', 40)])
+    store.put('c', 'z', 50)
+
+    assert store.get_many(['a', 'b', 'c']) == {'b': 'y', 'c': 'z'}
+    assert store.stats()['bytes'] == 90
+
+def test_expired_entries_are_not_returned_or_kept():
+    store = LRUStore('ttl', ttl=5)
+    store.put('a', '1')
+    for _ in range(10):
+        store.get('missing')
+    assert store.get('a') is None
+    store.put('b', '2')
+    assert store.stats()['entries'] == 1
+
+def test_failing_eviction_callback_does_not_break_the_store():
+    def on_evict(key, value):
+        raise OSError('already gone')
+
+    store = LRUStore('callback', max_entries=1, on_evict=on_evict)
+    store.put('a', '1')
+    store.put('b', '2')
+    assert store.get('b') == '2'
+    assert store.stats()['entries'] == 1
@@ -0,0 +1,71 @@
+import wave
+
+import pytest
+
+from app.utils import hls
+
+def write_speech(path, seconds, sample_rate=16000):
+    with wave.open(str(path), 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        writer.writeframes(b'\x00\x00' * int(seconds * sample_rate))
+    return str(path)
+
+def test_windows_are_not_cut_inside_speech():
+    windows = hls.plan_windows(20, [(4.5, 9.0), (11.0, 12.5)], segment_seconds=6)
+    assert windows == [(0.0, 9.0), (9.0, 15.0), (15.0, 20)]
+
+def test_speech_running_past_the_end_is_kept_in_the_last_window():
+    assert hls.plan_windows(10, [(5.0, 12.0)], segment_seconds=6) == [(0.0, 10)]
+
+def test_overflowing_speech_is_carried_into_the_next_segment(tmp_path):
+    first = write_speech(tmp_path / 'first.wav', 8)
+    second = write_speech(tmp_path / 'second.wav', 2)
+    placed = []
+
+    hls.place_speech(placed, first, 1.0)
+    assert hls.segment_speech(placed, 0.0, 6.0) == [(first, 1.0)]
+    # The next window's speech waits for the first to finish at 9 s
+    hls.place_speech(placed, second, 6.0)
+    assert placed[1] == (second, 9.0, 11.0)
+    assert hls.segment_speech(placed, 6.0, 12.0) == [(first, -5.0), (second, 3.0)]
+    assert hls.segment_speech(placed, 12.0, 18.0) == []
+
+def test_mux_segment_plays_the_rest_of_earlier_speech_first(tmp_path, monkeypatch):
+    first = write_speech(tmp_path / 'first.wav', 8)
+    second = write_speech(tmp_path / 'second.wav', 2)
+    calls = []
+    monkeypatch.setattr(hls, 'run_ffmpeg', calls.append)
+
+    hls.mux_segment('video.mp4', 6.0, 6.0, 'segment.ts', speech=[(first, -5.0), (second, 3.0)])
+
+    [args] = calls
+    assert args[args.index('-ss') + 1] == '6.000'
+    assert [args[i + 1] for i, arg in enumerate(args) if arg == '-i'] == ['video.mp4', first, second]
+    # 3 s of the first speech are left, then 0 s of silence before the second at 3 s
+    assert args[args.index('-filter_complex') + 1] == (
+        '[1:a]atrim=start=5.000,asetpts=PTS-STARTPTS,adelay=0:all=1[s1];'
+        '[2:a]adelay=0:all=1[s2];'
+        '[s1][s2]concat=n=2:v=0:a=1,apad[speech]'
+    )
+    assert args[args.index('-output_ts_offset') + 1] == '6.000'
+
+@pytest.mark.parametrize('position, delay', [(1.5, 1500), (0.0, 0)])
+def test_speech_starts_at_its_position(tmp_path, monkeypatch, position, delay):
+    speech = write_speech(tmp_path / 'speech.wav', 2)
+    calls = []
+    monkeypatch.setattr(hls, 'run_ffmpeg', calls.append)
+
+    hls.mux_segment('video.mp4', 0.0, 6.0, 'segment.ts', speech=[(speech, position)])
+
+    assert calls[0][calls[0].index('-filter_complex') + 1] == (
+        f'[1:a]adelay={delay}:all=1[s1];[s1]concat=n=1:v=0:a=1,apad[speech]'
+    )
+
+def test_segment_without_speech_is_silent(monkeypatch):
+    calls = []
+    monkeypatch.setattr(hls, 'run_ffmpeg', calls.append)
+    hls.mux_segment('video.mp4', 0.0, 6.0, 'segment.ts')
+    assert 'anullsrc=r=44100:cl=stereo' in calls[0]
+    assert '-filter_complex' not in calls[0]
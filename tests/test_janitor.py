@@ -0,0 +1,60 @@
+import os
+import socket
+import tempfile
+import time
+from types import SimpleNamespace
+
+from app.utils import janitor
+
+JOB_ID = '0b6c3d4e-8a1f-4f7e-9c2d-5e6f7a8b9c0d'
+
+class FakeCelery:
+    """Answers AsyncResult(task_id).state from a dict; unknown ids are PENDING."""
+
+    def __init__(self, states=None, error=None):
+        self.states = states or {}
+        self.error = error
+
+    def AsyncResult(self, task_id):
+        if self.error:
+            raise self.error
+        return SimpleNamespace(state=self.states.get(task_id, 'PENDING'))
+
+def test_output_without_a_result_is_not_referenced():
+    assert not janitor.is_referenced(FakeCelery(), f'outputs/{JOB_ID}.mp4')
+
+def test_output_of_a_stored_result_is_referenced():
+    assert janitor.is_referenced(FakeCelery({JOB_ID: 'SUCCESS'}), f'outputs/{JOB_ID}.mp4')
+
+def test_language_output_is_referenced_by_its_job():
+    celery_app = FakeCelery({JOB_ID: 'SUCCESS'})
+    assert janitor.is_referenced(celery_app, f'outputs/{JOB_ID}-es.mp4')
+    assert not janitor.is_referenced(FakeCelery(), f'outputs/{JOB_ID}-es.mp4')
+
+def test_language_output_is_referenced_by_its_own_id():
+    assert janitor.is_referenced(FakeCelery({f'{JOB_ID}-es': 'SUCCESS'}), f'outputs/{JOB_ID}-es.mp4')
+
+def test_output_is_kept_when_results_cannot_be_checked():
+    assert janitor.is_referenced(FakeCelery(error=ConnectionError('redis down')), f'outputs/{JOB_ID}.mp4')
+
+def test_old_temp_files_are_swept_but_sockets_are_kept(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    old = time.time() - janitor.TEMP_TTL - 60
+    stale_file = tmp_path / f'{janitor.TEMP_PREFIX}speech.mp3'
+    stale_file.write_bytes(b'abcd')
+    stale_dir = tmp_path / f'{janitor.TEMP_PREFIX}frames'
+    stale_dir.mkdir()
+    fresh_file = tmp_path / f'{janitor.TEMP_PREFIX}audio.wav'
+    fresh_file.write_bytes(b'abcd')
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(str(tmp_path / f'{janitor.TEMP_PREFIX}service.sock'))
+    for path in (stale_file, stale_dir, tmp_path / f'{janitor.TEMP_PREFIX}service.sock'):
+        os.utime(path, (old, old))
+
+    try:
+        assert janitor.sweep_temp_files() == (4, 2)
+    finally:
+        listener.close()
+
+    assert sorted(os.listdir(tmp_path)) == [f'{janitor.TEMP_PREFIX}audio.wav', f'{janitor.TEMP_PREFIX}service.sock']
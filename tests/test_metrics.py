@@ -0,0 +1,23 @@
+import redis
+
+from app.utils import metrics
+
+class UnreachableRedis:
+    """Fails every command the way a Redis client does when the server is down."""
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            raise redis.ConnectionError('Connection refused')
+        return command
+
+def test_local_metrics_are_rendered_when_redis_is_down(monkeypatch):
+    monkeypatch.setattr(metrics, '_redis', UnreachableRedis())
+    monkeypatch.setattr(metrics, 'cache_stats', lambda: {'tts': {'hits': 3, 'misses': 1, 'bytes': 2048}})
+
+    lines = metrics.render_metrics(queue_depth={'io': 4}).splitlines()
+
+    assert 'metrics_redis_up 0' in lines
+    assert 'celery_queue_depth{queue="io"} 4' in lines
+    assert 'cache_lookups_total{cache="tts",outcome="hits"} 3' in lines
+    assert 'cache_bytes{cache="tts"} 2048' in lines
+    assert not any(line.startswith('pipeline_jobs_in_flight') for line in lines)
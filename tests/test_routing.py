@@ -0,0 +1,26 @@
+from app import route_stage, CELERY_IO_QUEUE, CELERY_CPU_QUEUE, CELERY_IO_FAST_QUEUE, CELERY_CPU_FAST_QUEUE
+
+def route(name, *args):
+    return route_stage(f'app.tasks.{name}', args, {}, {})
+
+def test_bulk_and_unprobed_jobs_use_the_regular_queues():
+    assert route('transcribe_stage', {'lane': 'bulk'}) == {'queue': CELERY_IO_QUEUE}
+    assert route('mux_stage', {'lane': 'bulk'}) == {'queue': CELERY_CPU_QUEUE}
+    assert route('extract_stage', {'job_id': 'j'}) == {'queue': CELERY_CPU_QUEUE}
+    assert route('extract_stage') == {'queue': CELERY_CPU_QUEUE}
+
+def test_fast_lane_jobs_use_the_fast_queues():
+    assert route('transcribe_stage', {'lane': 'fast'}) == {'queue': CELERY_IO_FAST_QUEUE}
+    assert route('extract_stage', {'lane': 'fast'}) == {'queue': CELERY_CPU_FAST_QUEUE}
+
+def test_chord_callbacks_follow_the_lane_of_their_branches():
+    assert route('merge_streams_stage', [{'lane': 'fast'}, {'lane': 'fast'}]) == {'queue': CELERY_IO_FAST_QUEUE}
+
+def test_other_tasks_are_left_to_celery():
+    assert route_stage('celery.chord_unlock', (), {}, {}) is None
+
+def test_each_route_is_a_new_dict():
+    # Celery replaces the queue name in the returned dict with a Queue object
+    first = route('mux_stage', {'lane': 'fast'})
+    first['queue'] = object()
+    assert route('mux_stage', {'lane': 'fast'}) == {'queue': CELERY_CPU_FAST_QUEUE}
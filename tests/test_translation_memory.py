@@ -0,0 +1,65 @@
+import pytest
+
+from app.utils import cache_store
+from app.utils import translation_memory
+
+@pytest.fixture(autouse=True)
+def memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_store, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(translation_memory, '_store', None)
+
+class RecordingTranslator:
+    """Translates by tagging each sentence and records every batch it is sent."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, sentences):
+        self.batches.append(list(sentences))
+        return [f'<{sentence}>' for sentence in sentences]
+
+def test_units_are_translated_once_and_joined_in_order():
+    translate = RecordingTranslator()
+    text = translation_memory.join_units(['good morning everyone', 'thanks. Bye!', 'good  morning everyone'])
+
+    result = translation_memory.translate_with_memory(text, 'es', translate)
+
+    assert translate.batches == [['good morning everyone', 'thanks.', 'Bye!']]
+    assert result == '<good morning everyone> <thanks.> <Bye!> <good morning everyone>'
+
+def test_remembered_units_are_not_sent_again():
+    translate = RecordingTranslator()
+    translation_memory.translate_with_memory('hello there\nsee you', 'es', translate)
+    result = translation_memory.translate_with_memory('see you\nnew line', 'es', translate)
+
+    assert translate.batches[-1] == ['new line']
+    assert result == '<see you> <new line>'
+
+def test_memory_is_kept_per_target_language_and_engine():
+    translate = RecordingTranslator()
+    translation_memory.translate_with_memory('hello', 'es', translate)
+    translation_memory.translate_with_memory('hello', 'fr', translate)
+    translation_memory.translate_with_memory('hello', 'es', translate, engine='local')
+    assert len(translate.batches) == 3
+
+def test_large_inputs_are_sent_in_bounded_batches():
+    translate = RecordingTranslator()
+    units = [f'line {i}' for i in range(translation_memory.MAX_SEGMENTS_PER_REQUEST + 5)]
+
+    result = translation_memory.translate_with_memory(translation_memory.join_units(units), 'es', translate)
+
+    assert [len(batch) for batch in translate.batches] == [translation_memory.MAX_SEGMENTS_PER_REQUEST, 5]
+    assert result == ' '.join(f'<{unit}>' for unit in units)
+
+def test_unspaced_targets_are_joined_without_spaces():
+    translate = RecordingTranslator()
+    assert translation_memory.translate_with_memory('one\ntwo', 'ja', translate) == '<one><two>'
+    assert translation_memory.translate_with_memory('one\ntwo', 'zh-TW', translate) == '<one><two>'
+
+def test_cjk_sentence_ends_split_without_following_space():
+    assert translation_memory.split_sentences('今日は。元気ですか？はい') == ['今日は。', '元気ですか？', 'はい']
+
+def test_empty_text_needs_no_backend():
+    translate = RecordingTranslator()
+    assert translation_memory.translate_with_memory(' \n ', 'es', translate) == ''
+    assert translate.batches == []
@@ -0,0 +1,65 @@
+import io
+import os
+
+import pytest
+
+from app.utils import uploads
+from app.utils.result_cache import HASH_BLOCK_SIZE, hash_file
+
+@pytest.fixture(autouse=True)
+def upload_dirs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+def test_chunk_at_wrong_offset_is_rejected_with_the_offset_to_resume_from():
+    session = uploads.init_upload('clip.mp4', 10)
+    uploads.append_chunk(session['upload_id'], 0, io.BytesIO(b'abcd'))
+
+    with pytest.raises(uploads.UploadOffsetMismatch) as excinfo:
+        uploads.append_chunk(session['upload_id'], 2, io.BytesIO(b'cdef'))
+    assert excinfo.value.offset == 4
+    assert uploads.get_upload(session['upload_id'])['offset'] == 4
+
+def test_resumed_upload_has_the_digest_of_the_whole_file():
+    data = os.urandom(2 * HASH_BLOCK_SIZE + 12345)
+    session = uploads.init_upload('clip.mp4', len(data))
+    upload_id = session['upload_id']
+
+    # Chunks that end inside blocks, resuming from the offset the server reports
+    offset = 0
+    for size in (3 * 1024 * 1024, HASH_BLOCK_SIZE, 5 * 1024 * 1024, len(data)):
+        offset = uploads.append_chunk(upload_id, offset, io.BytesIO(data[offset:offset + size]))
+        assert uploads.get_upload(upload_id)['offset'] == offset
+    video_path, digest = uploads.complete_upload(upload_id)
+
+    with open(video_path, 'rb') as f:
+        assert f.read() == data
+    assert digest == hash_file(video_path)
+
+def test_chunk_past_the_declared_size_is_rejected():
+    session = uploads.init_upload('clip.mp4', 4)
+    with pytest.raises(ValueError):
+        uploads.append_chunk(session['upload_id'], 0, io.BytesIO(b'abcdef'))
+
+def test_incomplete_upload_cannot_be_completed():
+    session = uploads.init_upload('clip.mp4', 8)
+    uploads.append_chunk(session['upload_id'], 0, io.BytesIO(b'abcd'))
+    with pytest.raises(ValueError):
+        uploads.complete_upload(session['upload_id'])
+
+@pytest.mark.parametrize('size', ['ten', '1.5', 1.5, 4.0, True, ' 7', '1_000', '-1', -1, [4]])
+def test_bad_declared_size_is_rejected(size):
+    with pytest.raises(ValueError):
+        uploads.init_upload('clip.mp4', size)
+
+@pytest.mark.parametrize('size, expected', [(None, None), ('', None), (0, 0), (12, 12), ('12', 12)])
+def test_declared_size_is_a_whole_number_of_bytes(size, expected):
+    assert uploads.init_upload('clip.mp4', size)['size'] == expected
+
+@pytest.mark.parametrize('upload_id', ['', '..', '../uploads', 'a/b', '/etc/passwd', '.partial'])
+def test_upload_id_cannot_leave_the_partial_directory(upload_id):
+    with pytest.raises(uploads.UploadNotFound):
+        uploads.get_upload(upload_id)
+    with pytest.raises(uploads.UploadNotFound):
+        uploads.append_chunk(upload_id, 0, io.BytesIO(b'abcd'))
+    with pytest.raises(uploads.UploadNotFound):
+        uploads.complete_upload(upload_id)
@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.utils.vad import detect_speech_segments, pack_pieces, pack_segments, VAD_MAX_GAP_SECONDS, VAD_MAX_SEGMENT_SECONDS
+from benchmarks.bench_vad import SAMPLE_RATE, speech_like, silence, to_int16
+
+def test_silence_has_no_speech():
+    rng = np.random.default_rng(0)
+    assert detect_speech_segments(to_int16(silence(20, rng)), SAMPLE_RATE) == []
+
+def test_steady_tone_is_not_speech():
+    t = np.arange(20 * SAMPLE_RATE) / SAMPLE_RATE
+    assert detect_speech_segments(to_int16(0.3 * np.sin(2 * np.pi * 440 * t)), SAMPLE_RATE) == []
+
+def sent_seconds(pieces):
+    return sum(end - start for start, end in pieces)
+
+def test_long_pause_is_cut_out():
+    rng = np.random.default_rng(0)
+    samples = to_int16(np.concatenate([speech_like(10, rng), silence(25, rng), speech_like(10, rng)]))
+    [pieces] = detect_speech_segments(samples, SAMPLE_RATE)
+    assert len(pieces) == 2
+    assert pieces[0][1] < 11
+    assert pieces[1][0] > 34
+    assert sent_seconds(pieces) < 21
+
+@pytest.mark.parametrize('layout', [
+    [('speech', 5), ('silence', 20), ('speech', 3)],
+    [('silence', 3), ('speech', 2), ('silence', 24), ('speech', 2), ('silence', 10)]
+])
+def test_segments_carry_no_long_silence(layout):
+    rng = np.random.default_rng(0)
+    signal = np.concatenate([speech_like(seconds, rng) if kind == 'speech' else silence(seconds, rng) for kind, seconds in layout])
+    segments = detect_speech_segments(to_int16(signal), SAMPLE_RATE)
+    silences, position = [], 0
+    for kind, seconds in layout:
+        if kind == 'silence':
+            silences.append((position, position + seconds))
+        position += seconds
+
+    # One call, as with a fixed window, but only the speech is sent
+    assert len(segments) == 1
+    assert sent_seconds(segments[0]) < sum(seconds for kind, seconds in layout if kind == 'speech') + 2
+    for start, end in segments[0]:
+        for silence_start, silence_end in silences:
+            assert min(end, silence_end) - max(start, silence_start) <= VAD_MAX_GAP_SECONDS
+
+def test_continuous_speech_needs_no_more_calls_than_fixed_windows():
+    rng = np.random.default_rng(0)
+    duration = 180
+    segments = detect_speech_segments(to_int16(speech_like(duration, rng)), SAMPLE_RATE)
+    pieces = [piece for segment in segments for piece in segment]
+    assert len(segments) <= math.ceil(duration / VAD_MAX_SEGMENT_SECONDS)
+    assert all(sent_seconds(segment) <= VAD_MAX_SEGMENT_SECONDS for segment in segments)
+    assert all(previous[1] <= following[0] for previous, following in zip(pieces, pieces[1:]))
+
+def test_pack_segments_uses_fewest_segments_and_covers_all_speech():
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        frames = int(rng.integers(50, 3000))
+        max_frames = int(rng.integers(5, 300))
+        speech = np.convolve(rng.random(frames) < rng.random() / 4, np.ones(int(rng.integers(1, 30))), 'same') > 0
+        edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+        runs = list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+        energy_db = rng.normal(-30, 5, frames).astype(np.float32)
+
+        segments = pack_segments(runs, energy_db, speech, max_frames)
+
+        covered = np.zeros(frames, dtype=bool)
+        for start, stop in segments:
+            assert 0 < stop - start <= max_frames
+            covered[start:stop] = True
+        assert not (speech & ~covered).any()
+        # Greedy windows starting at each uncovered speech frame are the fewest possible
+        fewest, window_end = 0, -1
+        for frame in np.flatnonzero(speech):
+            if frame >= window_end:
+                fewest, window_end = fewest + 1, frame + max_frames
+        assert len(segments) == fewest
+
+def test_pack_pieces_skips_long_pauses_without_extra_segments():
+    rng = np.random.default_rng(2)
+    for _ in range(300):
+        frames = int(rng.integers(50, 3000))
+        max_frames = int(rng.integers(5, 300))
+        max_gap = int(rng.integers(1, 40))
+        speech = np.convolve(rng.random(frames) < rng.random() / 10, np.ones(int(rng.integers(1, 30))), 'same') > 0
+        edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+        runs = list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+        energy_db = rng.normal(-30, 5, frames).astype(np.float32)
+
+        segments = pack_pieces(runs, energy_db, speech, max_frames, max_gap)
+
+        covered = np.zeros(frames, dtype=bool)
+        for pieces in segments:
+            assert 0 < sum(stop - start for start, stop in pieces) <= max_frames
+            for start, stop in pieces:
+                covered[start:stop] = True
+                assert not (~speech[start:stop]).all()
+            for previous, following in zip(pieces, pieces[1:]):
+                assert following[0] - previous[1] > max_gap
+        assert not (speech & ~covered).any()
+        assert len(segments) <= math.ceil(frames / max_frames)
@@ -0,0 +1,46 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from app.utils.wav_utils import write_wav_payloads, mmap_wav
+
+def make_payload(frames, sample_rate=24000, channels=1, sample_width=2):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(sample_rate)
+        writer.writeframes(frames)
+    return buffer.getvalue()
+
+def test_payloads_are_concatenated_in_order(tmp_path):
+    output_path = str(tmp_path / 'speech.wav')
+    first = np.arange(100, dtype='<i2')
+    second = np.arange(100, 150, dtype='<i2')
+
+    write_wav_payloads(iter([make_payload(first.tobytes()), make_payload(second.tobytes())]), output_path)
+
+    with wave.open(output_path, 'rb') as reader:
+        assert reader.getframerate() == 24000
+        assert reader.getnframes() == 150
+    assert np.array_equal(mmap_wav(output_path), np.concatenate([first, second]))
+
+@pytest.mark.parametrize('mismatched', [
+    {'sample_rate': 16000},
+    {'channels': 2},
+    {'sample_width': 1}
+])
+def test_mismatched_formats_are_rejected(tmp_path, mismatched):
+    payloads = [make_payload(b'\x00\x00' * 10), make_payload(b'\x00\x00' * 10, **mismatched)]
+    with pytest.raises(ValueError):
+        write_wav_payloads(payloads, str(tmp_path / 'speech.wav'))
+
+def test_non_wav_payload_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_wav_payloads([b'ID3 mp3 data'], str(tmp_path / 'speech.wav'))
+
+def test_no_payloads_is_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        write_wav_payloads([], str(tmp_path / 'speech.wav'))